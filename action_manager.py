@@ -1,13 +1,37 @@
 class ActionManager:
     def __init__(self, database):
         self.db = database
-        
+
     def discover_actions(self, program):
-        # Scan program for available actions
-        # Map to voice commands
-        pass
+        """Record a program's imported shortcuts as its available actions
+
+        Returns [{'action_name', 'shortcut', 'voice_command'}] and replaces the
+        program's rows in discovered_actions.
+        """
+        try:
+            with self.db.reading() as conn:
+                rows = conn.execute("""
+                    SELECT command_name, shortcut, voice_command FROM commands
+                    WHERE program_name = ? AND shortcut IS NOT NULL
+                    ORDER BY command_name
+                """, (program,)).fetchall()
+
+            def record(conn):
+                conn.execute("DELETE FROM discovered_actions WHERE program_name = ?", (program,))
+                conn.executemany("""
+                    INSERT INTO discovered_actions (program_name, action_name, shortcut)
+                    VALUES (?, ?, ?)
+                """, [(program, name, shortcut) for name, shortcut, _ in rows])
+            self.db.write(record)
+
+            print(f"DEBUG: AM - Discovered {len(rows)} actions for {program}")
+            return [{'action_name': name, 'shortcut': shortcut, 'voice_command': voice}
+                    for name, shortcut, voice in rows]
+        except Exception as e:
+            print(f"DEBUG: AM - Error discovering actions for {program}: {e}")
+            return []
 
     def execute_action(self, command):
         # Execute command in target program
         # Handle errors
-        pass 
\ No newline at end of file
+        pass
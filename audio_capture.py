@@ -0,0 +1,139 @@
+"""Audio capture thread feeding a preallocated ring buffer"""
+import pyaudio
+import threading
+import time
+
+INPUT_OVERFLOWED = -9981  # PortAudio paInputOverflowed
+
+class AudioCapture:
+    def __init__(self, audio, device_index=None, rate=16000, chunk_frames=1600, buffer_seconds=10):
+        """Open the input stream and preallocate the ring buffer"""
+        self.rate = rate
+        self.chunk_frames = chunk_frames
+        self.sample_width = 2  # paInt16
+        self.capacity = rate * buffer_seconds * self.sample_width
+        self.ring = bytearray(self.capacity)
+
+        # Single producer / single consumer: only the capture thread advances
+        # write_pos and only the reader advances read_pos, so no lock is needed
+        self.write_pos = 0
+        self.read_pos = 0
+
+        self._discard_requested = False
+        self.dropped_bytes = 0     # Ring full, consumer fell behind
+        self.input_overflows = 0   # PortAudio overflowed before we read
+        self.data_ready = threading.Event()
+        self._active = threading.Event()
+        self._running = True
+
+        self.stream = audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=rate,
+            input=True,
+            input_device_index=device_index,
+            frames_per_buffer=chunk_frames,
+            start=False
+        )
+        self.thread = threading.Thread(target=self._capture_loop, name="AudioCapture", daemon=True)
+        self.thread.start()
+        print(f"DEBUG: AC - Capture thread started ({self.capacity // self.sample_width} sample ring)")
+
+    def start(self):
+        """Start filling the ring buffer"""
+        # Stale audio is dropped by the reader so read_pos keeps a single owner
+        self._discard_requested = True
+        self._active.set()
+
+    def stop(self):
+        """Stop filling the ring buffer"""
+        self._active.clear()
+
+    def _capture_loop(self):
+        """Own the stream: start/stop it and copy every chunk into the ring"""
+        streaming = False
+        while self._running:
+            if not self._active.is_set():
+                if streaming:
+                    self.stream.stop_stream()
+                    streaming = False
+                self._active.wait(0.1)
+                continue
+
+            if not streaming:
+                self.stream.start_stream()
+                streaming = True
+
+            try:
+                data = self.stream.read(self.chunk_frames, exception_on_overflow=True)
+            except IOError as e:
+                if e.errno == INPUT_OVERFLOWED:
+                    self.input_overflows += 1
+                    print(f"DEBUG: AC - Input overflow #{self.input_overflows}")
+                    continue
+                print(f"DEBUG: AC - Error reading audio: {e}")
+                time.sleep(0.1)
+                continue
+
+            self._write(data)
+
+        if streaming:
+            self.stream.stop_stream()
+
+    def _write(self, data):
+        """Copy a chunk into the ring, dropping it if the reader is too far behind"""
+        size = len(data)
+        if self.capacity - (self.write_pos - self.read_pos) < size:
+            self.dropped_bytes += size
+            return
+
+        start = self.write_pos % self.capacity
+        first = min(size, self.capacity - start)
+        self.ring[start:start + first] = data[:first]
+        if first < size:
+            self.ring[:size - first] = data[first:]
+        self.write_pos += size
+        self.data_ready.set()
+
+    def available(self):
+        """Number of buffered bytes not yet read"""
+        return self.write_pos - self.read_pos
+
+    def read(self, num_frames, timeout=0):
+        """Return num_frames of audio, or None if not buffered within timeout"""
+        if self._discard_requested:
+            self._discard_requested = False
+            self.discard()
+
+        size = num_frames * self.sample_width
+        deadline = time.monotonic() + timeout
+        while self.available() < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.data_ready.clear()
+            if self.available() < size:
+                self.data_ready.wait(remaining)
+
+        start = self.read_pos % self.capacity
+        first = min(size, self.capacity - start)
+        data = bytes(self.ring[start:start + first])
+        if first < size:
+            data += bytes(self.ring[:size - first])
+        self.read_pos += size
+        return data
+
+    def discard(self):
+        """Drop everything currently buffered (reader side only)"""
+        self.read_pos = self.write_pos
+
+    def close(self):
+        """Stop the capture thread and close the stream"""
+        self._running = False
+        self._active.set()
+        self.thread.join(timeout=1.0)
+        self.stream.close()
+        if self.dropped_bytes or self.input_overflows:
+            print(f"DEBUG: AC - Dropped {self.dropped_bytes // self.sample_width} samples, "
+                  f"{self.input_overflows} input overflows")
+        print("DEBUG: AC - Capture closed")
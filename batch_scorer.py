@@ -0,0 +1,122 @@
+"""Vectorized Levenshtein scoring of one or more hypotheses against the whole catalog"""
+import numpy as np
+
+ONE = np.uint64(1)
+
+class BatchScorer:
+    def __init__(self, phrases=()):
+        """Encode phrases once into a padded matrix of character ids"""
+        self.build(phrases)
+
+    def build(self, phrases):
+        """(Re)encode the candidate phrases
+
+        Rows are stored longest first so that, column by column, the
+        phrases still being scanned are always a prefix of the matrix.
+        """
+        self.phrases = [p.lower() for p in phrases]
+        lengths = np.array([len(p) for p in self.phrases], dtype=np.int64)
+        self.order = np.argsort(-lengths, kind='stable')
+        self.original_lengths = lengths
+        self.lengths = lengths[self.order]
+        self.alphabet = {}
+        width = int(self.lengths[0]) if len(self.phrases) else 0
+        self.ids = np.zeros((len(self.phrases), width), dtype=np.int32)  # 0 = padding
+        for row, index in enumerate(self.order):
+            phrase = self.phrases[index]
+            self.ids[row, :len(phrase)] = [self.alphabet.setdefault(ch, len(self.alphabet) + 1)
+                                           for ch in phrase]
+        # Number of phrases still "alive" at each column
+        self.active = np.searchsorted(-self.lengths, -np.arange(width), side='left')
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def distances(self, text):
+        """Levenshtein distance from text to every phrase (original phrase order)"""
+        text = text.lower()
+        n = len(self.phrases)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        if not text:
+            return self.original_lengths.copy()
+        if len(text) > 64:
+            sorted_distances = self._dp_distances(text)
+        else:
+            sorted_distances = self._bitparallel_distances(text)
+        distances = np.empty(n, dtype=np.int64)
+        distances[self.order] = sorted_distances
+        return distances
+
+    def _bitparallel_distances(self, text):
+        """Myers/Hyyro bit-vector edit distance, one uint64 per phrase
+
+        The query is the bit pattern; every phrase advances one character
+        per step, so the whole catalog is scored in max-length steps.
+        """
+        m = len(text)
+        peq = np.zeros(len(self.alphabet) + 1, dtype=np.uint64)
+        for i, ch in enumerate(text):
+            char_id = self.alphabet.get(ch)
+            if char_id:
+                peq[char_id] |= np.uint64(1 << i)
+        high = np.uint64(1 << (m - 1))
+
+        n = len(self.phrases)
+        pv = np.full(n, np.uint64((1 << m) - 1), dtype=np.uint64)
+        mv = np.zeros(n, dtype=np.uint64)
+        score = np.full(n, m, dtype=np.int64)
+
+        for column, alive in enumerate(self.active):
+            if alive == 0:
+                break
+            eq = peq[self.ids[:alive, column]]
+            p, v = pv[:alive], mv[:alive]
+            xv = eq | v
+            xh = (((eq & p) + p) ^ p) | eq
+            ph = v | ~(xh | p)
+            mh = p & xh
+            score[:alive] += ((ph & high) != 0).astype(np.int64) - ((mh & high) != 0).astype(np.int64)
+            ph = (ph << ONE) | ONE
+            mh = mh << ONE
+            pv[:alive] = mh | ~(xv | ph)
+            mv[:alive] = ph & xv
+        return score
+
+    def _dp_distances(self, text):
+        """Row-by-row DP over all phrases at once (queries longer than 64 chars)"""
+        n, width = self.ids.shape
+        columns = np.arange(width + 1, dtype=np.int64)
+        row = np.broadcast_to(columns, (n, width + 1)).copy()
+        for i, ch in enumerate(text, start=1):
+            cost = (self.ids != self.alphabet.get(ch, -1)).astype(np.int64)
+            tmp = np.empty_like(row)
+            tmp[:, 0] = i
+            tmp[:, 1:] = np.minimum(row[:, 1:] + 1, row[:, :-1] + cost)
+            # Insertions: row[j] = min over k<=j of tmp[k] + (j - k)
+            row = np.minimum.accumulate(tmp - columns, axis=1) + columns
+        return row[np.arange(n), self.lengths]
+
+    def scores(self, text):
+        """Similarity 0-100 to every phrase (100 = identical)"""
+        if not self.phrases:
+            return np.zeros(0, dtype=np.float64)
+        longest = np.maximum(self.original_lengths, len(text))
+        longest[longest == 0] = 1
+        return (1.0 - self.distances(text) / longest) * 100.0
+
+    def score_batch(self, hypotheses):
+        """Similarity matrix (hypotheses x phrases) for an N-best list"""
+        if not hypotheses:
+            return np.zeros((0, len(self.phrases)))
+        return np.vstack([self.scores(h) for h in hypotheses])
+
+    def best(self, text, k=1):
+        """Return up to k (phrase, score) pairs, best first"""
+        if not self.phrases:
+            return []
+        scores = self.scores(text)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.phrases[i], float(scores[i])) for i in top]
@@ -0,0 +1,45 @@
+"""Benchmark: calculate_similarity loop vs vectorized BatchScorer"""
+import random
+import string
+import time
+from command_index import calculate_similarity
+from batch_scorer import BatchScorer
+
+SIZES = [100, 10_000, 100_000]
+HYPOTHESES = ["play selection", "stop playback", "record enable", "add track", "save project"]
+
+def synthetic_commands(count, seed=1):
+    """Random multi-word voice commands"""
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+             for _ in range(2000)]
+    return [' '.join(rng.sample(words, rng.randint(1, 3))) for _ in range(count)]
+
+def time_loop(commands, text):
+    """Current implementation: one Python call per candidate"""
+    started = time.perf_counter()
+    best = max(calculate_similarity(text, command) for command in commands)
+    return time.perf_counter() - started, best
+
+def time_batch(scorer, hypotheses):
+    """Vectorized Levenshtein for every hypothesis against every candidate"""
+    started = time.perf_counter()
+    scores = scorer.score_batch(hypotheses)
+    return time.perf_counter() - started, scores.max()
+
+if __name__ == "__main__":
+    print(f"{'commands':>10} {'loop 1 hyp':>12} {'batch 1 hyp':>12} {'loop 5-best':>12} "
+          f"{'batch 5-best':>13} {'encode':>9}")
+    for size in SIZES:
+        commands = synthetic_commands(size)
+        started = time.perf_counter()
+        scorer = BatchScorer(commands)
+        encode = time.perf_counter() - started
+
+        loop_one, _ = time_loop(commands, HYPOTHESES[0])
+        batch_one, _ = time_batch(scorer, HYPOTHESES[:1])
+        loop_all = sum(time_loop(commands, h)[0] for h in HYPOTHESES)
+        batch_all, _ = time_batch(scorer, HYPOTHESES)
+
+        print(f"{size:>10} {loop_one * 1000:>10.2f}ms {batch_one * 1000:>10.2f}ms "
+              f"{loop_all * 1000:>10.2f}ms {batch_all * 1000:>11.2f}ms {encode * 1000:>7.1f}ms")
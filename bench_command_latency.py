@@ -0,0 +1,57 @@
+"""Measure command delivery latency: 100 ms root.after polling vs event bridge"""
+import tkinter as tk
+import queue
+import random
+import threading
+import time
+
+COMMANDS = 50
+
+def run_delivery(mode):
+    """Deliver COMMANDS simulated utterances to a Tk loop and return latencies (ms)"""
+    root = tk.Tk()
+    root.withdraw()
+    command_queue = queue.Queue()
+    latencies = []
+
+    def drain(event=None):
+        while True:
+            try:
+                command = command_queue.get_nowait()
+            except queue.Empty:
+                break
+            latencies.append((time.monotonic() - command['utterance_end']) * 1000)
+        if len(latencies) >= COMMANDS:
+            root.quit()
+
+    def poll():
+        drain()
+        root.after(100, poll)
+
+    def producer():
+        for _ in range(COMMANDS):
+            time.sleep(random.uniform(0.05, 0.3))
+            command_queue.put({'voice_text': 'play', 'utterance_end': time.monotonic()})
+            if mode == 'event':
+                root.event_generate('<<VoiceCommand>>', when='tail')
+
+    if mode == 'poll':
+        root.after(100, poll)
+    else:
+        root.bind('<<VoiceCommand>>', drain)
+
+    threading.Thread(target=producer, daemon=True).start()
+    root.mainloop()
+    root.destroy()
+    return latencies
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    average = sum(latencies) / len(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<22} avg {average:6.1f} ms   p95 {p95:6.1f} ms   max {latencies[-1]:6.1f} ms")
+
+if __name__ == "__main__":
+    print(f"Delivering {COMMANDS} commands per mode...\n")
+    report("Before (after(100))", run_delivery('poll'))
+    report("After (event_generate)", run_delivery('event'))
@@ -0,0 +1,86 @@
+"""Benchmark: hot commands-table lookups on a 100k-row catalog, before and after the index migration"""
+import os
+import random
+import sqlite3
+import string
+import tempfile
+import time
+from database import Database
+
+ROWS = 100_000
+LOOKUPS = 200
+
+# label -> (sql, parameters built from a (name, shortcut, category, voice) row)
+QUERIES = {
+    'name or voice (add_command)': ("""
+        SELECT id FROM commands
+        WHERE LOWER(command_name) = LOWER(?) OR LOWER(voice_command) = LOWER(?)
+    """, lambda row: (row[0].upper(), row[3].upper())),
+    'voice -> name': ("SELECT command_name FROM commands WHERE LOWER(voice_command) = LOWER(?)",
+                      lambda row: (row[3].upper(),)),
+    'exact name': ("SELECT id FROM commands WHERE command_name = ?", lambda row: (row[0],)),
+}
+
+def populate(db, count, seed=1):
+    """Insert count synthetic commands without any indexes"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(8))
+        rows.append((f"Command {i} {word.title()}", f"Ctrl+{i}", "Bench", f"{word} {i}"))
+    db.write(lambda conn: conn.executemany("""
+        INSERT INTO commands (command_name, shortcut, category, voice_command)
+        VALUES (?, ?, ?, ?)
+    """, rows))
+    return rows
+
+def time_queries(db, rows):
+    """Average milliseconds per lookup for each query, plus its plan
+
+    Uses a fresh connection: one opened before the migration keeps its
+    cached statements and schema, and would still report the old SCAN plans.
+    """
+    rng = random.Random(2)
+    probes = [rng.choice(rows) for _ in range(LOOKUPS)]
+    results = {}
+    conn = sqlite3.connect(db.db_path)
+    cursor = conn.cursor()
+    for label, (sql, make_args) in QUERIES.items():
+        started = time.perf_counter()
+        for row in probes:
+            cursor.execute(sql, make_args(row)).fetchall()
+        elapsed = (time.perf_counter() - started) / LOOKUPS * 1000
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, make_args(probes[0]))
+        plan = '; '.join(row[-1] for row in cursor.fetchall())
+        results[label] = (elapsed, plan)
+    conn.close()
+    return results
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'bench.db'))
+        db.initialize()
+        # Start from an unindexed table, as databases created before the migration were
+        def drop_indexes(conn):
+            for index in ('idx_commands_name', 'idx_commands_shortcut',
+                          'idx_commands_voice_lower', 'idx_commands_name_lower',
+                          'idx_commands_program_name_lower'):
+                conn.execute(f"DROP INDEX IF EXISTS {index}")
+            conn.execute("PRAGMA user_version = 0")
+        db.write(drop_indexes)
+        rows = populate(db, ROWS)
+        before = time_queries(db, rows)
+
+        started = time.perf_counter()
+        db.migrate()
+        migrate_time = time.perf_counter() - started
+        after = time_queries(db, rows)
+        db.cleanup()
+
+    print(f"{ROWS} rows, {LOOKUPS} lookups each; migration took {migrate_time:.2f}s")
+    print(f"{'query':<30} {'before':>10} {'after':>10} {'speedup':>9}")
+    for label in QUERIES:
+        print(f"{label:<30} {before[label][0]:>8.3f}ms {after[label][0]:>8.3f}ms "
+              f"{before[label][0] / after[label][0]:>8.0f}x")
+        print(f"    before: {before[label][1]}")
+        print(f"    after:  {after[label][1]}")
@@ -0,0 +1,37 @@
+"""Benchmark: streaming KBS import of a large keymap, first into an empty catalog, then re-imported"""
+import os
+import random
+import string
+import tempfile
+import time
+from database import Database
+
+LINES = 300_000
+
+def write_keymap(path, count, seed=1):
+    """Write count synthetic 'Name|Shortcut|Category' lines"""
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        for i in range(count):
+            word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(8))
+            f.write(f"{word.title()} Command {i}|Ctrl+Alt+{i}|Bench\n")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        keymap = os.path.join(directory, 'bench.kbs')
+        write_keymap(keymap, LINES)
+        size = os.path.getsize(keymap) / 1e6
+        db = Database(os.path.join(directory, 'bench.db'))
+        db.initialize()
+        results = []
+        for label in ('fresh import', 're-import'):
+            started = time.perf_counter()
+            counts = db.bulk_upsert_commands(db.iter_kbs_records(keymap))
+            results.append((label, time.perf_counter() - started, counts))
+        db.cleanup()
+
+    print(f"{LINES} lines ({size:.1f} MB)")
+    print(f"{'run':<14} {'seconds':>8} {'rows/s':>10} {'updated':>9} {'inserted':>9}")
+    for label, elapsed, counts in results:
+        print(f"{label:<14} {elapsed:>8.2f} {counts['rows'] / elapsed:>10,.0f} "
+              f"{counts['updated']:>9} {counts['inserted']:>9}")
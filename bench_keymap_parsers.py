@@ -0,0 +1,73 @@
+"""Benchmark: streaming keymap parsers on a synthetic 500k-entry keymap (time and peak memory)"""
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from database import Database
+from shortcut_parser import ShortcutParser
+
+ENTRIES = 500_000
+
+def entries(count):
+    for i in range(count):
+        yield f"Command {i}", f"Ctrl+Alt+{i}", f"Category {i % 40}"
+
+def write_xml(path, count):
+    """Studio One style: commands grouped in named categories, fields as attributes"""
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<KeyScheme>\n')
+        for i, (name, shortcut, category) in enumerate(entries(count)):
+            if i % 1000 == 0:
+                f.write(('  </Category>\n' if i else '') + f'  <Category name="Group {i // 1000}">\n')
+            f.write(f'    <Command name="{name}" shortcut="{shortcut}"/>\n')
+        f.write('  </Category>\n</KeyScheme>\n')
+
+def write_json(path, count):
+    """A top-level array of shortcut objects"""
+    with open(path, 'w') as f:
+        f.write('[\n')
+        for i, (name, shortcut, category) in enumerate(entries(count)):
+            f.write((',\n' if i else '') + json.dumps({'name': name, 'shortcut': shortcut, 'category': category}))
+        f.write('\n]\n')
+
+def write_txt(path, count):
+    with open(path, 'w') as f:
+        for name, shortcut, category in entries(count):
+            f.write(f"{name}|{shortcut}|{category}\n")
+
+def measure(parser, path):
+    """(records, seconds) for a plain run, then peak traced bytes for a second run"""
+    started = time.perf_counter()
+    count = sum(1 for _ in parser.iter_records(path))
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    for _ in parser.iter_records(path):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        parser = ShortcutParser(None)
+        results = []
+        for extension, write in (('txt', write_txt), ('xml', write_xml), ('json', write_json)):
+            path = os.path.join(directory, f'bench.{extension}')
+            write(path, ENTRIES)
+            size = os.path.getsize(path) / 1e6
+            results.append((extension, size) + measure(parser, path))
+
+        # End to end: stream the XML keymap straight into the bulk importer
+        db = Database(os.path.join(directory, 'bench.db'))
+        db.initialize()
+        started = time.perf_counter()
+        counts = ShortcutParser(db).import_file(os.path.join(directory, 'bench.xml'))
+        import_time = time.perf_counter() - started
+        db.cleanup()
+
+    print(f"{ENTRIES} entries")
+    print(f"{'format':<7} {'MB':>7} {'records':>9} {'seconds':>8} {'records/s':>11} {'peak MB':>8}")
+    for extension, size, count, elapsed, peak in results:
+        print(f"{extension:<7} {size:>7.1f} {count:>9} {elapsed:>8.2f} {count / elapsed:>11,.0f} {peak / 1e6:>8.2f}")
+    print(f"xml -> database: {counts['rows']} rows in {import_time:.2f}s ({counts['rows'] / import_time:,.0f} rows/s)")
@@ -0,0 +1,151 @@
+"""Immutable in-memory snapshot of the command catalog, swapped when the database changes"""
+from collections import Counter
+from types import MappingProxyType
+import threading
+
+class CommandSnapshot:
+    """One consistent, read-only view of the commands table"""
+    __slots__ = ('version', 'rows', 'by_voice', 'by_name', 'voice_commands')
+
+    def __init__(self, version, rows):
+        by_voice = {}
+        by_name = {}
+        for command_name, voice_command, key in rows:
+            if command_name:
+                by_name.setdefault(command_name.lower(), command_name)
+            if voice_command:
+                by_voice.setdefault(voice_command.lower(), command_name)
+        self.version = version
+        self.rows = tuple(rows)  # (command_name, voice_command, phonetic_key)
+        self.by_voice = MappingProxyType(by_voice)  # voice command -> command name
+        self.by_name = MappingProxyType(by_name)    # lowercased name -> command name
+        self.voice_commands = frozenset(by_voice)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def command_for(self, voice_command):
+        """Command name a voice command maps to, or None"""
+        return self.by_voice.get(voice_command.lower()) if voice_command else None
+
+    def is_known(self, text):
+        """True if text is a voice command or a command name"""
+        text = text.lower()
+        return text in self.by_voice or text in self.by_name
+
+class ChangeSet:
+    """Delta applied to the commands table; rows are (command_name, voice_command, phonetic_key)"""
+    __slots__ = ('added', 'removed', 'changed', 'unchanged', 'snapshots')
+
+    def __init__(self):
+        self.added = []    # Rows inserted
+        self.removed = []  # Rows deleted
+        self.changed = []  # Rows whose shortcut or category changed (voice mapping kept)
+        self.unchanged = 0
+        self.snapshots = None  # (before, after) snapshot versions once the catalog applied it
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    @property
+    def voice_changed(self):
+        """True if the set of voice commands changed (shortcut-only edits leave it alone)"""
+        return any(voice for _, voice, _ in self.added + self.removed)
+
+    def summary(self):
+        return (f"{len(self.added)} added, {len(self.removed)} removed, "
+                f"{len(self.changed)} changed, {self.unchanged} unchanged")
+
+class CommandCatalog:
+    def __init__(self, database):
+        self.db = database
+        self.state = (None, None)  # (snapshot, (write counter, commands_version) it was built from)
+        self.version = 0
+        self.rebuild_lock = threading.Lock()
+        self.rebuilds = 0
+        self.patches = 0
+
+    def current(self):
+        """Return the latest snapshot; lock-free unless this process has written since"""
+        snapshot, source = self.state
+        if snapshot is not None and source[0] == self.db.write_count:
+            return snapshot
+        return self.refresh()
+
+    def check(self):
+        """Also pick up commits made through other connections or processes"""
+        snapshot, source = self.state
+        if snapshot is None:
+            return self.refresh()
+        try:
+            if self.db.commands_version() != source[1]:
+                return self.refresh()
+        except Exception as e:
+            print(f"DEBUG: CC - Error checking catalog version: {e}")
+        return snapshot
+
+    def apply(self, changes, before, after):
+        """Patch the snapshot with a ChangeSet instead of re-reading the table
+
+        before/after are the commands_version the change was made against
+        and produced. If the snapshot was built from any other version it
+        is left stale and the next current() rebuilds it from the table.
+        """
+        with self.rebuild_lock:
+            snapshot, source = self.state
+            if snapshot is None or source[1] != before:
+                return None
+            base = snapshot.version
+            if changes.added or changes.removed:
+                removed = Counter(changes.removed)
+                rows = []
+                for row in snapshot.rows:
+                    if removed[row]:
+                        removed[row] -= 1
+                    else:
+                        rows.append(row)
+                rows.extend(changes.added)
+                self.version += 1
+                snapshot = CommandSnapshot(self.version, rows)
+                print(f"DEBUG: CC - Catalog snapshot v{snapshot.version} patched: {changes.summary()}")
+            # Shortcut-only changes keep the same snapshot: it holds no shortcuts
+            self.state = (snapshot, (self.db.write_count, after))
+            changes.snapshots = (base, snapshot.version)
+            self.patches += 1
+            return snapshot
+
+    def refresh(self):
+        """Rebuild the snapshot if the table changed and swap it in atomically"""
+        with self.rebuild_lock:
+            snapshot, source = self.state
+            write_count = self.db.write_count  # Read first: a later write triggers another check
+            try:
+                with self.db.lock, self.db.reading() as conn:
+                    # One read transaction: the rows belong to exactly this version
+                    conn.execute("BEGIN")
+                    try:
+                        version = self.db.commands_version(conn)
+                        if snapshot is not None and version == source[1]:
+                            # Nothing catalog-relevant changed (e.g. only shortcuts or samples)
+                            self.state = (snapshot, (write_count, version))
+                            return snapshot
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            SELECT command_name, voice_command, phonetic_key
+                            FROM commands
+                        """)
+                        rows = cursor.fetchall()
+                    finally:
+                        conn.execute("COMMIT")
+                source = (write_count, version)
+            except Exception as e:
+                print(f"DEBUG: CC - Error loading catalog: {e}")
+                return snapshot or CommandSnapshot(0, ())
+            self.version += 1
+            snapshot = CommandSnapshot(self.version, rows)
+            # Single reference assignment: readers see the old or the new snapshot, never a mix
+            self.state = (snapshot, source)
+            self.rebuilds += 1
+            print(f"DEBUG: CC - Catalog snapshot v{snapshot.version}: {len(rows)} commands, "
+                  f"{len(snapshot.by_voice)} voice commands")
+            return snapshot
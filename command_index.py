@@ -0,0 +1,130 @@
+"""Character-trigram inverted index over voice commands and samples"""
+from collections import defaultdict
+import math
+
+def calculate_similarity(text1, text2):
+    """Calculate similarity between two texts (0-100)"""
+    text1 = text1.lower()
+    text2 = text2.lower()
+
+    if text1 == text2:
+        return 100
+
+    # Check if one is contained in the other
+    if text1 in text2 or text2 in text1:
+        return 75
+
+    # Stricter character matching
+    matches = 0
+    total = max(len(text1), len(text2))
+    for i in range(min(len(text1), len(text2))):
+        if text1[i] == text2[i]:
+            matches += 1
+        else:
+            # Penalize differences more
+            matches -= 0.5
+
+    score = (matches / total) * 100
+    return max(0, score)  # Don't return negative scores
+
+def edit_similarity(text1, text2):
+    """Normalized Levenshtein similarity (0-100) of two short texts"""
+    text1 = text1.lower()
+    text2 = text2.lower()
+    longest = max(len(text1), len(text2))
+    if not longest:
+        return 100
+    previous = list(range(len(text2) + 1))
+    for i, ch1 in enumerate(text1, 1):
+        current = [i]
+        for j, ch2 in enumerate(text2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch1 != ch2)))
+        previous = current
+    return (1.0 - previous[-1] / longest) * 100.0
+
+def trigrams(text):
+    """Return the set of boundary-padded character trigrams in text"""
+    padded = f"  {' '.join(text.lower().split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CommandIndex:
+    def __init__(self, min_overlap=0.3):
+        """min_overlap: share of the query's trigrams a candidate must contain"""
+        self.min_overlap = min_overlap
+        self.postings = defaultdict(set)  # trigram -> phrase ids
+        self.phrases = {}                 # phrase id -> phrase
+        self.phrase_ids = {}              # phrase -> phrase id
+        self.targets = {}                 # phrase id -> command name (catalog entries only)
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def __contains__(self, phrase):
+        return phrase.lower() in self.phrase_ids
+
+    def clear(self):
+        """Remove every entry"""
+        self.postings.clear()
+        self.phrases.clear()
+        self.phrase_ids.clear()
+        self.targets.clear()
+
+    def add(self, phrase, command_name=None):
+        """Index a phrase; command_name marks it as a catalog voice command"""
+        phrase = phrase.lower()
+        phrase_id = self.phrase_ids.get(phrase)
+        if phrase_id is None:
+            phrase_id = self.next_id
+            self.next_id += 1
+            self.phrases[phrase_id] = phrase
+            self.phrase_ids[phrase] = phrase_id
+            for gram in trigrams(phrase):
+                self.postings[gram].add(phrase_id)
+        if command_name and phrase_id not in self.targets:
+            self.targets[phrase_id] = command_name
+        return phrase_id
+
+    def remove(self, phrase):
+        """Drop a phrase from the index"""
+        phrase_id = self.phrase_ids.pop(phrase.lower(), None)
+        if phrase_id is None:
+            return
+        for gram in trigrams(self.phrases.pop(phrase_id)):
+            ids = self.postings.get(gram)
+            if ids:
+                ids.discard(phrase_id)
+                if not ids:
+                    del self.postings[gram]
+        self.targets.pop(phrase_id, None)
+
+    def command_for(self, phrase):
+        """Return the command name a catalog phrase maps to"""
+        phrase_id = self.phrase_ids.get(phrase.lower())
+        return self.targets.get(phrase_id) if phrase_id is not None else None
+
+    def candidates(self, text, catalog_only=False):
+        """Return ids of phrases sharing enough trigrams with text"""
+        grams = trigrams(text)
+        counts = defaultdict(int)
+        for gram in grams:
+            for phrase_id in self.postings.get(gram, ()):
+                counts[phrase_id] += 1
+        needed = max(1, math.ceil(len(grams) * self.min_overlap))
+        return [phrase_id for phrase_id, count in counts.items()
+                if count >= needed and (not catalog_only or phrase_id in self.targets)]
+
+    def top_k(self, text, k=5, catalog_only=False):
+        """Return up to k (phrase, score, command_name) tuples, best first"""
+        text = text.lower()
+        exact = self.phrase_ids.get(text)
+        if exact is not None and (not catalog_only or exact in self.targets):
+            if k == 1:
+                return [(text, 100, self.targets.get(exact))]
+
+        scored = []
+        for phrase_id in self.candidates(text, catalog_only):
+            phrase = self.phrases[phrase_id]
+            scored.append((phrase, calculate_similarity(text, phrase), self.targets.get(phrase_id)))
+        scored.sort(key=lambda match: match[1], reverse=True)
+        return scored[:k]
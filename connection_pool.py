@@ -0,0 +1,57 @@
+"""Thread-local pool of read-only connections with per-connection statement caches"""
+from contextlib import contextmanager
+import threading
+from db_writer import open_connection
+
+class ConnectionPool:
+    def __init__(self, db_path, cached_statements=256):
+        """cached_statements: prepared statements kept per connection (sqlite3 default is 128)"""
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.local = threading.local()
+        self.connections = []  # Every connection handed out, closed in close()
+        self.lock = threading.Lock()
+        self.opened = 0
+        self.checkouts = 0
+
+    def get(self):
+        """This thread's connection, opened on first use and reused afterwards"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = open_connection(self.db_path, read_only=True,
+                                   cached_statements=self.cached_statements)
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+                self.opened += 1
+        self.checkouts += 1  # Approximate under contention; only used for stats
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... (the connection stays open for reuse)"""
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            # Autocommit readers only hold a snapshot while a cursor is mid-fetch
+            if conn.in_transaction:
+                conn.rollback()
+
+    def stats(self):
+        """Connections opened versus checkouts served"""
+        reused = max(0, self.checkouts - self.opened)
+        return {
+            'connections': self.opened,
+            'checkouts': self.checkouts,
+            'reused': reused,
+            'reuse_ratio': reused / self.checkouts if self.checkouts else 0.0
+        }
+
+    def close(self):
+        """Close every pooled connection; threads reopen one on their next checkout"""
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections = []
+        self.local = threading.local()
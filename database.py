@@ -1,118 +1,380 @@
+import os
 import sqlite3
+import string
+import threading
+import time
 from datetime import datetime
+from phonetic_index import phonetic_key
+from command_catalog import CommandCatalog, ChangeSet
+from text_normalizer import DEFAULT_RULES
+from db_writer import DatabaseWriter
+from connection_pool import ConnectionPool
+from parse_cache import ParseCache
+from shortcut_parser import iter_pipe_records
+
+# SQLite's LOWER() folds ASCII only; matching it keeps Python-side name keys consistent
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+DEFAULT_PROGRAM = 'Studio One'  # Program of commands imported without one
 
 class Database:
+    # (schema version, method) applied in order by migrate()
+    MIGRATIONS = [
+        (1, '_migrate_lookup_indexes'),
+        (2, '_migrate_keymap_cache'),
+        (3, '_migrate_program_name'),
+        (4, '_migrate_parse_cache_format'),
+    ]
+    
     def __init__(self, db_path='studio_one_commands.db'):
         self.db_path = db_path
-        self.conn = None
+        self.writer = None             # Owns the only write connection
+        self.pool = ConnectionPool(db_path)  # Per-thread read connections
+        self.lock = threading.RLock()  # Groups related reads; writes go through the writer
+        self.change_listeners = []     # Called after the command catalog changes
+        self.write_count = 0           # Bumped on every commands-table change made in this process
+        self.catalog = CommandCatalog(self)  # Read-only snapshot for hot-path lookups
+        self.parse_cache = ParseCache(self)  # Parsed keymap files, reused while unchanged
+        
+    def add_change_listener(self, listener):
+        """Register a callable to run whenever commands are modified"""
+        if listener not in self.change_listeners:
+            self.change_listeners.append(listener)
+            
+    def remove_change_listener(self, listener):
+        """Unregister a change listener"""
+        if listener in self.change_listeners:
+            self.change_listeners.remove(listener)
+            
+    def notify_change(self, changes=None, versions=None):
+        """Tell listeners the commands table changed
+
+        changes is a ChangeSet when the caller knows exactly what changed
+        (versions: commands_version just before and after the write, read
+        inside its transaction); listeners then receive it and can update
+        incrementally. Otherwise they receive None and rebuild.
+        """
+        self.write_count += 1
+        if changes is not None and versions is not None:
+            self.catalog.apply(changes, *versions)
+        for listener in list(self.change_listeners):
+            try:
+                listener(changes)
+            except Exception as e:
+                print(f"DEBUG: DB - Error in change listener: {e}")
+        
+    @property
+    def conn(self):
+        """This thread's read-only connection (WAL lets it read while the writer commits)"""
+        return self.pool.get()
+        
+    def reading(self):
+        """Context manager yielding this thread's pooled read-only connection"""
+        return self.pool.connection()
+        
+    def write(self, operation, wait=True):
+        """Run operation(conn) on the writer thread; returns its result, or a Future if not wait"""
+        future = self.writer.submit(operation)
+        return future.result() if wait else future
+        
+    def commands_version(self, conn=None):
+        """Trigger-kept counter of catalog changes to the commands table, from any process"""
+        cursor = (conn or self.conn).cursor()
+        cursor.execute("SELECT commands_version FROM catalog_state WHERE id = 1")
+        row = cursor.fetchone()
+        return row[0] if row else 0
         
     def initialize(self):
         """Create the database and tables if they don't exist"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-            
-            # Create the commands table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS commands (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    command_name TEXT NOT NULL,
-                    shortcut TEXT,
-                    category TEXT,
-                    voice_command TEXT,
-                    conflict_flag BOOLEAN DEFAULT FALSE,
-                    conflict_type TEXT,
-                    conflict_with TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Add new table for discovered actions
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS discovered_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    program_name TEXT NOT NULL,
-                    action_name TEXT NOT NULL,
-                    api_endpoint TEXT,
-                    shortcut TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Add workflow table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS workflows (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    workflow_name TEXT NOT NULL,
-                    voice_trigger TEXT NOT NULL,
-                    command_sequence TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Add command usage tracking
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS command_usage (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    command_id INTEGER,
-                    usage_count INTEGER DEFAULT 0,
-                    last_used TIMESTAMP,
-                    context TEXT,
-                    FOREIGN KEY (command_id) REFERENCES commands (id)
-                )
-            ''')
-            
-            self.conn.commit()
+            # Every mutation goes through one writer thread; the file is switched to WAL
+            self.writer = DatabaseWriter(self.db_path)
+            self.write(self._create_schema)
+            self.backfill_phonetic_keys()
+            self.migrate()
             print("DEBUG: DB - Database initialized")
             
         except Exception as e:
             print(f"DEBUG: DB - Error initializing: {e}")
             raise
             
-    def add_command(self, command_name, shortcut, category, voice_command=None):
-        """Add a new command to the database with duplicate checking"""
-        try:
-            cursor = self.conn.cursor()
+    def _create_schema(self, conn):
+        """Create tables and add columns missing from older databases (writer thread)"""
+        cursor = conn.cursor()
+        
+        # Create the commands table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS commands (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                command_name TEXT NOT NULL,
+                shortcut TEXT,
+                category TEXT,
+                voice_command TEXT,
+                conflict_flag BOOLEAN DEFAULT FALSE,
+                conflict_type TEXT,
+                conflict_with TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Add new table for discovered actions
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS discovered_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                program_name TEXT NOT NULL,
+                action_name TEXT NOT NULL,
+                api_endpoint TEXT,
+                shortcut TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Add workflow table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS workflows (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                workflow_name TEXT NOT NULL,
+                voice_trigger TEXT NOT NULL,
+                command_sequence TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Add command usage tracking
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS command_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                command_id INTEGER,
+                usage_count INTEGER DEFAULT 0,
+                last_used TIMESTAMP,
+                context TEXT,
+                FOREIGN KEY (command_id) REFERENCES commands (id)
+            )
+        ''')
+        
+        # Learned recognition samples, kept across sessions
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS command_samples (
+                text TEXT PRIMARY KEY,
+                samples TEXT NOT NULL,
+                success_count INTEGER DEFAULT 0,
+                last_success REAL,
+                is_golden BOOLEAN DEFAULT FALSE
+            )
+        ''')
+        
+        # Stopwords and misrecognition rewrites shared by recognizer and training
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS normalization_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                phrase TEXT NOT NULL UNIQUE,
+                replacement TEXT
+            )
+        ''')
+        cursor.execute("SELECT COUNT(*) FROM normalization_rules")
+        if cursor.fetchone()[0] == 0:
+            cursor.executemany("INSERT INTO normalization_rules (phrase, replacement) VALUES (?, ?)",
+                               DEFAULT_RULES)
+        
+        # Precomputed phonetic keys for voice commands (older databases lack the column)
+        cursor.execute("PRAGMA table_info(commands)")
+        if 'phonetic_key' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE commands ADD COLUMN phonetic_key TEXT")
+            print("DEBUG: DB - Added phonetic_key column")
+            
+        # Catalog change counter kept by triggers, so it moves only when the command catalog
+        # does (never for sample or cache writes) and counts commits from every process alike
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                commands_version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO catalog_state (id, commands_version) VALUES (1, 0)")
+        bump = "UPDATE catalog_state SET commands_version = commands_version + 1 WHERE id = 1;"
+        changed = ("WHEN OLD.command_name IS NOT NEW.command_name OR OLD.voice_command IS NOT NEW.voice_command "
+                   "OR OLD.phonetic_key IS NOT NEW.phonetic_key")
+        for name, event, condition in (
+                ('insert', 'INSERT', ''), ('delete', 'DELETE', ''),
+                ('update', 'UPDATE OF command_name, voice_command, phonetic_key', changed)):
+            # FOR EACH ROW (SQLite has no statement triggers); rewriting equal values does not count
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS commands_version_{name} "
+                           f"AFTER {event} ON commands {condition} BEGIN {bump} END")
+        
+    def migrate(self):
+        """Bring the schema up to the last MIGRATIONS entry, one step per PRAGMA user_version"""
+        cursor = self.conn.cursor()
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        for target, step in self.MIGRATIONS:
+            if version >= target:
+                continue
+            def apply(conn, step=step, target=target):
+                # Step and version bump commit together or not at all
+                getattr(self, step)(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {target}")
+            try:
+                self.write(apply)
+                version = target
+                print(f"DEBUG: DB - Migrated schema to version {target} ({step})")
+            except sqlite3.Error as e:
+                print(f"DEBUG: DB - Migration {step} failed: {e}")
+                break
+                
+    def _migrate_lookup_indexes(self, cursor):
+        """Indexes for case-insensitive name/voice lookups and exact name/shortcut matches"""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_commands_name ON commands (command_name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_commands_shortcut ON commands (shortcut)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_commands_voice_lower ON commands (LOWER(voice_command))")
+        
+        # Names are unique ignoring case; an older database may hold duplicates to merge first
+        self._merge_duplicate_names(cursor, "LOWER(command_name)")
+        cursor.execute("DROP INDEX IF EXISTS idx_commands_name_lower")
+        cursor.execute("CREATE UNIQUE INDEX idx_commands_name_lower ON commands (LOWER(command_name))")
+        cursor.execute("ANALYZE commands")
+        
+    def _migrate_keymap_cache(self, cursor):
+        """Parsed keymap records and the content hash each keymap was last imported at"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                records BLOB NOT NULL,
+                parse_seconds REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_state (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                write_seconds REAL NOT NULL,
+                imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+    def _migrate_program_name(self, cursor):
+        """Tag commands with their program; names are unique per program instead of globally"""
+        cursor.execute("PRAGMA table_info(commands)")
+        if 'program_name' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE commands ADD COLUMN program_name TEXT NOT NULL "
+                           f"DEFAULT '{DEFAULT_PROGRAM}'")
+        cursor.execute("DROP INDEX IF EXISTS idx_commands_name_lower")
+        self._merge_duplicate_names(cursor, "program_name, LOWER(command_name)")
+        cursor.execute("DROP INDEX IF EXISTS idx_commands_program_name_lower")
+        cursor.execute("CREATE UNIQUE INDEX idx_commands_program_name_lower "
+                       "ON commands (program_name, LOWER(command_name))")
+        # Case-insensitive name lookups across programs
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_commands_name_lower ON commands (LOWER(command_name))")
+        cursor.execute("ANALYZE commands")
+        
+    def _migrate_parse_cache_format(self, cursor):
+        """Record the Python/marshal format each cache entry was packed with"""
+        cursor.execute("PRAGMA table_info(parse_cache)")
+        if 'format' not in [column[1] for column in cursor.fetchall()]:
+            # Entries from before the column never match the running format, so they are re-parsed
+            cursor.execute("ALTER TABLE parse_cache ADD COLUMN format TEXT NOT NULL DEFAULT ''")
+        
+    def _merge_duplicate_names(self, cursor, group):
+        """Fold rows that repeat a name within group (SQL expressions) into the lowest id
+
+        The survivor takes a trained voice command (and its phonetic key)
+        from a duplicate if it has none, and inherits the duplicates' usage
+        rows; only then are the duplicates deleted.
+        """
+        cursor.execute(f"""
+            SELECT GROUP_CONCAT(id) FROM commands
+            GROUP BY {group} HAVING COUNT(*) > 1
+        """)
+        groups = [sorted(int(i) for i in ids.split(',')) for (ids,) in cursor.fetchall()]
+        merged = 0
+        for survivor, *duplicates in groups:
+            placeholders = ','.join('?' * len(duplicates))
+            cursor.execute(f"""
+                SELECT id, command_name, shortcut, voice_command, phonetic_key FROM commands
+                WHERE id IN (?, {placeholders}) ORDER BY id
+            """, (survivor, *duplicates))
+            rows = cursor.fetchall()
+            if rows[0][3] is None:
+                trained = next((row for row in rows if row[3] is not None), None)
+                if trained:
+                    cursor.execute("UPDATE commands SET voice_command = ?, phonetic_key = ? WHERE id = ?",
+                                   (trained[3], trained[4], survivor))
+            cursor.execute(f"UPDATE command_usage SET command_id = ? WHERE command_id IN ({placeholders})",
+                           (survivor, *duplicates))
+            cursor.execute(f"DELETE FROM commands WHERE id IN ({placeholders})", duplicates)
+            merged += len(duplicates)
+            print(f"DEBUG: DB - Merged duplicate commands into #{survivor}: "
+                  + ', '.join(f"#{row[0]} {row[1]!r} ({row[2]}, voice {row[3]!r})" for row in rows))
+        if merged:
+            print(f"DEBUG: DB - Merged {merged} duplicate commands (by {group})")
+        return merged
+        
+    def add_command(self, command_name, shortcut, category, voice_command=None, program_name=DEFAULT_PROGRAM):
+        """Add a new command to a program with duplicate checking"""
+        def insert(conn):
+            cursor = conn.cursor()
             
-            # Check for duplicates
+            # Check for duplicates within the program
             cursor.execute("""
                 SELECT id FROM commands 
-                WHERE LOWER(command_name) = LOWER(?) 
-                OR LOWER(voice_command) = LOWER(?)
-            """, (command_name, voice_command))
+                WHERE program_name = ?
+                AND (LOWER(command_name) = LOWER(?) OR LOWER(voice_command) = LOWER(?))
+            """, (program_name, command_name, voice_command))
             
             if cursor.fetchone():
-                print(f"Warning: Command '{command_name}' or voice command '{voice_command}' already exists")
                 return False
                 
             # If no duplicate, add the command
             cursor.execute("""
                 INSERT INTO commands (
-                    command_name, shortcut, category, voice_command, 
-                    created_at, updated_at
-                ) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            """, (command_name, shortcut, category, voice_command))
+                    command_name, shortcut, category, voice_command, phonetic_key,
+                    program_name, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            """, (command_name, shortcut, category, voice_command, phonetic_key(voice_command),
+                  program_name))
+            return True
             
+        try:
+            if not self.write(insert):
+                print(f"Warning: Command '{command_name}' or voice command '{voice_command}' already exists")
+                return False
+            self.notify_change()
             return True
             
         except sqlite3.Error as e:
             print(f"Error adding command: {e}")
             return False
             
-    def update_command(self, command_id, command_name, shortcut=None, category=None, voice_command=None):
-        """Update an existing command"""
-        try:
-            cursor = self.conn.cursor()
+    def update_command(self, command_id, command_name, shortcut=None, category=None, voice_command=None,
+                       program_name=DEFAULT_PROGRAM):
+        """Update an existing command of a program, refusing a name another of its commands has"""
+        def update(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id FROM commands
+                WHERE program_name = ? AND LOWER(command_name) = LOWER(?) AND id != ?
+            """, (program_name, command_name, command_id))
+            if cursor.fetchone():
+                return 0
             cursor.execute('''
                 UPDATE commands 
-                SET command_name=?, shortcut=?, category=?, voice_command=?,
+                SET command_name=?, shortcut=?, category=?, voice_command=?, phonetic_key=?,
                     updated_at=CURRENT_TIMESTAMP
-                WHERE id=?
-            ''', (command_name, shortcut, category, voice_command, command_id))
-            self.conn.commit()
-            return True
+                WHERE id=? AND program_name=?
+            ''', (command_name, shortcut, category, voice_command, phonetic_key(voice_command),
+                  command_id, program_name))
+            return cursor.rowcount
+            
+        try:
+            if self.write(update):
+                self.notify_change()
+                return True
+            print(f"Command not updated: {command_name} ({program_name})")
+            return False
         except sqlite3.Error as e:
             print(f"Error updating command: {e}")
             return False
@@ -120,9 +382,8 @@ class Database:
     def delete_command(self, command_id):
         """Delete a command"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM commands WHERE id=?', (command_id,))
-            self.conn.commit()
+            self.write(lambda conn: conn.execute('DELETE FROM commands WHERE id=?', (command_id,)))
+            self.notify_change()
             return True
         except sqlite3.Error as e:
             print(f"Error deleting command: {e}")
@@ -133,14 +394,15 @@ class Database:
         import csv
         try:
             cursor = self.conn.cursor()
-            cursor.execute('SELECT * FROM commands')
+            columns = ['id', 'command_name', 'shortcut', 'category',
+                       'voice_command', 'conflict_flag', 'conflict_type',
+                       'conflict_with', 'created_at', 'updated_at', 'phonetic_key', 'program_name']
+            cursor.execute(f"SELECT {', '.join(columns)} FROM commands")
             rows = cursor.fetchall()
             
             with open(filename, 'w', newline='') as csvfile:
                 writer = csv.writer(csvfile)
-                writer.writerow(['id', 'command_name', 'shortcut', 'category', 
-                               'voice_command', 'conflict_flag', 'conflict_type', 
-                               'conflict_with', 'created_at', 'updated_at'])
+                writer.writerow(columns)
                 writer.writerows(rows)
             return True
         except Exception as e:
@@ -201,29 +463,15 @@ class Database:
 
     def import_shortcuts_file(self, shortcuts, program_name):
         """Import shortcuts from parsed data"""
-        try:
-            cursor = self.conn.cursor()
-            for shortcut in shortcuts:
-                cursor.execute('''
-                    INSERT INTO commands 
-                    (command_name, shortcut, category, program_name)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    shortcut['command_name'],
-                    shortcut['shortcut'],
-                    shortcut.get('category'),
-                    program_name
-                ))
-            self.conn.commit()
-            return True
-        except sqlite3.Error as e:
-            print(f"Error importing shortcuts: {e}")
-            return False
+        counts = self.bulk_upsert_commands(
+            ((shortcut['command_name'], shortcut['shortcut'], shortcut.get('category'))
+             for shortcut in shortcuts), program_name)
+        return counts is not None
 
     def cleanup_duplicates(self):
         """Remove duplicate commands and fix incorrect voice commands"""
-        try:
-            cursor = self.conn.cursor()
+        def deduplicate(conn):
+            cursor = conn.cursor()
             
             # Fix Record command voice command
             cursor.execute("""
@@ -232,44 +480,34 @@ class Database:
                 WHERE command_name = 'Record' AND voice_command = 'play'
             """)
             
-            # Remove duplicate entries keeping lowest ID
-            cursor.execute("""
-                DELETE FROM commands 
-                WHERE id NOT IN (
-                    SELECT MIN(id) 
-                    FROM commands 
-                    GROUP BY command_name
-                )
-            """)
+            # Merge duplicate entries into the lowest ID
+            self._merge_duplicate_names(cursor, "program_name, LOWER(command_name)")
             
-            self.conn.commit()
+        try:
+            self.write(deduplicate)
+            self.notify_change()
             return True
             
         except sqlite3.Error as e:
             print(f"Error cleaning up database: {e}")
             return False
 
-    def add_command_mapping(self, command_name, voice_command):
-        """Add or update a voice command mapping"""
-        try:
-            cursor = self.conn.cursor()
-            
-            # First check if command exists
+    def add_command_mapping(self, command_name, voice_command, program_name=DEFAULT_PROGRAM):
+        """Add or update a program command's voice command mapping"""
+        def update(conn):
+            cursor = conn.cursor()
             cursor.execute("""
-                SELECT id FROM commands 
-                WHERE command_name = ?
-            """, (command_name,))
+                UPDATE commands 
+                SET voice_command = ?,
+                    phonetic_key = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE program_name = ? AND command_name = ?
+            """, (voice_command, phonetic_key(voice_command), program_name, command_name))
+            return cursor.rowcount
             
-            result = cursor.fetchone()
-            if result:
-                # Update existing command
-                cursor.execute("""
-                    UPDATE commands 
-                    SET voice_command = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE command_name = ?
-                """, (voice_command, command_name))
-                self.conn.commit()
+        try:
+            if self.write(update):
+                self.notify_change()
                 print(f"Updated voice command mapping: {command_name} -> {voice_command}")
                 return True
             else:
@@ -280,12 +518,44 @@ class Database:
             print(f"Error adding command mapping: {e}")
             return False
 
+    def backfill_phonetic_keys(self):
+        """Compute phonetic keys for voice commands written without one"""
+        def backfill(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, voice_command FROM commands
+                WHERE voice_command IS NOT NULL AND voice_command != ''
+                AND phonetic_key IS NULL
+            """)
+            rows = cursor.fetchall()
+            if rows:
+                cursor.executemany("UPDATE commands SET phonetic_key = ? WHERE id = ?",
+                                   [(phonetic_key(voice), row_id) for row_id, voice in rows])
+            return len(rows)
+            
+        try:
+            count = self.write(backfill)
+            if count:
+                print(f"DEBUG: DB - Computed phonetic keys for {count} commands")
+            return True
+        except sqlite3.Error as e:
+            print(f"DEBUG: DB - Error computing phonetic keys: {e}")
+            return False
+
     def cleanup(self):
         """Cleanup database resources"""
         try:
-            if self.conn:
-                self.conn.close()
-                self.conn = None
+            if self.writer:
+                self.writer.close()  # Flushes queued writes first
+                self.writer = None
+            stats = self.pool.stats()
+            print(f"DEBUG: DB - Pool served {stats['checkouts']} reads from {stats['connections']} "
+                  f"connections ({stats['reuse_ratio']:.1%} reused)")
+            self.pool.close()
+            cache = self.parse_cache.stats()
+            if cache['hits'] or cache['misses']:
+                print(f"DEBUG: DB - Parse cache: {cache['hits']} hits, {cache['misses']} misses "
+                      f"(~{cache['saved']:.3f}s of parsing saved)")
             print("DEBUG: DB - Connection closed")
         except Exception as e:
             print(f"DEBUG: DB - Error closing: {e}")
@@ -299,9 +569,7 @@ class Database:
             
             # First word is our command word
             if words:
-                command_word = words[0]
-                print(f"DEBUG: DB - Extracted command word: '{command_word}' from '{command_text}'")
-                return command_word
+                return words[0]
             
             return None
             
@@ -309,46 +577,194 @@ class Database:
             print(f"DEBUG: DB - Error extracting command word: {e}")
             return None
 
+    def iter_kbs_records(self, file_path):
+        """Stream (command_name, shortcut, category) from a KBS file, one line at a time"""
+        # Example line: "Record New Track|Ctrl+R|Record a new track"
+        return iter_pipe_records(file_path)
+
+    def bulk_upsert_commands(self, records, program_name=DEFAULT_PROGRAM, batch_size=5000):
+        """Upsert (command_name, shortcut, category) records for one program in one transaction
+
+        Existing commands (matched case-insensitively by name within the
+        program) get the new
+        shortcut, category and KBS voice word; unknown ones are inserted.
+        records may be any iterable and is consumed batch_size rows at a time.
+        Returns {'rows', 'updated', 'inserted', 'seconds'} or None on error.
+        """
+        def upsert(conn):
+            cursor = conn.cursor()
+            counts = {'rows': 0, 'updated': 0, 'inserted': 0}
+            # Split each batch into UPDATE and INSERT rows up front instead of probing per row
+            cursor.execute("SELECT LOWER(command_name) FROM commands WHERE program_name = ?", (program_name,))
+            existing = {name for name, in cursor.fetchall()}
+            keys = {}  # Voice word -> phonetic key; keymaps reuse a few leading verbs heavily
+            updates, inserts = [], []
+
+            def apply():
+                # Inserts first: a line repeated within the batch updates the row its first copy inserts
+                if inserts:
+                    cursor.executemany("""
+                        INSERT INTO commands
+                            (command_name, shortcut, category, voice_command, phonetic_key, program_name)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, inserts)
+                    counts['inserted'] += len(inserts)
+                if updates:
+                    cursor.executemany("""
+                        UPDATE commands
+                        SET shortcut = COALESCE(?, shortcut), category = COALESCE(?, category),
+                            voice_command = ?, phonetic_key = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE program_name = ? AND LOWER(command_name) = ?
+                    """, updates)
+                    counts['updated'] += len(updates)
+                counts['rows'] += len(updates) + len(inserts)
+                updates.clear()
+                inserts.clear()
+
+            for name, shortcut, category in records:
+                voice = self.extract_kbs_command(name)
+                key = keys.get(voice)
+                if key is None:
+                    key = keys[voice] = phonetic_key(voice)
+                lowered = name.translate(ASCII_LOWER)
+                if lowered in existing:
+                    updates.append((shortcut, category, voice, key, program_name, lowered))
+                else:
+                    existing.add(lowered)  # A repeated line later in the file updates this row
+                    inserts.append((name, shortcut, category, voice, key, program_name))
+                if len(updates) + len(inserts) >= batch_size:
+                    apply()
+            apply()
+            return counts
+
+        try:
+            started = time.perf_counter()
+            counts = self.write(upsert)
+            counts['seconds'] = time.perf_counter() - started
+            if counts['updated'] or counts['inserted']:
+                self.notify_change()
+            rate = counts['rows'] / counts['seconds'] if counts['seconds'] else 0.0
+            print(f"DEBUG: DB - Upserted {counts['rows']} {program_name} rows ({counts['updated']} updated, "
+                  f"{counts['inserted']} inserted) in {counts['seconds']:.2f}s ({rate:,.0f} rows/s)")
+            return counts
+        except Exception as e:
+            print(f"DEBUG: DB - Error upserting commands: {e}")
+            return None
+
     def import_kbs_commands(self, file_path):
-        """Import commands from KBS file"""
+        """Import commands from KBS file, skipping content that was already imported"""
+        path = os.path.abspath(file_path)
         try:
-            cursor = self.conn.cursor()
-            
-            # Read and parse KBS file
-            with open(file_path, 'r') as f:
-                # Assuming KBS file is line-based
-                commands = []
-                for line in f:
-                    if line.strip():
-                        # Parse KBS format
-                        # Example: "Record New Track|Ctrl+R"
-                        parts = line.strip().split('|')
-                        if len(parts) >= 2:
-                            commands.append({
-                                'name': parts[0],
-                                'shortcut': parts[1]
-                            })
-            
-            for command in commands:
-                command_name = command.get('name', '')
-                # Extract command word
-                command_word = self.extract_kbs_command(command_name)
-                if command_word:
-                    cursor.execute("""
-                        UPDATE commands 
-                        SET voice_command = ? 
-                        WHERE command_name = ?
-                    """, (command_word, command_name))
-                
-            self.conn.commit()
-            print(f"DEBUG: DB - Imported KBS commands from {file_path}")
-            
+            sha256, entry = self.parse_cache.lookup(path)
         except Exception as e:
-            print(f"DEBUG: DB - Error importing KBS commands: {e}")
+            print(f"DEBUG: DB - Error reading KBS file {file_path}: {e}")
             return False
             
+        try:
+            with self.reading() as conn:
+                state = conn.execute("SELECT sha256, write_seconds FROM import_state WHERE path = ?",
+                                     (path,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"DEBUG: DB - Error reading import state: {e}")
+            state = None
+        if state and state[0] == sha256:
+            saved = state[1] + (entry[0] if entry else 0.0)
+            print(f"DEBUG: DB - {file_path} unchanged since last import; skipped (saved ~{saved:.3f}s)")
+            return True
+            
+        # Cached or freshly parsed records stream straight into the upsert; a miss is cached in the same pass
+        counts = self.bulk_upsert_commands(self.parse_cache.records(path, self.iter_kbs_records, sha256, entry))
+        if counts is None:
+            print(f"DEBUG: DB - Error importing KBS commands from {file_path}")
+            return False
+        self.write(lambda conn: conn.execute("""
+            INSERT OR REPLACE INTO import_state (path, sha256, write_seconds) VALUES (?, ?, ?)
+        """, (path, sha256, counts['seconds'])), wait=False)
+        print(f"DEBUG: DB - Imported KBS commands from {file_path}")
         return True
 
+    def sync_kbs_commands(self, file_path, program_name=DEFAULT_PROGRAM):
+        """Bring a program's commands in line with a KBS file, touching only what differs"""
+        path = os.path.abspath(file_path)
+        try:
+            sha256, entry = self.parse_cache.lookup(path)
+        except Exception as e:
+            print(f"DEBUG: DB - Error reading KBS file {file_path}: {e}")
+            return None
+        started = time.perf_counter()
+        changes = self.sync_commands(self.parse_cache.records(path, self.iter_kbs_records, sha256, entry),
+                                     program_name)
+        if changes is not None:
+            # The table now matches this file exactly: a later import of it can be skipped
+            self.write(lambda conn: conn.execute("""
+                INSERT OR REPLACE INTO import_state (path, sha256, write_seconds) VALUES (?, ?, ?)
+            """, (path, sha256, time.perf_counter() - started)), wait=False)
+        return changes
+
+    def sync_commands(self, records, program_name=DEFAULT_PROGRAM):
+        """Diff (command_name, shortcut, category) records against a program's rows and apply the delta
+
+        Names match case-insensitively. The program's commands missing from records are
+        deleted, new ones inserted with their KBS voice word, and changed
+        shortcuts or categories updated in place so trained voice mappings
+        survive. Everything runs in one transaction. Returns the ChangeSet,
+        or None on error.
+        """
+        incoming = {}  # Later lines win, as with the bulk import
+
+        def sync(conn):
+            cursor = conn.cursor()
+            changes = ChangeSet()
+            before = self.commands_version(conn)
+            deletes, updates, inserts = [], [], []
+            pending = dict(incoming)
+            cursor.execute("""
+                SELECT id, command_name, shortcut, category, voice_command, phonetic_key
+                FROM commands WHERE program_name = ?
+            """, (program_name,))
+            for row_id, name, shortcut, category, voice, key in cursor.fetchall():
+                # A second row with the same name finds nothing left and is removed as a duplicate
+                entry = pending.pop(name.translate(ASCII_LOWER), None)
+                if entry is None:
+                    deletes.append((row_id,))
+                    changes.removed.append((name, voice, key))
+                elif (entry[1], entry[2]) != (shortcut, category):
+                    updates.append((entry[1], entry[2], row_id))
+                    changes.changed.append((name, voice, key))
+                else:
+                    changes.unchanged += 1
+            for name, shortcut, category in pending.values():
+                voice = self.extract_kbs_command(name)
+                key = phonetic_key(voice)
+                inserts.append((name, shortcut, category, voice, key, program_name))
+                changes.added.append((name, voice, key))
+
+            cursor.executemany("DELETE FROM commands WHERE id = ?", deletes)
+            cursor.executemany("""
+                UPDATE commands SET shortcut = ?, category = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, updates)
+            cursor.executemany("""
+                INSERT INTO commands
+                    (command_name, shortcut, category, voice_command, phonetic_key, program_name)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, inserts)
+            if changes:
+                cursor.execute("DELETE FROM import_state")  # Earlier imports no longer describe the table
+            return changes, (before, self.commands_version(conn))
+
+        try:
+            for name, shortcut, category in records:
+                incoming[name.translate(ASCII_LOWER)] = (name, shortcut, category)
+            changes, versions = self.write(sync)
+            if changes:
+                self.notify_change(changes, versions)
+            print(f"DEBUG: DB - Synced commands: {changes.summary()}")
+            return changes
+        except Exception as e:
+            print(f"DEBUG: DB - Error syncing commands: {e}")
+            return None
+
     def show_all_commands(self):
         """Display all commands in database"""
         try:
@@ -371,11 +787,13 @@ class Database:
     def clear_commands(self):
         """Clear all commands from database"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM commands")
-            self.conn.commit()
+            def clear(conn):
+                conn.execute("DELETE FROM commands")
+                conn.execute("DELETE FROM import_state")  # The next import must write again
+            self.write(clear)
+            self.notify_change()
             print("DEBUG: DB - Database cleared")
             return True
         except Exception as e:
             print(f"DEBUG: DB - Error clearing database: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -1,11 +1,9 @@
 from database import Database
 import sqlite3
 
-def display_commands():
-    db = Database()
-    
+def display_commands(db):
     try:
-        with sqlite3.connect(db.db_path) as conn:
+        with db.reading() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM commands')
             commands = cursor.fetchall()
@@ -27,25 +25,23 @@ def display_commands():
     except sqlite3.Error as e:
         print(f"Error accessing database: {e}")
 
-def add_new_command():
+def add_new_command(db):
     command_name = input("Enter command name: ")
     shortcut = input("Enter shortcut (or press Enter to skip): ") or None
     category = input("Enter category (or press Enter to skip): ") or None
     voice_command = input("Enter voice command (or press Enter to skip): ") or None
     
-    db = Database()
     command_id = db.add_command(command_name, shortcut, category, voice_command)
     if command_id:
         print(f"Command added successfully with ID: {command_id}")
     else:
         print("Failed to add command")
 
-def search_command():
+def search_command(db):
     search_term = input("Enter command name to search: ")
-    db = Database()
     
     try:
-        with sqlite3.connect(db.db_path) as conn:
+        with db.reading() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT * FROM commands 
@@ -70,7 +66,7 @@ def search_command():
     except sqlite3.Error as e:
         print(f"Error searching database: {e}")
 
-def menu():
+def menu(db):
     while True:
         print("\n1. Display all commands")
         print("2. Add new command")
@@ -79,11 +75,11 @@ def menu():
         choice = input("\nEnter your choice (1-4): ")
         
         if choice == '1':
-            display_commands()
+            display_commands(db)
         elif choice == '2':
-            add_new_command()
+            add_new_command(db)
         elif choice == '3':
-            search_command()
+            search_command(db)
         elif choice == '4':
             break
         else:
@@ -92,4 +88,7 @@ def menu():
 if __name__ == "__main__":
     db = Database()
     db.initialize()
-    menu() 
\ No newline at end of file
+    try:
+        menu(db)
+    finally:
+        db.cleanup() 
\ No newline at end of file
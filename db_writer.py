@@ -0,0 +1,126 @@
+"""Single background thread that owns the write connection and batches commits"""
+from concurrent.futures import Future
+import queue
+import sqlite3
+import threading
+import time
+
+_STOP = object()
+
+def open_connection(db_path, read_only=False, cached_statements=128):
+    """Connection for WAL use: readers never block the writer and vice versa"""
+    # Autocommit: readers never sit in a stale implicit transaction; the writer issues BEGIN itself
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None,
+                           cached_statements=cached_statements)
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")  # Any stray write fails loudly instead of locking
+    else:
+        conn.execute("PRAGMA journal_mode = WAL")  # Persistent: recorded in the file
+        conn.execute("PRAGMA synchronous = NORMAL")  # Durable at checkpoints; safe under WAL
+        conn.execute("PRAGMA cache_size = -65536")  # 64 MB: bulk imports touch index pages everywhere
+    return conn
+
+class DatabaseWriter:
+    def __init__(self, db_path, batch_size=64, batch_window=0.002):
+        """batch_size: max operations per commit; batch_window: seconds to wait for more"""
+        self.conn = open_connection(db_path)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.queue = queue.Queue()
+        self.operations = 0
+        self.commits = 0
+        self.failures = 0
+        self.commit_time = 0.0
+        self.thread = threading.Thread(target=self._run, name="DatabaseWriter", daemon=True)
+        self.thread.start()
+
+    def submit(self, operation):
+        """Queue operation(conn) and return a Future with its result"""
+        future = Future()
+        if threading.current_thread() is self.thread:
+            # Called from inside another operation: run it in the same transaction
+            try:
+                future.set_result(operation(self.conn))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self.queue.put((operation, future))
+        return future
+
+    def execute(self, operation, timeout=None):
+        """Run operation(conn) on the writer thread and wait for its result"""
+        return self.submit(operation).result(timeout)
+
+    def _next_batch(self):
+        """Block for one operation, then take whatever else arrives within the batch window"""
+        item = self.queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self.queue.put(_STOP)  # Finish this batch, stop on the next
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """Apply batches: one transaction per batch, one savepoint per operation"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            outcomes = []
+            started = time.perf_counter()
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                for operation, future in batch:
+                    # A failing operation rolls back alone; the rest of the batch still commits
+                    self.conn.execute("SAVEPOINT operation")
+                    try:
+                        result = operation(self.conn)
+                        self.conn.execute("RELEASE operation")
+                        outcomes.append((future, result, None))
+                    except Exception as e:
+                        self.conn.execute("ROLLBACK TO operation")
+                        self.conn.execute("RELEASE operation")
+                        outcomes.append((future, None, e))
+                self.conn.execute("COMMIT")
+            except Exception as e:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                print(f"DEBUG: DW - Batch of {len(batch)} failed to commit: {e}")
+                outcomes = [(future, None, e) for _, future in batch]
+            self.commit_time += time.perf_counter() - started
+            self.commits += 1
+            for future, result, error in outcomes:
+                self.operations += 1
+                if error is not None:
+                    self.failures += 1
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        """Operation, commit and failure counts"""
+        return {
+            'operations': self.operations,
+            'commits': self.commits,
+            'failures': self.failures,
+            'ops_per_commit': self.operations / self.commits if self.commits else 0.0,
+            'commit_time': self.commit_time
+        }
+
+    def close(self):
+        """Drain pending operations, stop the thread and close the connection"""
+        self.queue.put(_STOP)
+        self.thread.join(timeout=5.0)
+        stats = self.stats()
+        print(f"DEBUG: DW - {stats['operations']} writes in {stats['commits']} commits "
+              f"({stats['ops_per_commit']:.1f}/commit, {stats['failures']} failed)")
+        self.conn.close()
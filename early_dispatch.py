@@ -0,0 +1,89 @@
+"""Dispatch short commands from stable Vosk partial results"""
+from text_normalizer import TextNormalizer
+
+class PartialCommandTracker:
+    def __init__(self, stable_frames=2):
+        """Require a partial to match for stable_frames consecutive chunks"""
+        self.stable_frames = stable_frames
+        self.normalizer = TextNormalizer()
+        self.candidates = {}  # Normalized form -> catalog voice command
+        self.dispatched = None
+        self.early_count = 0
+        self.confirmed_count = 0
+        self.retracted_count = 0
+        self.reset()
+
+    def reset(self):
+        """Start tracking a new utterance"""
+        self.current = None
+        self.streak = 0
+        self.dispatched = None
+
+    def set_commands(self, known_commands, allowed=None, normalizer=None):
+        """Choose the commands eligible for early dispatch
+
+        A command is eligible only if no other known command extends it,
+        so 'play' is not fired while the user may still be saying
+        'play selection'. By default only single-word commands qualify.
+        Pass the recognizer's normalizer so partials are compared the way
+        final results are resolved.
+        """
+        if normalizer is not None:
+            self.normalizer = normalizer
+        allowed = {c.lower() for c in allowed} if allowed else None
+        eligible = {}
+        for command in known_commands:
+            if allowed is not None:
+                if command not in allowed:
+                    continue
+            elif len(command.split()) != 1:
+                continue
+            prefix = command + ' '
+            if not any(other.startswith(prefix) for other in known_commands):
+                eligible[self.normalizer.normalize(command)] = command
+        self.candidates = eligible
+
+    def update(self, partial_text):
+        """Feed one partial result; return a command once it is stable"""
+        if self.dispatched:
+            return None
+
+        text = self.normalizer.normalize(partial_text)
+        if text not in self.candidates:
+            self.current = None
+            self.streak = 0
+            return None
+
+        if text == self.current:
+            self.streak += 1
+        else:
+            self.current = text
+            self.streak = 1
+
+        if self.streak >= self.stable_frames:
+            self.dispatched = self.candidates[text]
+            self.early_count += 1
+            return self.dispatched
+        return None
+
+    def finalize(self, final_text):
+        """Compare the final transcript with an early dispatch
+
+        Returns (None, None) if nothing was dispatched early, ('confirm', cmd)
+        if the final result agrees, ('extend', cmd) if it starts with the
+        command and goes on to more words, and ('retract', cmd) otherwise.
+        """
+        dispatched = self.dispatched
+        self.reset()
+        if not dispatched:
+            return None, None
+        final = self.normalizer.normalize(final_text)
+        expected = self.normalizer.normalize(dispatched)
+        if final == expected:
+            self.confirmed_count += 1
+            return 'confirm', dispatched
+        if final.startswith(expected + ' '):
+            self.confirmed_count += 1
+            return 'extend', dispatched
+        self.retracted_count += 1
+        return 'retract', dispatched
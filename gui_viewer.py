@@ -1,11 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from database import Database
-import sqlite3
+from database import Database, DEFAULT_PROGRAM
 from speech_recognition import SpeechRecognizer
 import os
 from training_module import TrainingModule
 import time
+from collections import deque
+
+# Tree columns, then the row's program (not displayed, used to scope edits)
+TREE_QUERY_COLUMNS = ('id, command_name, shortcut, category, voice_command, conflict_flag, '
+                      'conflict_type, conflict_with, created_at, updated_at, program_name')
 
 class DatabaseGUI:
     def __init__(self, root, database, speech_recognizer, training_module):
@@ -15,12 +19,22 @@ class DatabaseGUI:
         self.db = database
         self.speech_recognizer = speech_recognizer
         self.training_module = training_module
+        self.command_latencies = deque(maxlen=100)  # Utterance end -> GUI reaction (ms)
         
         # Setup GUI
         self.setup_gui()
         
         # Initialize state
         self.training_in_progress = False
+        
+        # The recognizer wakes the Tk loop only when a command is queued
+        self.root.bind('<<VoiceCommand>>', self.check_voice_commands)
+        if self.speech_recognizer:
+            self.speech_recognizer.set_command_listener(self.notify_voice_command)
+        
+        # Voice system may still be loading in the background
+        self.pending_voice_system = None
+        self.root.bind('<<VoiceSystemReady>>', self.attach_voice_system)
 
     def setup_gui(self):
         """Setup main GUI components"""
@@ -52,6 +66,8 @@ class DatabaseGUI:
         # Microphone control button
         self.voice_btn = ttk.Button(control_frame, text="Turn Microphone On", command=self.toggle_voice_control)
         self.voice_btn.pack(side=tk.LEFT, padx=5)
+        if not self.speech_recognizer:
+            self.voice_btn.configure(text="Loading voice model...", state="disabled")
         self.voice_active = False  # Initialize microphone state
         
         # Search frame
@@ -158,8 +174,8 @@ class DatabaseGUI:
             print(f"DEBUG: GUI - Using database at: {self.db.db_path}")
             
             if search_text:
-                cursor.execute('''
-                    SELECT * FROM commands 
+                cursor.execute(f'''
+                    SELECT {TREE_QUERY_COLUMNS} FROM commands 
                     WHERE LOWER(command_name) LIKE ? 
                     OR LOWER(shortcut) LIKE ? 
                     OR LOWER(category) LIKE ?
@@ -167,7 +183,7 @@ class DatabaseGUI:
                 ''', (f'%{search_text}%', f'%{search_text}%', 
                      f'%{search_text}%', f'%{search_text}%'))
             else:
-                cursor.execute('SELECT * FROM commands')
+                cursor.execute(f'SELECT {TREE_QUERY_COLUMNS} FROM commands')
                 
             rows = cursor.fetchall()
             print(f"DEBUG: GUI - Found {len(rows)} commands")
@@ -266,19 +282,10 @@ class DatabaseGUI:
                         messagebox.showerror("Error", "Command name is required")
                         return
                         
-                    # Check if command already exists
-                    cursor = self.db.conn.cursor()
-                    cursor.execute("SELECT 1 FROM commands WHERE command_name = ?", (name,))
-                    if cursor.fetchone():
+                    # Duplicate check and insert are scoped to the program
+                    if not self.db.add_command(name, shortcut, None, voice or None, DEFAULT_PROGRAM):
                         messagebox.showerror("Error", "Command already exists")
                         return
-                        
-                    # Add new command
-                    cursor.execute("""
-                        INSERT INTO commands (command_name, shortcut, voice_command)
-                        VALUES (?, ?, ?)
-                    """, (name, shortcut, voice))
-                    self.db.conn.commit()
                     
                     dialog.destroy()
                     self.refresh_data()
@@ -323,7 +330,7 @@ class DatabaseGUI:
         self.tree.delete(*self.tree.get_children())
         
         try:
-            with sqlite3.connect(self.db.db_path) as conn:
+            with self.db.reading() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT * FROM commands 
@@ -381,15 +388,16 @@ class DatabaseGUI:
         voice_entry.pack(pady=5)
         
         def save_edit():
-            # Add update_command method to Database class first
-            db = Database()
-            db.update_command(
+            if not self.db.update_command(
                 values[0],  # ID
                 name_entry.get(),
                 shortcut_entry.get() or None,
                 category_entry.get() or None,
-                voice_entry.get() or None
-            )
+                voice_entry.get() or None,
+                values[-1]  # Program, carried past the displayed columns
+            ):
+                messagebox.showerror("Error", "Command could not be updated (name already in use?)")
+                return
             dialog.destroy()
             self.refresh_data()
             
@@ -425,8 +433,7 @@ class DatabaseGUI:
             
         # Check for duplicate shortcuts
         if shortcut:
-            db = Database()
-            with sqlite3.connect(db.db_path) as conn:
+            with self.db.reading() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT command_name FROM commands WHERE shortcut = ?', (shortcut,))
                 existing = cursor.fetchone()
@@ -480,7 +487,7 @@ class DatabaseGUI:
         self.tree.delete(*self.tree.get_children())
         
         # Get all shortcuts from database
-        with sqlite3.connect(self.db.db_path) as conn:
+        with self.db.reading() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT command_name, shortcut, category, program_name FROM commands')
             for row in cursor.fetchall():
@@ -513,7 +520,6 @@ class DatabaseGUI:
                 self.voice_btn.configure(text="Turn Microphone Off")
                 self.show_status("Microphone on")
                 self.voice_active = True
-                self.check_voice_commands()
             
             self.last_toggle_time = current_time
             
@@ -523,29 +529,81 @@ class DatabaseGUI:
             self.voice_active = False
             self.voice_btn.configure(text="Turn Microphone On", state="normal")
 
-    def check_voice_commands(self):
-        """Check for and process voice commands"""
-        if self.root.winfo_exists():  # Only if window exists
+    def voice_system_ready(self, voice_system, training_module, error=None):
+        """Hand over a background-loaded voice system (thread-safe)"""
+        self.pending_voice_system = (voice_system, training_module, error)
+        try:
+            self.root.event_generate('<<VoiceSystemReady>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            pass  # Window already destroyed, or its main loop has exited
+
+    def attach_voice_system(self, event=None):
+        """Enable voice controls once the model and microphone are ready"""
+        if not self.pending_voice_system:
+            return
+        voice_system, training_module, error = self.pending_voice_system
+        self.pending_voice_system = None
+        
+        if error:
+            self.voice_btn.configure(text="Voice Unavailable", state="disabled")
+            self.show_status(f"Voice system error: {error}")
+            return
+            
+        self.speech_recognizer = voice_system
+        self.training_module = training_module
+        self.speech_recognizer.set_command_listener(self.notify_voice_command)
+        self.voice_btn.configure(text="Turn Microphone On", state="normal")
+        self.show_status("Voice system ready")
+
+    def notify_voice_command(self):
+        """Wake the Tk loop from the decoder thread (thread-safe)"""
+        try:
+            self.root.event_generate('<<VoiceCommand>>', when='tail')
+        except tk.TclError:
+            pass  # Window already destroyed
+
+    def check_voice_commands(self, event=None):
+        """Process every voice command queued by the recognizer"""
+        if not self.root.winfo_exists():  # Only if window exists
+            return
+            
+        while True:
+            command = self.speech_recognizer.get_next_command()
+            if not command:
+                break
+            
             try:
                 if not self.voice_active or self.training_in_progress:
-                    if self.voice_active:  # Only schedule if still active
-                        self.root.after(100, self.check_voice_commands)
-                    return
+                    print(f"DEBUG: GUI - Ignoring command while inactive: {command}")
+                    continue
+                
+                print(f"DEBUG: GUI - Processing command data: {command}")
+                self.process_voice_command(command)
+                self.record_command_latency(command)
                 
-                command = self.speech_recognizer.get_next_command()
-                if command:
-                    print(f"DEBUG: GUI - Processing command data: {command}")
-                    self.process_voice_command(command)
-                    
             except Exception as e:
                 print(f"DEBUG: GUI - Error in command check: {e}")
-            
-            if self.voice_active:  # Only schedule next check if still active
-                self.root.after(100, self.check_voice_commands)
+
+    def record_command_latency(self, command):
+        """Log latency from end of utterance to GUI reaction"""
+        if not isinstance(command, dict) or 'utterance_end' not in command:
+            return
+        latency = (time.monotonic() - command['utterance_end']) * 1000
+        self.command_latencies.append(latency)
+        average = sum(self.command_latencies) / len(self.command_latencies)
+        print(f"DEBUG: GUI - Command latency {latency:.1f} ms "
+              f"(avg {average:.1f} ms, max {max(self.command_latencies):.1f} ms "
+              f"over {len(self.command_latencies)})")
 
     def process_voice_command(self, command_data):
         """Process a recognized voice command"""
         try:
+            # An early dispatch the final transcript did not confirm
+            if isinstance(command_data, dict) and command_data.get('retracted'):
+                print(f"DEBUG: GUI - Early command retracted: {command_data['voice_text']}")
+                self.show_status(f"Retracted: {command_data['voice_text']}")
+                return False
+                
             # Handle suggestion first
             if isinstance(command_data, dict) and 'suggested_match' in command_data:
                 suggestion = command_data['suggested_match']
@@ -564,25 +622,16 @@ class DatabaseGUI:
             # Get the text to process
             text = command_data.get('voice_text') if isinstance(command_data, dict) else command_data
 
-            with sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT command_name 
-                    FROM commands 
-                    WHERE LOWER(voice_command) = LOWER(?)
-                """, (text,))
-                result = cursor.fetchone()
-                
-                if result:
-                    command_name = result[0]
-                    print(f"DEBUG: GUI - Executing command: {command_name}")
-                    self.show_status(f"Executed: {command_name}")
-                    self.highlight_command(command_name)
-                    return True
-                else:
-                    print(f"DEBUG: GUI - Command not found: '{text}'")
-                    self.show_status(f"Unknown command: {text}")
-                    return False
+            command_name = self.db.catalog.current().command_for(text)
+            if command_name:
+                print(f"DEBUG: GUI - Executing command: {command_name}")
+                self.show_status(f"Executed: {command_name}")
+                self.highlight_command(command_name)
+                return True
+            else:
+                print(f"DEBUG: GUI - Command not found: '{text}'")
+                self.show_status(f"Unknown command: {text}")
+                return False
                 
         except Exception as e:
             print(f"DEBUG: GUI - Error processing command: {e}")
@@ -775,7 +824,7 @@ class DatabaseGUI:
     def get_available_commands(self):
         """Get list of available commands for mapping"""
         try:
-            with sqlite3.connect(self.db.db_path) as conn:
+            with self.db.reading() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT DISTINCT command_name FROM commands ORDER BY command_name")
                 return [row[0] for row in cursor.fetchall()]
@@ -790,7 +839,8 @@ class DatabaseGUI:
             if self.voice_active:
                 self.speech_recognizer.microphone_off()
             print("DEBUG: GUI - Shutting down")
-            self.speech_recognizer.cleanup()
+            if self.speech_recognizer:
+                self.speech_recognizer.cleanup()
         except Exception as e:
             print(f"DEBUG: GUI - Error during cleanup: {e}")
         finally:
@@ -827,14 +877,12 @@ class DatabaseGUI:
             if file_path:
                 print(f"DEBUG: GUI - Importing KBS from: {file_path}")
                 
-                # Clear existing commands
-                self.db.clear_commands()
-                
-                # Import new commands
-                if self.db.import_kbs_commands(file_path):
-                    print("DEBUG: GUI - KBS import successful")
+                # Apply only the differences; trained voice mappings are kept
+                changes = self.db.sync_kbs_commands(file_path)
+                if changes is not None:
+                    print(f"DEBUG: GUI - KBS import successful: {changes.summary()}")
                     self.refresh_view()
-                    messagebox.showinfo("Success", "KBS file imported successfully!")
+                    messagebox.showinfo("Success", f"KBS file imported: {changes.summary()}")
                 else:
                     messagebox.showerror("Error", "Failed to import KBS file")
                     
@@ -0,0 +1,104 @@
+"""Batch ingestion of many programs' keymap files: parsed in a process pool, written by one writer"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import sys
+import time
+from database import Database
+from parse_cache import file_digest
+from shortcut_parser import ShortcutParser, FORMATS
+
+def find_keymaps(directory):
+    """[(program name, path)]: files in a program's subdirectory belong to it, others are named by stem"""
+    keymaps = []
+    for root, _, files in os.walk(directory):
+        relative = os.path.relpath(root, directory)
+        for name in sorted(files):
+            stem, _, extension = name.rpartition('.')
+            if extension.lower() not in FORMATS:
+                continue
+            program = relative.split(os.sep)[0] if relative != '.' else stem
+            keymaps.append((program, os.path.join(root, name)))
+    return keymaps
+
+def parse_keymap(path):
+    """Worker: (records, seconds) for one file; records are plain tuples so they pickle cheaply"""
+    started = time.perf_counter()
+    records = list(ShortcutParser(None).iter_records(path))
+    return records, time.perf_counter() - started
+
+def ingest_directory(database, directory, workers=None):
+    """Parse every keymap under directory in parallel and upsert each into its program
+
+    Files whose content was already imported (import_state) are skipped.
+    Results are merged as they finish, each file in one transaction on the
+    database's writer thread. Returns {program: stats}.
+    """
+    stats = {}
+    pending = []
+    for program, path in find_keymaps(directory):
+        entry = stats.setdefault(program, {'files': 0, 'skipped': 0, 'rows': 0, 'updated': 0,
+                                           'inserted': 0, 'parse_seconds': 0.0, 'write_seconds': 0.0})
+        entry['files'] += 1
+        path = os.path.abspath(path)
+        sha256 = file_digest(path)
+        with database.reading() as conn:
+            state = conn.execute("SELECT sha256 FROM import_state WHERE path = ?", (path,)).fetchone()
+        if state and state[0] == sha256:
+            entry['skipped'] += 1
+            continue
+        pending.append((program, path, sha256))
+
+    started = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(parse_keymap, path): (program, path, sha256)
+                       for program, path, sha256 in pending}
+            for future in as_completed(futures):
+                program, path, sha256 = futures[future]
+                entry = stats[program]
+                try:
+                    records, parse_seconds = future.result()
+                except Exception as e:
+                    print(f"DEBUG: KI - Error parsing {path}: {e}")
+                    continue
+                entry['parse_seconds'] += parse_seconds
+                counts = database.bulk_upsert_commands(records, program)
+                if counts is None:
+                    continue
+                for key in ('rows', 'updated', 'inserted'):
+                    entry[key] += counts[key]
+                entry['write_seconds'] += counts['seconds']
+                database.write(lambda conn, path=path, sha256=sha256, seconds=counts['seconds']: conn.execute("""
+                    INSERT OR REPLACE INTO import_state (path, sha256, write_seconds) VALUES (?, ?, ?)
+                """, (path, sha256, seconds)), wait=False)
+    elapsed = time.perf_counter() - started
+
+    report(stats, elapsed)
+    return stats
+
+def report(stats, elapsed):
+    """Per-program throughput table"""
+    print(f"DEBUG: KI - Ingested {len(stats)} programs in {elapsed:.2f}s")
+    print(f"{'program':<24} {'files':>5} {'skip':>5} {'rows':>9} {'new':>8} {'parse s':>8} "
+          f"{'write s':>8} {'rows/s':>10}")
+    for program, entry in sorted(stats.items()):
+        busy = entry['parse_seconds'] + entry['write_seconds']
+        rate = entry['rows'] / busy if busy else 0.0
+        print(f"{program[:24]:<24} {entry['files']:>5} {entry['skipped']:>5} {entry['rows']:>9} "
+              f"{entry['inserted']:>8} {entry['parse_seconds']:>8.2f} {entry['write_seconds']:>8.2f} "
+              f"{rate:>10,.0f}")
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python keymap_ingest.py <keymap directory> [database path] [workers]")
+        return 1
+    db = Database(sys.argv[2] if len(sys.argv) > 2 else 'studio_one_commands.db')
+    db.initialize()
+    try:
+        ingest_directory(db, sys.argv[1], int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    finally:
+        db.cleanup()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,13 @@
 import tkinter as tk
 import sys
 from system_init import (
+    StartupTimer,
     initialize_database,
-    initialize_voice_system,
-    initialize_training,
+    start_voice_system,
     initialize_gui,
     cleanup_system
 )
-from database import Database
-from speech_recognition import SpeechRecognizer
+from model_registry import registry, DEFAULT_MODEL_PATH
 
 # Database path configuration
 DB_PATH = "studio_one_commands_2025-01-16_21-56.db"  # Simplified path
@@ -20,35 +19,45 @@ def main():
     voice_system = None
     training = None
     gui = None
+    startup = None
+    timer = StartupTimer()
     
     try:
         print("DEBUG: MAIN - Starting application initialization...")
         
+        # 0. Start loading the speech model while everything else initializes
+        registry.preload(DEFAULT_MODEL_PATH)
+        
         # 1. Initialize Database
-        database = initialize_database(DB_PATH)
+        with timer.phase("database"):
+            database = initialize_database(DB_PATH)
         
         # 1b. Import KBS commands
         print("DEBUG: MAIN - Importing KBS commands...")
-        success = database.import_kbs_commands('test_commands.kbs')
+        with timer.phase("kbs import"):
+            success = database.import_kbs_commands('test_commands.kbs')
         if success:
             print("DEBUG: MAIN - KBS commands imported successfully")
         else:
             print("DEBUG: MAIN - Error importing KBS commands")
         
-        # 2. Initialize Voice System
-        voice_system = initialize_voice_system(database)
-        
-        # 3. Initialize Training Module
-        training = initialize_training(database, voice_system)
-        
-        # 4. Setup GUI
-        root = tk.Tk()
-        root.geometry("800x600+300+200")
-        root.minsize(600, 400)
+        # 2. Setup GUI with the catalog; voice controls enable once ready
+        with timer.phase("gui"):
+            root = tk.Tk()
+            root.geometry("800x600+300+200")
+            root.minsize(600, 400)
+            gui = initialize_gui(root, database, None, None)
         
-        # 5. Initialize GUI with dependencies
-        gui = initialize_gui(root, database, voice_system, training)
+        # 3. Voice system and training module load in the background
+        def voice_ready(voice, training_module, error):
+            nonlocal training
+            training = training_module
+            gui.voice_system_ready(voice, training_module, error)
+            
+        startup = start_voice_system(database, timer, voice_ready)
+        voice_system = startup.voice_system
         
+        root.after_idle(lambda: timer.mark("gui shown"))
         print("DEBUG: MAIN - Initialization complete, starting main loop")
         root.mainloop()
         
@@ -58,7 +67,7 @@ def main():
         
     finally:
         print("DEBUG: MAIN - Starting cleanup sequence")
-        cleanup_system(database, voice_system, training, gui)
+        cleanup_system(database, voice_system, training, gui, startup)
         print("DEBUG: MAIN - Application terminated")
 
 if __name__ == "__main__":
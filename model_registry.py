@@ -0,0 +1,159 @@
+"""Process-wide registry so each Vosk model is loaded only once"""
+from vosk import Model, KaldiRecognizer
+import json
+import os
+import sys
+import threading
+import time
+
+DEFAULT_MODEL_PATH = "vosk-model-small-en-us"
+
+def _current_rss_bytes():
+    """Resident set size of this process, or None if it cannot be measured
+
+    Linux reads the current size from /proc; elsewhere psutil is used when
+    installed, else getrusage's peak size (bytes on macOS, KB on Linux),
+    which still grows across a model load that sets a new peak.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return None
+
+def _disk_bytes(path):
+    """Total size of the files in a model directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+class ModelEntry:
+    def __init__(self, path):
+        self.path = path
+        self.model = None
+        self.refcount = 0
+        self.load_time = 0.0
+        self.resident_bytes = None  # RSS growth while loading, where it can be measured
+        self.disk_bytes = 0
+        self.error = None
+        self.ready = threading.Event()
+        self.loading = False
+
+class ModelRegistry:
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _entry(self, path):
+        """Return the entry for path, starting a load if nobody has yet"""
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                entry = self.entries[path] = ModelEntry(path)
+            start_load = not entry.loading and not entry.ready.is_set()
+            if start_load:
+                entry.loading = True
+        return entry, start_load
+
+    def _load(self, entry):
+        """Load a model and record its cost"""
+        print(f"DEBUG: MR - Loading model '{entry.path}'...")
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+        try:
+            entry.model = Model(entry.path)
+            entry.load_time = time.perf_counter() - started
+            rss_after = _current_rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                entry.resident_bytes = max(0, rss_after - rss_before)
+            entry.disk_bytes = _disk_bytes(entry.path)
+            resident = (f"~{entry.resident_bytes / 1e6:.1f} MB resident, "
+                        if entry.resident_bytes is not None else "")
+            print(f"DEBUG: MR - Loaded '{entry.path}' in {entry.load_time:.2f}s "
+                  f"({resident}{entry.disk_bytes / 1e6:.1f} MB on disk)")
+        except Exception as e:
+            entry.error = e
+            print(f"DEBUG: MR - Error loading model '{entry.path}': {e}")
+            # Forget the failure: waiters see it, but the next acquire tries again
+            with self.lock:
+                if self.entries.get(entry.path) is entry:
+                    del self.entries[entry.path]
+        finally:
+            entry.loading = False
+            entry.ready.set()
+
+    def preload(self, path=DEFAULT_MODEL_PATH):
+        """Start loading a model on a background thread"""
+        entry, start_load = self._entry(path)
+        if start_load:
+            threading.Thread(target=self._load, args=(entry,), name="ModelLoader", daemon=True).start()
+        return entry.ready
+
+    def acquire(self, path=DEFAULT_MODEL_PATH, timeout=None):
+        """Return the shared model, loading it if needed, and take a reference"""
+        entry, start_load = self._entry(path)
+        if start_load:
+            self._load(entry)
+        if not entry.ready.wait(timeout):
+            raise TimeoutError(f"Model '{entry.path}' not loaded after {timeout}s")
+        if entry.error:
+            raise entry.error
+        with self.lock:
+            entry.refcount += 1
+        return entry.model
+
+    def release(self, path=DEFAULT_MODEL_PATH):
+        """Drop a reference; the model is freed when none remain"""
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry.refcount == 0:
+                return
+            entry.refcount -= 1
+            if entry.refcount == 0:
+                del self.entries[path]
+                print(f"DEBUG: MR - Released model '{path}'")
+
+    def create_recognizer(self, path=DEFAULT_MODEL_PATH, rate=16000, grammar=None):
+        """Return a fresh KaldiRecognizer bound to the shared model
+
+        The caller must hold a reference from acquire(): a released model
+        may already be gone, and reloading it here would leave it unowned.
+        """
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry.refcount == 0:
+                raise RuntimeError(f"Model '{path}' is not acquired; call acquire() first")
+        if grammar is not None:
+            return KaldiRecognizer(entry.model, rate, json.dumps(grammar))
+        return KaldiRecognizer(entry.model, rate)
+
+    def stats(self):
+        """Load time, size and reference count for every model"""
+        with self.lock:
+            return [{
+                'path': entry.path,
+                'loaded': entry.model is not None,
+                'refcount': entry.refcount,
+                'load_time': entry.load_time,
+                'resident_bytes': entry.resident_bytes,
+                'disk_bytes': entry.disk_bytes
+            } for entry in self.entries.values()]
+
+# Shared by every module in the process
+registry = ModelRegistry()
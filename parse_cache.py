@@ -0,0 +1,152 @@
+"""Parsed keymap records cached in the database, keyed on file size, mtime, content hash and packing format"""
+import hashlib
+import io
+import marshal
+import os
+import sys
+import time
+import zlib
+
+PACK_BATCH = 5000  # Records marshalled per chunk of a cache entry
+# marshal's format may change between Python versions; entries packed by another are misses
+FORMAT = f"python{sys.version_info[0]}.{sys.version_info[1]}-marshal{marshal.version}"
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def unpack(blob):
+    """Yield the records of a blob: one or more marshalled lists, concatenated, then zlib"""
+    data = zlib.decompress(blob)
+    stream = io.BytesIO(data)
+    while stream.tell() < len(data):
+        yield from marshal.load(stream)
+
+class ParseCache:
+    def __init__(self, database):
+        """Entries live in the parse_cache table (schema migration 2)"""
+        self.db = database
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0  # Parse seconds avoided by hits
+
+    def lookup(self, path):
+        """Return (sha256, entry) for path without reading the cached records
+
+        A matching size and mtime is trusted without hashing; otherwise the
+        content hash decides, so a touched but unchanged file still has its
+        entry. entry is (parse_seconds,) when the cache holds this content
+        packed in the running FORMAT, else None.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = None
+        try:
+            with self.db.reading() as conn:
+                row = conn.execute("""
+                    SELECT size, mtime_ns, sha256, parse_seconds FROM parse_cache
+                    WHERE path = ? AND format = ?
+                """, (path, FORMAT)).fetchone()
+        except Exception as e:
+            print(f"DEBUG: PC - Error reading cache for {path}: {e}")
+
+        if row and (row[0], row[1]) == (stat.st_size, stat.st_mtime_ns):
+            return row[2], (row[3],)
+        sha256 = file_digest(path)
+        if row and row[2] == sha256:
+            # Same bytes, new mtime: remember the new stat so the next check skips hashing
+            self.db.write(lambda conn: conn.execute(
+                "UPDATE parse_cache SET size = ?, mtime_ns = ? WHERE path = ?",
+                (stat.st_size, stat.st_mtime_ns, path)), wait=False)
+            return sha256, (row[3],)
+        return sha256, None
+
+    def records(self, path, parse, sha256=None, entry=None):
+        """Yield path's records from the cache, or from parse(path) while caching them in the same pass
+
+        Pass the (sha256, entry) from lookup() to avoid checking the file
+        twice. parse(path) must yield marshal-able records (tuples, strings,
+        numbers); the entry is stored only once it has been fully consumed.
+        An entry that fails to decode is dropped and path is parsed again,
+        skipping the records already yielded from the cache.
+        """
+        path = os.path.abspath(path)
+        if sha256 is None:
+            sha256, entry = self.lookup(path)
+        delivered = 0  # Records already yielded from a cache entry that then failed to decode
+        if entry:
+            blob = None
+            try:
+                with self.db.reading() as conn:
+                    blob = conn.execute("""
+                        SELECT records FROM parse_cache WHERE path = ? AND sha256 = ? AND format = ?
+                    """, (path, sha256, FORMAT)).fetchone()
+            except Exception as e:
+                print(f"DEBUG: PC - Error reading cache for {path}: {e}")
+            if blob:
+                try:
+                    for record in self._hit(path, blob[0], entry[0]):
+                        yield record
+                        delivered += 1
+                    return
+                except Exception as e:
+                    print(f"DEBUG: PC - Dropping unreadable cache entry for {path} "
+                          f"after {delivered} records: {e}")
+                    self.db.write(lambda conn: conn.execute(
+                        "DELETE FROM parse_cache WHERE path = ?", (path,)), wait=False)
+
+        self.misses += 1
+        stat = os.stat(path)
+        compressor = zlib.compressobj(6)
+        chunks, batch = [], []
+        count = 0
+        busy = 0.0  # Parse and pack time, excluding the consumer's work between records
+        resumed = time.perf_counter()
+        for index, record in enumerate(parse(path)):
+            batch.append(record)
+            if len(batch) >= PACK_BATCH:
+                chunks.append(compressor.compress(marshal.dumps(batch)))
+                count += len(batch)
+                batch = []
+            busy += time.perf_counter() - resumed
+            if index >= delivered:
+                yield record
+            resumed = time.perf_counter()
+        if batch:
+            chunks.append(compressor.compress(marshal.dumps(batch)))
+            count += len(batch)
+        chunks.append(compressor.flush())
+        busy += time.perf_counter() - resumed
+        blob = b''.join(chunks)
+        self.db.write(lambda conn: conn.execute("""
+            INSERT OR REPLACE INTO parse_cache (path, size, mtime_ns, sha256, records, parse_seconds, format)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (path, stat.st_size, stat.st_mtime_ns, sha256, blob, busy, FORMAT)), wait=False)
+        print(f"DEBUG: PC - Parsed {os.path.basename(path)} in {busy:.3f}s "
+              f"({count} records, cached as {len(blob)} bytes)")
+
+    def load(self, path, parse):
+        """Return (records, sha256) for path as a list, calling parse(path) only if its content changed"""
+        sha256, entry = self.lookup(path)
+        return list(self.records(path, parse, sha256, entry)), sha256
+
+    def _hit(self, path, blob, parse_seconds):
+        count = 0
+        busy = 0.0
+        resumed = time.perf_counter()
+        for record in unpack(blob):
+            count += 1
+            busy += time.perf_counter() - resumed
+            yield record
+            resumed = time.perf_counter()
+        self.hits += 1
+        self.saved += max(0.0, parse_seconds - busy)
+        print(f"DEBUG: PC - Cache hit for {os.path.basename(path)} "
+              f"({count} records, saved ~{parse_seconds:.3f}s of parsing)")
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'saved': self.saved}
@@ -0,0 +1,155 @@
+"""Metaphone keys and a key -> voice command index for homophone matching"""
+from collections import defaultdict
+from command_index import edit_similarity
+
+# Edit-distance floor (0-100) for trusting a phonetic match: Metaphone drops inner
+# vowels, so 'pull' keys like 'play' and 'step' like 'stop'
+MIN_SIMILARITY = 80
+
+VOWELS = set('AEIOU')
+FRONT_VOWELS = set('EIY')
+
+def metaphone(word):
+    """Return the (original) Metaphone key of a single word"""
+    word = ''.join(ch for ch in word.upper() if ch.isalpha())
+    if not word:
+        return ''
+
+    # Initial letter exceptions
+    if word[:2] in ('KN', 'GN', 'PN', 'AE', 'WR'):
+        word = word[1:]
+    elif word[0] == 'X':
+        word = 'S' + word[1:]
+    elif word[:2] == 'WH':
+        word = 'W' + word[2:]
+
+    key = []
+    length = len(word)
+    for i, ch in enumerate(word):
+        prev = word[i - 1] if i > 0 else ''
+        nxt = word[i + 1] if i + 1 < length else ''
+        after = word[i + 2] if i + 2 < length else ''
+
+        # Skip duplicate letters except C
+        if ch == prev and ch != 'C':
+            continue
+
+        if ch in VOWELS:
+            if i == 0:
+                key.append(ch)
+        elif ch == 'B':
+            if not (prev == 'M' and i == length - 1):
+                key.append('B')
+        elif ch == 'C':
+            if nxt == 'I' and after == 'A':
+                key.append('X')
+            elif nxt == 'H':
+                key.append('K' if prev == 'S' else 'X')
+            elif nxt in FRONT_VOWELS:
+                if prev != 'S':
+                    key.append('S')
+            else:
+                key.append('K')
+        elif ch == 'D':
+            key.append('J' if nxt == 'G' and after in FRONT_VOWELS else 'T')
+        elif ch == 'G':
+            if nxt == 'H' and not (i + 2 >= length or after in VOWELS):
+                continue
+            if nxt == 'N' and (i + 2 == length or word[i + 1:] == 'NED'):
+                continue
+            if prev == 'D' and nxt in FRONT_VOWELS:
+                continue
+            key.append('J' if nxt in FRONT_VOWELS and prev != 'G' else 'K')
+        elif ch == 'H':
+            if prev in ('C', 'S', 'P', 'T', 'G'):
+                continue
+            if prev in VOWELS and nxt not in VOWELS:
+                continue
+            key.append('H')
+        elif ch == 'K':
+            if prev != 'C':
+                key.append('K')
+        elif ch == 'P':
+            key.append('F' if nxt == 'H' else 'P')
+        elif ch == 'Q':
+            key.append('K')
+        elif ch == 'S':
+            if nxt == 'H' or (nxt == 'I' and after in ('O', 'A')):
+                key.append('X')
+            else:
+                key.append('S')
+        elif ch == 'T':
+            if nxt == 'I' and after in ('O', 'A'):
+                key.append('X')
+            elif nxt == 'H':
+                key.append('0')  # 'th'
+            elif not (nxt == 'C' and after == 'H'):
+                key.append('T')
+        elif ch == 'V':
+            key.append('F')
+        elif ch == 'W' or ch == 'Y':
+            if nxt in VOWELS:
+                key.append(ch)
+        elif ch == 'X':
+            key.append('KS')
+        elif ch == 'Z':
+            key.append('S')
+        else:  # F J L M N R
+            key.append(ch)
+
+    return ''.join(key)
+
+def phonetic_key(text):
+    """Phonetic key of a phrase; word breaks are ignored so 'system check' == 'systemcheck'"""
+    if not text:
+        return None
+    return metaphone(''.join(text.split())) or None
+
+class PhoneticIndex:
+    def __init__(self):
+        self.keys = defaultdict(set)  # phonetic key -> voice commands
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, voice_command, key=None):
+        """Index a voice command under its (precomputed) phonetic key"""
+        key = key or phonetic_key(voice_command)
+        if key:
+            self.keys[key].add(voice_command.lower())
+
+    def remove(self, voice_command, key=None):
+        """Drop a voice command from the index"""
+        key = key or phonetic_key(voice_command)
+        commands = self.keys.get(key)
+        if commands:
+            commands.discard(voice_command.lower())
+            if not commands:
+                del self.keys[key]
+
+    def lookup(self, text):
+        """Return the voice command that sounds like text, if it is unambiguous"""
+        commands = self.keys.get(phonetic_key(text))
+        if commands and len(commands) == 1:
+            return next(iter(commands))
+        return None
+
+    def match(self, text, min_similarity=MIN_SIMILARITY):
+        """Return (voice command that sounds like text, whether it is also spelled close enough)
+
+        The command is None when no single command shares text's key; the
+        flag is True only when their edit similarity reaches min_similarity.
+        """
+        command = self.lookup(text)
+        if command is None:
+            return None, False
+        return command, edit_similarity(text, command) >= min_similarity
+
+    @classmethod
+    def load(cls, database):
+        """Build the index from the phonetic_key column of the catalog snapshot"""
+        index = cls()
+        for _, voice_command, key in database.catalog.current().rows:
+            if voice_command:
+                index.add(voice_command, key)
+        return index
@@ -0,0 +1,85 @@
+"""Token trie that splits an utterance into known command phrases by longest match"""
+
+END = None  # Trie key marking that the path so far spells a whole phrase
+
+class PhraseSegmenter:
+    def __init__(self, phrases=()):
+        self.root = {}
+        self.count = 0
+        for phrase in phrases:
+            self.add(phrase)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, phrase):
+        """Insert a phrase word by word"""
+        words = phrase.lower().split()
+        if not words:
+            return
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        if END not in node:
+            node[END] = ' '.join(words)
+            self.count += 1
+
+    def remove(self, phrase):
+        """Drop a phrase, pruning branches no other phrase uses"""
+        words = phrase.lower().split()
+        path = [self.root]
+        for word in words:
+            node = path[-1].get(word)
+            if node is None:
+                return
+            path.append(node)
+        if not words or END not in path[-1]:
+            return
+        del path[-1][END]
+        self.count -= 1
+        for word, parent in zip(reversed(words), reversed(path[:-1])):
+            if parent[word]:
+                break
+            del parent[word]
+
+    def longest_match(self, words, start):
+        """Return (phrase, end index) of the longest phrase beginning at start, or (None, start)"""
+        node = self.root
+        match, match_end = None, start
+        for i in range(start, len(words)):
+            node = node.get(words[i])
+            if node is None:
+                break
+            if END in node:
+                match, match_end = node[END], i + 1
+        return match, match_end
+
+    def segment(self, words, names=()):
+        """Split words into ordered (phrase, is_known) segments
+
+        Known phrases are taken greedily, longest first. A two-word entry of
+        names (lowercased command names) is kept together unless a longer
+        phrase starts at the same word. Runs of other words become one
+        unknown segment each for fuzzy matching.
+        """
+        segments = []
+        unknown = []
+        i = 0
+        while i < len(words):
+            match, end = self.longest_match(words, i)
+            if end - i < 2 and i + 1 < len(words):
+                pair = f"{words[i]} {words[i + 1]}"
+                if pair in names:
+                    match, end = pair, i + 2
+            if match:
+                if unknown:
+                    segments.append((' '.join(unknown), False))
+                    unknown = []
+                segments.append((match, True))
+                i = end
+                continue
+            unknown.append(words[i])
+            i += 1
+        if unknown:
+            segments.append((' '.join(unknown), False))
+        return segments
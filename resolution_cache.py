@@ -0,0 +1,64 @@
+"""Bounded LRU cache of resolution decisions keyed on (text, catalog version)"""
+from collections import OrderedDict
+import threading
+
+class ResolutionCache:
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()  # Decoder thread and GUI thread both resolve
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return the cached value for key (marking it recently used), or None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value, evicting the least recently used entry when full"""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (commands or learned samples changed)"""
+        with self.lock:
+            if self.entries:
+                self.entries.clear()
+                self.flushes += 1
+
+    def stats(self):
+        """Counters for reporting"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'flushes': self.flushes,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def report(self, tag):
+        """Print the counters with a module tag"""
+        stats = self.stats()
+        print(f"DEBUG: {tag} - Resolution cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%}), {stats['evictions']} evictions, "
+              f"{stats['flushes']} flushes, {stats['size']}/{stats['maxsize']} entries")
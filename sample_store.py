@@ -0,0 +1,93 @@
+"""Persistent, bounded store for learned command samples and golden status"""
+import json
+import math
+import time
+
+class SampleStore:
+    def __init__(self, database, max_entries=1000, half_life_days=30):
+        """Keep at most max_entries learned phrases, evicting the least and least recently used"""
+        self.db = database
+        self.max_entries = max_entries
+        self.half_life = half_life_days * 86400
+        self.dirty = set()    # Phrases changed since the last flush
+        self.learned = set()  # Phrases that have a row in command_samples
+        self.evictions = 0
+
+    def load(self):
+        """Return {text: {'samples', 'last_success', 'success_count', 'is_golden'}} from the table"""
+        entries = {}
+        try:
+            with self.db.lock, self.db.reading() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT text, samples, success_count, last_success, is_golden
+                    FROM command_samples
+                """)
+                rows = cursor.fetchall()
+            for text, samples, success_count, last_success, is_golden in rows:
+                entries[text] = {
+                    'samples': json.loads(samples),
+                    'last_success': last_success,
+                    'success_count': success_count,
+                    'is_golden': bool(is_golden)
+                }
+            self.learned = set(entries)
+            golden = sum(1 for data in entries.values() if data['is_golden'])
+            print(f"DEBUG: SS - Loaded {len(entries)} learned samples ({golden} golden)")
+        except Exception as e:
+            print(f"DEBUG: SS - Error loading samples: {e}")
+        return entries
+
+    def mark(self, text):
+        """Record that a phrase's statistics changed (written on the next flush)"""
+        self.dirty.add(text)
+        self.learned.add(text)
+
+    def score(self, data, now):
+        """LFU weight decayed by age: success count halves every half-life since last use"""
+        age = max(0.0, now - data['last_success'])
+        return data['success_count'] * math.pow(0.5, age / self.half_life)
+
+    def evict(self, entries):
+        """Drop the lowest-scoring learned phrases once over the cap; returns the evicted texts"""
+        excess = len(self.learned) - self.max_entries
+        if excess <= 0:
+            return []
+        now = time.time()
+        ranked = sorted((text for text in self.learned if text in entries),
+                        key=lambda text: self.score(entries[text], now))
+        evicted = ranked[:excess]
+        for text in evicted:
+            del entries[text]
+            self.learned.discard(text)
+            self.dirty.discard(text)
+        # Queued to the writer thread; the decoder does not wait for the commit
+        self.db.write(lambda conn: conn.executemany("DELETE FROM command_samples WHERE text = ?",
+                                                    [(text,) for text in evicted]), wait=False)
+        self.evictions += len(evicted)
+        print(f"DEBUG: SS - Evicted {len(evicted)} samples (cap {self.max_entries})")
+        return evicted
+
+    def flush(self, entries):
+        """Write every changed phrase in one transaction"""
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        rows = [(text, json.dumps(entries[text]['samples']), entries[text]['success_count'],
+                 entries[text]['last_success'], int(entries[text]['is_golden']))
+                for text in dirty if text in entries]
+        
+        def save(conn):
+            conn.executemany("""
+                INSERT OR REPLACE INTO command_samples
+                    (text, samples, success_count, last_success, is_golden)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            
+        def saved(future):
+            if future.exception():
+                self.dirty.update(dirty)  # Retry on the next flush
+                print(f"DEBUG: SS - Error saving samples: {future.exception()}")
+                
+        # Queued to the writer thread; the decoder does not wait for the commit
+        self.db.write(save, wait=False).add_done_callback(saved)
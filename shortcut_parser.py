@@ -1,39 +1,239 @@
+import json
+import xml.etree.ElementTree as ET
+
+# Attribute, element and key names that carry each field in the keymap formats we accept
+NAME_KEYS = ('command_name', 'name', 'command', 'commandname', 'action', 'title')
+SHORTCUT_KEYS = ('shortcut', 'key', 'keys', 'keystroke', 'hotkey', 'binding')
+CATEGORY_KEYS = ('category', 'group', 'section', 'menu')
+LIST_KEYS = ('shortcuts', 'commands', 'keymap', 'bindings', 'items')  # Nested record lists (JSON)
+
+# Extension -> record format
+FORMATS = {
+    'txt': 'txt', 'kbs': 'txt',
+    'xml': 'xml', 'keyscheme': 'xml',
+    'json': 'json',
+}
+
+def _pick(fields, keys):
+    """First non-empty value among keys in a lowercase-keyed mapping"""
+    for key in keys:
+        value = fields.get(key)
+        if value:
+            return value
+    return None
+
+def _record(fields, category=None):
+    """(command_name, shortcut, category) from a lowercase-keyed mapping, or None"""
+    name = _pick(fields, NAME_KEYS)
+    shortcut = _pick(fields, SHORTCUT_KEYS)
+    if isinstance(shortcut, (list, tuple)):
+        shortcut = ', '.join(str(key) for key in shortcut if key)
+    if not isinstance(name, str) or not name.strip() or not shortcut:
+        return None
+    category = _pick(fields, CATEGORY_KEYS) or category
+    return name.strip(), str(shortcut).strip(), category.strip() if isinstance(category, str) else None
+
+def iter_pipe_records(file_path):
+    """Pipe-delimited text (.txt, .kbs): Command Name | Shortcut | Category
+
+    Lines without a name are skipped; an empty shortcut or category is None.
+    """
+    with open(file_path, 'r') as file:
+        for line in file:
+            parts = line.strip().split('|')
+            if len(parts) >= 2 and parts[0].strip():
+                category = parts[2].strip() if len(parts) > 2 else ''
+                yield parts[0].strip(), parts[1].strip() or None, category or None
+
+def _local(tag):
+    """Element tag without its namespace, lowercased"""
+    return tag.rsplit('}', 1)[-1].lower()
+
 class ShortcutParser:
     def __init__(self, database):
         self.db = database
-        
+
     def parse_file(self, file_path):
-        """Parse a keyboard shortcuts file"""
+        """Parse a keyboard shortcuts file (cached until its content changes)"""
+        if self.db is not None:
+            records = self.db.parse_cache.records(file_path, self.iter_records)
+        else:
+            records = self.iter_records(file_path)
+        return [{'command_name': name, 'shortcut': shortcut, 'category': category}
+                for name, shortcut, category in records]
+
+    def import_file(self, file_path, program_name='Studio One'):
+        """Stream a keymap file straight into the bulk importer; returns its counts or None"""
+        return self.db.bulk_upsert_commands(self.iter_records(file_path), program_name)
+
+    def iter_records(self, file_path):
+        """Yield (command_name, shortcut, category) tuples from a keymap file, in constant memory"""
         file_extension = file_path.split('.')[-1].lower()
-        
-        if file_extension == 'txt':
-            return self._parse_txt(file_path)
-        elif file_extension == 'xml':
-            return self._parse_xml(file_path)
-        elif file_extension == 'json':
-            return self._parse_json(file_path)
+        file_format = FORMATS.get(file_extension)
+        if file_format == 'txt':
+            return iter_pipe_records(file_path)
+        elif file_format == 'xml':
+            return self._iter_xml(file_path)
+        elif file_format == 'json':
+            return self._iter_json(file_path)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
-    
-    def _parse_txt(self, file_path):
-        """Parse text file format"""
-        shortcuts = []
+
+    def _iter_xml(self, file_path):
+        """XML format: one element per shortcut, fields as attributes or child elements
+
+        <Command name="Start" shortcut="Enter" category="Transport"/> and
+        <Shortcut><Name>Start</Name><Key>Enter</Key></Shortcut> both work; a
+        named <Category>/<Group> element supplies the category of records
+        inside it. Finished elements are cleared so memory stays flat.
+        """
+        categories = []  # Enclosing category names (None for unnamed groups)
+        stack = []       # Open elements, innermost last
+        for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+            tag = _local(elem.tag)
+            if event == 'start':
+                stack.append(elem)
+                if tag in CATEGORY_KEYS:
+                    categories.append(elem.get('name') or elem.get('title'))
+                continue
+            stack.pop()
+            record = None
+            if tag in CATEGORY_KEYS:
+                categories.pop()  # A finished group holds no record, but is still detached below
+            else:
+                fields = {key.lower(): value for key, value in elem.attrib.items()}
+                for child in elem:
+                    if child.text and child.text.strip():
+                        fields.setdefault(_local(child.tag), child.text.strip())
+                current = next((name for name in reversed(categories) if name), None)
+                record = _record(fields, current) if stack else None
+                if record:
+                    yield record
+            if not stack:
+                continue
+            parent = stack[-1]
+            # Keep only text leaves, which may be fields of the still-open parent; detach every
+            # other finished element (records, unbound commands, wrappers) so memory stays flat
+            if (record or parent is stack[0] or _local(parent.tag) in CATEGORY_KEYS
+                    or len(elem) or not (elem.text and elem.text.strip())):
+                elem.clear()
+                parent.remove(elem)
+
+    def _iter_json(self, file_path, chunk_size=1 << 16):
+        """JSON format: a list of shortcut objects, an object wrapping such lists, or JSON Lines
+
+        Objects are decoded one at a time from a sliding buffer, so only the
+        current record (or group of records) is ever in memory.
+        """
+        decoder = json.JSONDecoder()
         with open(file_path, 'r') as file:
-            for line in file:
-                # Expected format: Command Name | Shortcut | Category
-                parts = line.strip().split('|')
-                if len(parts) >= 2:
-                    shortcuts.append({
-                        'command_name': parts[0].strip(),
-                        'shortcut': parts[1].strip(),
-                        'category': parts[2].strip() if len(parts) > 2 else None
-                    })
-        return shortcuts
-    
-    def _parse_xml(self, file_path):
-        """Parse XML format"""
-        pass
-    
-    def _parse_json(self, file_path):
-        """Parse JSON format"""
-        pass 
\ No newline at end of file
+            buffer = ''
+            pos = 0
+            eof = False
+
+            def fill():
+                """Append the next chunk, dropping what has been consumed"""
+                nonlocal buffer, pos, eof
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    eof = True
+                buffer = buffer[pos:] + chunk
+                pos = 0
+
+            def peek():
+                """Next non-whitespace character (None at end of file)"""
+                nonlocal pos
+                while True:
+                    while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                        pos += 1
+                    if pos < len(buffer):
+                        return buffer[pos]
+                    if eof:
+                        return None
+                    fill()
+
+            def value():
+                """Decode the next complete JSON value"""
+                nonlocal pos
+                peek()
+                while True:
+                    try:
+                        result, end = decoder.raw_decode(buffer, pos)
+                        # A value ending at the buffer edge may continue in the next chunk
+                        if end < len(buffer) or eof:
+                            pos = end
+                            return result
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                    fill()
+
+            def expect(char):
+                nonlocal pos
+                if peek() != char:
+                    raise ValueError(f"Expected '{char}' in {file_path} near offset {pos}")
+                pos += 1
+
+            def items(category=None):
+                """Records from the array starting at the cursor"""
+                nonlocal pos
+                expect('[')
+                if peek() == ']':
+                    pos += 1
+                    return
+                while True:
+                    yield from records(value(), category)
+                    if peek() == ',':
+                        pos += 1
+                        continue
+                    expect(']')
+                    return
+
+            def records(item, category=None):
+                """Records from one decoded value: a shortcut object or a group holding a list"""
+                if isinstance(item, list):
+                    for entry in item:
+                        yield from records(entry, category)
+                    return
+                if not isinstance(item, dict):
+                    return
+                fields = {str(key).lower(): entry for key, entry in item.items()}
+                record = _record(fields, category)
+                if record:
+                    yield record
+                    return
+                group = _pick(fields, CATEGORY_KEYS) or _pick(fields, ('name', 'title')) or category
+                for key in LIST_KEYS:
+                    if isinstance(fields.get(key), list):
+                        yield from records(fields[key], group if isinstance(group, str) else category)
+
+            first = peek()
+            if first == '[':
+                yield from items()
+            elif first == '{':
+                # Top-level object: stream its record lists, decode other members (e.g. "keys") whole
+                pos += 1
+                fields = {}
+                while peek() != '}':
+                    key = str(value()).lower()
+                    expect(':')
+                    category = _pick(fields, CATEGORY_KEYS)
+                    if peek() == '[' and key in LIST_KEYS:
+                        yield from items(category if isinstance(category, str) else None)
+                    else:
+                        member = value()
+                        if isinstance(member, dict):
+                            yield from records(member, category if isinstance(category, str) else None)
+                        else:
+                            fields[key] = member
+                    if peek() == ',':
+                        pos += 1
+                pos += 1
+                # The object itself may be a record: the first line of a JSON Lines file
+                record = _record(fields)
+                if record:
+                    yield record
+                while peek() is not None:
+                    yield from records(value())
+            elif first is not None:
+                raise ValueError(f"Unsupported JSON keymap layout in {file_path}")
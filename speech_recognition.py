@@ -1,21 +1,57 @@
-from vosk import Model, KaldiRecognizer
+from model_registry import registry, DEFAULT_MODEL_PATH
 import pyaudio
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 import queue
 import json
 import time
+import numpy as np
 import sqlite3
+from audio_capture import AudioCapture
+from voice_activity import VoiceActivityGate
+from early_dispatch import PartialCommandTracker
+from command_index import CommandIndex, calculate_similarity
+from phonetic_index import PhoneticIndex, MIN_SIMILARITY
+from batch_scorer import BatchScorer
+from resolution_cache import ResolutionCache
+from phrase_segmenter import PhraseSegmenter
+from sample_store import SampleStore
+from text_normalizer import TextNormalizer
 
 class SpeechRecognizer:
-    def __init__(self, database):
+    def __init__(self, database, use_vad=True, vad_hangover_ms=600, vad_preroll_ms=300,
+                 early_dispatch=False, early_dispatch_commands=None, early_stable_frames=2,
+                 use_grammar=False, defer_resources=False, max_alternatives=5):
         print("DEBUG: SR - Initializing voice recognition system...")
         self.db = database
-        self.model = Model("vosk-model-small-en-us")
-        self.recognizer = KaldiRecognizer(self.model, 16000)
-        self.audio = pyaudio.PyAudio()
-        self.mic_index = self._find_microphone()
-        self.command_samples = {}  # Store successful command samples
+        self.model_path = DEFAULT_MODEL_PATH
+        self.model = None
+        self.recognizer = None
+        self.decoding = False  # Audio fed since the recognizer last endpointed
+        self.audio = None
+        self.capture = None
+        self.decoder_thread = None
+        self.ready = Event()  # Set once the model and microphone are usable
+        self.use_grammar = use_grammar  # Decode only catalog phrases plus [unk]
+        self.max_alternatives = max_alternatives  # N-best hypotheses per utterance (1 = single best)
+        self.ACOUSTIC_WEIGHT = 0.3  # Share of the combined score taken from the decoder
+        self.ACOUSTIC_TEMPERATURE = 10.0  # Softens decoder score gaps before normalizing
+        self.nbest_rescued = 0  # Utterances where a lower-ranked hypothesis won
+        self.FAST_PATH_CONFIDENCE = 0.9  # Decoder word confidence that trusts an exact catalog hit
+        self.fast_path_count = 0  # Utterances resolved without similarity scoring
+        self.resolved_count = 0
+        self.sample_store = SampleStore(database)  # Persists samples and golden status
+        self.command_samples = self.sample_store.load()  # Store successful command samples
         self.known_commands = set()  # Store known commands
+        self.catalog_version = 0  # Catalog snapshot the derived indexes were built from
+        self.command_index = CommandIndex()  # Trigram index over commands and samples
+        self.phonetic_index = PhoneticIndex()  # Phonetic key -> voice commands
+        self.batch_scorer = BatchScorer()  # Vectorized fallback over the whole catalog
+        self.segmenter = PhraseSegmenter()  # Token trie for splitting chained commands
+        self.normalizer = TextNormalizer()  # Stopwords and rewrites, rebuilt with the catalog
+        self.resolution_cache = ResolutionCache(maxsize=512)  # (text, catalog version) -> decision
+        self.PHONETIC_CONFIDENCE = 95  # Sounds exactly like a single catalog command
+        self.FALLBACK_SHORTLIST = 10  # Edit-distance candidates rescored when the trigram index misses
+        self.PHONETIC_MIN_SIMILARITY = MIN_SIMILARITY  # Edit-distance floor: Metaphone drops inner vowels
         self.MIN_CONFIDENCE = 50
         self.VARIATION_THRESHOLD = 75  # Higher bar for variations
         self.DIRECT_THRESHOLD = 90    # Clear speech threshold
@@ -25,18 +61,25 @@ class SpeechRecognizer:
         # Load known commands from database
         self.load_known_commands()
         
-        print("DEBUG: SR - Setting up microphone...")
-        self.stream = self.audio.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=16000,
-            input=True,
-            input_device_index=self.mic_index,
-            frames_per_buffer=8000
-        )
-        print("DEBUG: SR - Microphone configured")
-        self.stream.stop_stream()
+        # Patch (or rebuild) catalog-derived state whenever commands change
+        self.catalog_dirty = False
+        self.pending_changes = []  # ChangeSets to patch in at the next utterance boundary
+        self.pending_lock = Lock()
+        self.db.add_change_listener(self._on_catalog_change)
+        self.catalog_poll_interval = 2.0  # Seconds between external-change checks
+        self.last_catalog_poll = time.monotonic()
+        
+        # Opt-in fast path: fire short commands from stable partial results
+        self.early_dispatch_commands = early_dispatch_commands
+        self.partial_tracker = PartialCommandTracker(early_stable_frames) if early_dispatch else None
+        if self.partial_tracker:
+            self.partial_tracker.set_commands(self.known_commands, early_dispatch_commands, self.normalizer)
+        self.decode_chunk = 1600 if early_dispatch else 4000  # Smaller chunks = more partials
+        
         self.is_listening = False
+        
+        # Only speech-bearing chunks reach AcceptWaveform
+        self.vad = VoiceActivityGate(hangover_ms=vad_hangover_ms, preroll_ms=vad_preroll_ms) if use_vad else None
         self.command_queue = queue.Queue()
         self.current_phrase = []
         self.last_word_time = 0
@@ -44,6 +87,31 @@ class SpeechRecognizer:
         self.command_cooldown = 0.5  # Seconds between commands
         self.state_changes = 0  # Track mic toggles
         
+        # Decoding runs on its own thread and pushes into command_queue
+        self.command_listener = None
+        self.listening_event = Event()
+        self.running = True
+        
+        # Startup may load the model and open the device on a background thread
+        if not defer_resources:
+            self.load_resources()
+
+    def load_resources(self):
+        """Load the model, open the microphone and start decoding (slow)"""
+        self.model = registry.acquire(self.model_path)  # Shared with the rest of the process
+        self.recognizer = self.new_recognizer(grammar=self.use_grammar,
+                                              alternatives=self.max_alternatives)
+        
+        self.audio = pyaudio.PyAudio()
+        self.mic_index = self._find_microphone()
+        print("DEBUG: SR - Setting up microphone...")
+        self.capture = AudioCapture(self.audio, self.mic_index)
+        print("DEBUG: SR - Microphone configured")
+        
+        self.decoder_thread = Thread(target=self._decode_loop, name="Decoder", daemon=True)
+        self.decoder_thread.start()
+        self.ready.set()
+        
     def _find_microphone(self):
         """Find and remember the microphone index"""
         print("\nAvailable Audio Devices:")
@@ -60,10 +128,15 @@ class SpeechRecognizer:
         if self.is_listening:
             print("DEBUG: SR - Microphone already on")
             return
+        if not self.ready.is_set():
+            raise Exception("Voice system still loading")
         
         print("DEBUG: SR - Turning microphone on")
-        self.stream.start_stream()
+        if self.vad:
+            self.vad.reset()
+        self.capture.start()
         self.is_listening = True
+        self.listening_event.set()
         self.state_changes += 1
         print(f"DEBUG: SR - State change #{self.state_changes}")
 
@@ -74,27 +147,34 @@ class SpeechRecognizer:
             return
         
         print("DEBUG: SR - Turning microphone off")
-        self.stream.stop_stream()
+        self.listening_event.clear()
+        self.capture.stop()
         self.is_listening = False
         self.state_changes += 1
         print(f"DEBUG: SR - State change #{self.state_changes}")
+        if self.vad:
+            self.vad.report()
 
     def load_known_commands(self):
         """Load known commands from database"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                SELECT command_name, voice_command 
-                FROM commands 
-                WHERE voice_command IS NOT NULL
-                AND voice_command != ''
-            """)
+            snapshot = self.db.catalog.current()
+            rows = snapshot.rows
             
-            for row in cursor.fetchall():
-                command_name, voice_command = row
+            known_commands = set()
+            command_index = CommandIndex()
+            phonetic_index = PhoneticIndex()
+            segmenter = PhraseSegmenter()
+            for row in rows:
+                command_name, voice_command, key = row
                 if voice_command:
+                    segmenter.add(voice_command)
                     print(f"DEBUG: SR - Loading command: {voice_command} -> {command_name}")
-                    self.known_commands.add(voice_command.lower())
+                    known_commands.add(voice_command.lower())
+                    command_index.add(voice_command, command_name)
+                    phonetic_index.add(voice_command, key)
+                    if voice_command.lower() in self.command_samples:
+                        continue  # Keep samples learned this session
                     # Initialize with new structure
                     self.command_samples[voice_command.lower()] = {
                         'samples': [voice_command.lower()],
@@ -103,11 +183,140 @@ class SpeechRecognizer:
                         'is_golden': False
                     }
                     
-            print(f"DEBUG: SR - Loaded {len(self.known_commands)} known commands")
+            for data in self.command_samples.values():
+                for sample in data['samples']:
+                    command_index.add(sample)
+                    
+            self.known_commands = known_commands
+            self.command_index = command_index
+            self.phonetic_index = phonetic_index
+            self.segmenter = segmenter
+            self.normalizer = TextNormalizer.load(self.db)
+            self.batch_scorer = BatchScorer(sorted(known_commands))
+            self.catalog_version = snapshot.version
+            print(f"DEBUG: SR - Loaded {len(self.known_commands)} known commands "
+                  f"({len(command_index)} indexed phrases, catalog v{snapshot.version})")
             
         except Exception as e:
             print(f"DEBUG: SR - Error loading commands: {e}")
 
+    def build_grammar(self):
+        """Compile the voice command catalog into a Vosk grammar"""
+        return sorted(self.known_commands) + ["[unk]"]
+
+    def new_recognizer(self, grammar=False, alternatives=1):
+        """Create a recognizer, optionally restricted to the command grammar"""
+        if grammar:
+            phrases = self.build_grammar()
+            print(f"DEBUG: SR - Building grammar recognizer ({len(phrases) - 1} phrases)")
+            recognizer = registry.create_recognizer(self.model_path, 16000, phrases)
+        else:
+            recognizer = registry.create_recognizer(self.model_path, 16000)
+        if alternatives > 1:
+            # Result() then returns {"alternatives": [{"text", "confidence"}, ...]}
+            recognizer.SetMaxAlternatives(alternatives)
+        # Per-word timings; single-best results also carry per-word "conf"
+        recognizer.SetWords(True)
+        return recognizer
+
+    def _on_catalog_change(self, changes=None):
+        """Database listener: patch at the next utterance boundary, or rebuild if the delta is unknown"""
+        if changes is None:
+            self.catalog_dirty = True
+        elif changes.snapshots is None or changes.snapshots[0] != changes.snapshots[1]:
+            with self.pending_lock:
+                self.pending_changes.append(changes)
+        if changes is None or changes.voice_changed:
+            self.resolution_cache.clear()
+        # Shortcut-only edits leave the grammar, indexes and cached resolutions valid
+
+    def update_catalog(self):
+        """Bring catalog-derived state up to date (decoder thread, between utterances)"""
+        with self.pending_lock:
+            pending, self.pending_changes = self.pending_changes, []
+        if pending and not self.catalog_dirty:
+            self.catalog_dirty = not self.apply_catalog_changes(pending)
+        self._poll_catalog()
+        if self.catalog_dirty:
+            self.refresh_catalog()
+
+    def apply_catalog_changes(self, pending):
+        """Patch the indexes with ChangeSets from this process; False if a full rebuild is needed
+
+        Each ChangeSet must have been applied to the catalog snapshot the
+        indexes currently reflect, in order, with nothing else in between.
+        """
+        version = self.catalog_version
+        for changes in pending:
+            if changes.snapshots is None or changes.snapshots[0] != version:
+                return False
+            version = changes.snapshots[1]
+        snapshot = self.db.catalog.current()
+        if snapshot.version != version:
+            return False
+
+        # The final snapshot decides each touched phrase, so a voice command shared by
+        # another row, or removed and re-added across ChangeSets, ends up right
+        touched = {}
+        for changes in pending:
+            for _, voice, key in changes.removed + changes.added:
+                if voice:
+                    touched[voice.lower()] = key
+        known_commands = set(self.known_commands)
+        rebuild_normalizer = False
+        for voice, key in touched.items():
+            command_name = snapshot.by_voice.get(voice)
+            rebuild_normalizer |= any(word in self.normalizer.replacements for word in voice.split())
+            if command_name is None:
+                known_commands.discard(voice)
+                self.command_index.remove(voice)
+                for sample in self.command_samples.get(voice, {}).get('samples', ()):
+                    self.command_index.add(sample)  # Learned samples stay, as after a rebuild
+                self.phonetic_index.remove(voice, key)
+                self.segmenter.remove(voice)
+                continue
+            known_commands.add(voice)
+            self.command_index.remove(voice)  # Re-add so the phrase targets its current command
+            self.command_index.add(voice, command_name)
+            for sample in self.command_samples.get(voice, {}).get('samples', ()):
+                self.command_index.add(sample)
+            self.phonetic_index.add(voice, key)
+            self.segmenter.add(voice)
+            self.command_samples.setdefault(voice, {
+                'samples': [voice],
+                'last_success': time.time(),
+                'success_count': 1,
+                'is_golden': False
+            })
+
+        if rebuild_normalizer:
+            self.normalizer = TextNormalizer.load(self.db)
+        if known_commands != self.known_commands or rebuild_normalizer:
+            if self.partial_tracker:
+                self.partial_tracker.set_commands(known_commands, self.early_dispatch_commands,
+                                                  self.normalizer)
+        if known_commands != self.known_commands:
+            self.known_commands = known_commands
+            self.batch_scorer = BatchScorer(sorted(known_commands))
+            if self.use_grammar:
+                self.recognizer = self.new_recognizer(grammar=True, alternatives=self.max_alternatives)
+        self.catalog_version = snapshot.version
+        print(f"DEBUG: SR - Patched {len(touched)} voice commands into the indexes "
+              f"(catalog v{snapshot.version})")
+        return True
+
+    def refresh_catalog(self):
+        """Reload commands and rebuild everything derived from them"""
+        self.catalog_dirty = False
+        with self.pending_lock:
+            self.pending_changes = []  # The rebuild reads the latest snapshot
+        self.load_known_commands()
+        if self.partial_tracker:
+            self.partial_tracker.set_commands(self.known_commands, self.early_dispatch_commands,
+                                                  self.normalizer)
+        if self.use_grammar:
+            self.recognizer = self.new_recognizer(grammar=True, alternatives=self.max_alternatives)
+
     def calculate_confidence(self, text):
         """Calculate confidence score for recognized text"""
         try:
@@ -120,13 +329,9 @@ class SpeechRecognizer:
             if text in self.command_samples and self.command_samples[text]['is_golden']:
                 return 100
 
-            # Check similarity with stored samples
-            best_score = 0
-            for command, data in self.command_samples.items():
-                if data['samples']:
-                    for sample in data['samples']:
-                        similarity = self.calculate_similarity(text, sample)
-                        best_score = max(best_score, similarity)
+            # Check similarity with stored samples (index prunes to likely candidates)
+            matches = self.best_matches(text, k=1)
+            best_score = matches[0][1] if matches else 0
                 
             print(f"DEBUG: SR - Best similarity score for '{text}': {best_score}")
             return best_score
@@ -135,32 +340,23 @@ class SpeechRecognizer:
             print(f"DEBUG: SR - Error calculating confidence: {e}")
             return 0
 
+    def best_matches(self, text, k=1, catalog_only=False):
+        """Top-k (phrase, score, command_name) from the index, else a full vectorized scan"""
+        matches = self.command_index.top_k(text, k=k, catalog_only=catalog_only)
+        if matches:
+            return matches
+        # No candidate shares enough trigrams: shortlist the whole catalog by edit distance in
+        # one pass, then rescore with calculate_similarity so callers' thresholds still apply
+        shortlist = self.batch_scorer.best(text, max(k, self.FALLBACK_SHORTLIST))
+        rescored = sorted(((phrase, calculate_similarity(text, phrase)) for phrase, _ in shortlist),
+                          key=lambda match: match[1], reverse=True)[:k]
+        return [(phrase, score, self.command_index.command_for(phrase))
+                for phrase, score in rescored]
+
     def calculate_similarity(self, text1, text2):
         """Calculate similarity between two texts"""
         try:
-            text1 = text1.lower()
-            text2 = text2.lower()
-            
-            if text1 == text2:
-                return 100
-                
-            # Check if one is contained in the other
-            if text1 in text2 or text2 in text1:
-                return 75
-                
-            # Stricter character matching
-            matches = 0
-            total = max(len(text1), len(text2))
-            for i in range(min(len(text1), len(text2))):
-                if text1[i] == text2[i]:
-                    matches += 1
-                else:
-                    # Penalize differences more
-                    matches -= 0.5
-                    
-            score = (matches / total) * 100
-            return max(0, score)  # Don't return negative scores
-            
+            return calculate_similarity(text1, text2)
         except Exception as e:
             print(f"DEBUG: SR - Error calculating similarity: {e}")
             return 0
@@ -168,107 +364,320 @@ class SpeechRecognizer:
     def check_variations(self, text):
         """Check if text matches any known variations"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                SELECT command_name, voice_command 
-                FROM commands 
-                WHERE voice_command IS NOT NULL
-            """)
-            
-            best_match = None
-            best_score = 0
-            
-            for row in cursor.fetchall():
-                command_name, voice_command = row
-                similarity = self.calculate_similarity(text, voice_command)
-                if similarity > best_score:
-                    best_score = similarity
-                    best_match = command_name
-                    
-            return best_match if best_score >= self.VARIATION_THRESHOLD else None
+            matches = self.best_matches(text, k=1, catalog_only=True)
+            if matches and matches[0][1] >= self.VARIATION_THRESHOLD:
+                return matches[0][2]
+            return None
             
         except Exception as e:
             print(f"DEBUG: SR - Error checking variations: {e}")
             return None
 
     def get_next_command(self):
-        """Check for and process next command"""
-        if not self.is_listening or not self.stream:
+        """Return the next resolved command, if any, without blocking"""
+        try:
+            return self.command_queue.get_nowait()
+        except queue.Empty:
             return None
-            
+
+    def set_command_listener(self, listener):
+        """Register a callable invoked from the decoder thread when a command is queued"""
+        self.command_listener = listener
+
+    def _decode_loop(self):
+        """Consume audio from the capture ring and queue resolved commands"""
+        while self.running:
+            if not self.listening_event.wait(0.2):
+                continue
+            if not (self.vad and self.vad.is_open):
+                self.sample_store.flush(self.command_samples)
+                self.update_catalog()
+            data = self.capture.read(self.decode_chunk, timeout=0.2)
+            if data is None:
+                continue
+            chunks = self.vad.process(data) if self.vad else [data]
+            for chunk in chunks:
+                self._process_audio(chunk)
+            if self.vad and self.vad.utterance_ended:
+                self._flush_utterance()
+
+    def _poll_catalog(self):
+        """Notice catalog commits made outside this process (commands_version) every few seconds"""
+        now = time.monotonic()
+        if now - self.last_catalog_poll < self.catalog_poll_interval:
+            return
+        self.last_catalog_poll = now
+        if self.db.catalog.check().version != self.catalog_version:
+            self.catalog_dirty = True
+
+    def _emit(self, command):
+        """Queue a command and wake the listener"""
+        self.command_queue.put(command)
+        if self.command_listener:
+            self.command_listener()
+
+    def _process_audio(self, data):
+        """Feed one chunk to the recognizer and queue any resolved command"""
         try:
-            data = self.stream.read(4000, exception_on_overflow=False)
+            started = time.thread_time()
+            accepted = self.recognizer.AcceptWaveform(data)
+            if self.vad:
+                self.vad.record_decode(time.thread_time() - started, len(data))
+            self.decoding = not accepted
             
-            if self.recognizer.AcceptWaveform(data):
-                result = json.loads(self.recognizer.Result())
-                text = result.get("text", "").strip()
-                
-                if text:
-                    current_time = time.time()
-                    if current_time - self.last_command_time < self.command_cooldown:
-                        return None  # Too soon after last command
-                    
-                    print(f"DEBUG: SR - Raw text: {text}")
-                    
-                    # Clean and separate commands
-                    words = text.lower().split()
-                    # Remove common articles and clean text
-                    cleaned_words = []
-                    i = 0
-                    while i < len(words):
-                        if words[i] not in ['the', 'a', 'an', 'to', 'and']:
-                            # Check for two-word commands
-                            if i + 1 < len(words):
-                                pair = f"{words[i]} {words[i+1]}"
-                                if self.is_known_command(pair):
-                                    cleaned_words.append(pair)
-                                    i += 2
-                                    continue
-                            cleaned_words.append(words[i])
-                        i += 1
-                    
-                    # Take first potential command
-                    if cleaned_words:
-                        cleaned_text = cleaned_words[0]
-                        print(f"DEBUG: SR - Cleaned command: {cleaned_text}")
-                    
-                    # Calculate confidence and check samples
-                    confidence_score = self.calculate_confidence(cleaned_text)
-                    print(f"DEBUG: SR - Confidence: {confidence_score}%")
-                    
-                    if confidence_score >= self.DIRECT_THRESHOLD:
-                        # Store successful recognition
-                        self.store_successful_sample(cleaned_text)
-                        self.last_command_time = current_time
-                        return {'voice_text': cleaned_text, 'confidence': confidence_score}
+            if accepted:
+                self._handle_final(json.loads(self.recognizer.Result()))
                         
-                    elif confidence_score >= self.CLARIFICATION_THRESHOLD:
-                        # Find closest matching command
-                        closest_match = self.find_closest_command(cleaned_text)
-                        if closest_match:
-                            return {
-                                'voice_text': cleaned_text,
-                                'confidence': confidence_score,
-                                'needs_training': True,
-                                'suggested_match': closest_match
-                            }
-                            
-                    elif confidence_score >= self.VARIATION_THRESHOLD:
-                        # Check variations
-                        mapped_command = self.check_variations(cleaned_text)
-                        if mapped_command:
-                            self.last_command_time = current_time
-                            return {'voice_text': mapped_command, 'confidence': confidence_score}
-                            
-                    elif confidence_score >= self.MIN_CONFIDENCE:
-                        # Potential training candidate
-                        self.last_command_time = current_time
-                        return {'voice_text': cleaned_text, 'confidence': confidence_score, 'needs_training': True}
+            elif self.partial_tracker:
+                if time.time() - self.last_command_time < self.command_cooldown:
+                    return
+                partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+                early_text = self.partial_tracker.update(partial)
+                if early_text:
+                    print(f"DEBUG: SR - Early dispatch from partial: {early_text}")
+                    self.last_command_time = time.time()
+                    self._emit({'voice_text': early_text, 'confidence': 100, 'early': True,
+                                'utterance_end': time.monotonic()})
                 
         except Exception as e:
-            print(f"DEBUG: SR - Error reading audio: {e}")
+            print(f"DEBUG: SR - Error processing audio: {e}")
+
+    def _flush_utterance(self):
+        """The VAD gate closed: finalize the decoder now instead of waiting for Kaldi's silence endpoint
+
+        Vosk's trailing-silence endpoints need 1-2 s of audio, longer than
+        the gate's hangover, so without this the utterance would stay open
+        until the next speech and merge with it.
+        """
+        if not self.decoding:
+            return  # Kaldi already endpointed this utterance
+        self.decoding = False
+        try:
+            self._handle_final(json.loads(self.recognizer.FinalResult()))
+        except Exception as e:
+            print(f"DEBUG: SR - Error finalizing utterance: {e}")
+
+    def _handle_final(self, result):
+        """Resolve a final result (Result or FinalResult) and queue its commands"""
+        utterance_end = time.monotonic()
+        text, word_confidence = self.choose_hypothesis(result)
+        
+        already_sent = None
+        if self.partial_tracker:
+            verdict, early_text = self.partial_tracker.finalize(text)
+            if verdict == 'confirm':
+                print(f"DEBUG: SR - Final result confirms early '{early_text}'")
+                return
+            if verdict == 'extend':
+                # Chained utterance that began with the early command: send the rest
+                print(f"DEBUG: SR - Final result '{text}' extends early '{early_text}'")
+                already_sent = early_text
+                self.last_command_time = 0
+            if verdict == 'retract':
+                print(f"DEBUG: SR - Final result '{text}' retracts early '{early_text}'")
+                self._emit({'voice_text': early_text, 'retracted': True,
+                            'utterance_end': utterance_end})
+                self.last_command_time = 0  # Let the corrected command through
+        
+        if text:
+            commands = self.resolve_text(text, word_confidence)
+            if commands and already_sent and commands[0]['voice_text'] == already_sent:
+                commands = commands[1:]
+            for command in commands:
+                command['utterance_end'] = utterance_end
+                self._emit(command)
+
+    def resolve_text(self, text, word_confidence=None):
+        """Resolve recognized text to an ordered list of command decisions
+
+        word_confidence maps words to the decoder's 0-1 confidence; without
+        it the decision rests on string similarity alone.
+        """
+        try:
+            current_time = time.time()
+            if current_time - self.last_command_time < self.command_cooldown:
+                return []  # Too soon after last command
             
-        return None
+            print(f"DEBUG: SR - Raw text: {text}")
+            
+            commands = []
+            for phrase in self.segment_commands(text):
+                command = self.resolve_phrase(phrase, word_confidence, current_time)
+                if command:
+                    commands.append(command)
+            if len(commands) > 1:
+                print(f"DEBUG: SR - Chained commands: {[c['voice_text'] for c in commands]}")
+            return commands
+
+        except Exception as e:
+            print(f"DEBUG: SR - Error resolving text: {e}")
+            
+        return []
+
+    def resolve_phrase(self, cleaned_text, word_confidence, current_time):
+        """Resolve one segment of an utterance to a command decision"""
+        print(f"DEBUG: SR - Cleaned command: {cleaned_text}")
+        self.resolved_count += 1
+        
+        # Exact catalog hit the decoder is sure of: skip every similarity stage
+        acoustic = self.command_confidence(cleaned_text, word_confidence)
+        if (acoustic is not None and acoustic >= self.FAST_PATH_CONFIDENCE
+                and cleaned_text in self.known_commands):
+            self.fast_path_count += 1
+            print(f"DEBUG: SR - Fast path: '{cleaned_text}' (acoustic {acoustic:.2f}, "
+                  f"{self.fast_path_count}/{self.resolved_count} utterances)")
+            self.last_command_time = current_time
+            self.store_successful_sample(cleaned_text)  # The most-used commands must count too
+            return {'voice_text': cleaned_text, 'confidence': 100, 'acoustic': acoustic}
+        
+        tier, result = self.decide(cleaned_text, acoustic)
+        if tier == 'direct':
+            # Store successful recognition
+            self.store_successful_sample(cleaned_text)
+        if result is None:
+            return None
+        if tier != 'clarify':
+            self.last_command_time = current_time
+        return dict(result)
+
+    def segment_commands(self, text):
+        """Normalize text, then split it into command phrases in one longest-match pass"""
+        words = self.normalizer.normalize(text).split()
+        # Two-word command names stay whole, as is_known_command accepts them
+        names = self.db.catalog.current().by_name
+        return [phrase for phrase, _ in self.segmenter.segment(words, names)]
+
+    def clean_command(self, text):
+        """First command phrase in text (used to rank N-best hypotheses)"""
+        phrases = self.segment_commands(text)
+        return phrases[0] if phrases else None
+
+    def word_confidences(self, entry):
+        """Map each word of a result entry to the decoder's confidence in it"""
+        return {word['word']: word['conf'] for word in entry.get("result", ()) if 'conf' in word}
+
+    def choose_hypothesis(self, result):
+        """Pick the transcript with the best combined acoustic + catalog score
+
+        Returns (text, {word: acoustic confidence 0-1}).
+        """
+        alternatives = result.get("alternatives")
+        if not alternatives:
+            return result.get("text", "").strip(), self.word_confidences(result)
+        
+        texts = [alt.get("text", "").strip() for alt in alternatives]
+        
+        # Decoder scores are unnormalized log-likelihoods: softmax them into posteriors
+        acoustic = np.array([alt.get("confidence", 0.0) for alt in alternatives], dtype=np.float64)
+        acoustic = np.exp((acoustic - acoustic.max()) / self.ACOUSTIC_TEMPERATURE)
+        acoustic /= acoustic.sum()
+        
+        best = 0
+        cleaned = [self.clean_command(text) or '' for text in texts]
+        if len(alternatives) > 1 and len(self.batch_scorer):
+            
+            # Every hypothesis against every catalog phrase in one batched pass
+            catalog = self.batch_scorer.score_batch(cleaned).max(axis=1)
+            catalog[[not text for text in cleaned]] = 0
+            
+            combined = self.ACOUSTIC_WEIGHT * 100 * acoustic + (1 - self.ACOUSTIC_WEIGHT) * catalog
+            best = int(np.argmax(combined))
+            if best != 0:
+                self.nbest_rescued += 1
+                print(f"DEBUG: SR - N-best picked #{best + 1} '{texts[best]}' ({combined[best]:.1f}) "
+                      f"over '{texts[0]}' ({combined[0]:.1f})")
+        
+        confidences = self.word_confidences(alternatives[best])
+        if not confidences and len(set(cleaned)) > 1:
+            # N-best entries carry no per-word conf. Hypotheses that clean to the same command
+            # pool their posterior; only decoder consensus is passed on, since a split vote was
+            # already arbitrated by the catalog scores above. With a single distinct hypothesis
+            # the softmax is 1.0 by construction, so no confidence is reported at all
+            posterior = float(sum(p for p, command in zip(acoustic, cleaned) if command == cleaned[best]))
+            if posterior >= self.FAST_PATH_CONFIDENCE:
+                confidences = {word: posterior for word in texts[best].split()}
+        return texts[best], confidences
+
+    def command_confidence(self, cleaned_text, word_confidence):
+        """Lowest decoder confidence among the command's words, or None if unknown"""
+        if not word_confidence:
+            return None
+        confidences = [word_confidence[word] for word in cleaned_text.split() if word in word_confidence]
+        return min(confidences) if confidences else None
+
+    def combine_confidence(self, lexical, acoustic):
+        """Blend string similarity (0-100) with decoder confidence (0-1) into one score"""
+        if acoustic is None:
+            return lexical
+        return self.ACOUSTIC_WEIGHT * 100 * acoustic + (1 - self.ACOUSTIC_WEIGHT) * lexical
+
+    def decide(self, cleaned_text, acoustic=None):
+        """Memoized (tier, result) for cleaned text against the current catalog"""
+        # Acoustic confidence is bucketed to 0.1 so repeated phrases still hit the cache
+        acoustic = None if acoustic is None else round(acoustic, 1)
+        key = (cleaned_text, self.catalog_version, acoustic)
+        decision = self.resolution_cache.get(key)
+        if decision is None:
+            decision = self.classify(cleaned_text, acoustic)
+            self.resolution_cache.put(key, decision)
+        return decision
+
+    def classify(self, cleaned_text, acoustic=None):
+        """Score cleaned text and pick its confidence tier (no side effects)"""
+        # The grammar only emits catalog phrases, so an exact hit needs no fuzzy scoring
+        if self.use_grammar and cleaned_text in self.known_commands:
+            return 'grammar', {'voice_text': cleaned_text, 'confidence': 100}
+        
+        # Homophones of a single catalog command resolve without fuzzy scoring
+        phonetic_match = None
+        if cleaned_text not in self.known_commands:
+            phonetic_match, trusted = self.phonetic_index.match(cleaned_text, self.PHONETIC_MIN_SIMILARITY)
+            if phonetic_match:
+                print(f"DEBUG: SR - Phonetic match: '{cleaned_text}' -> '{phonetic_match}' "
+                      f"({'trusted' if trusted else 'spelled too differently'})")
+                if trusted:
+                    return 'phonetic', {'voice_text': phonetic_match, 'confidence': self.PHONETIC_CONFIDENCE}
+        
+        # Calculate confidence and check samples; tiers apply to the acoustic+lexical blend
+        lexical_score = self.calculate_confidence(cleaned_text)
+        confidence_score = self.combine_confidence(lexical_score, acoustic)
+        print(f"DEBUG: SR - Confidence: {confidence_score}% (lexical {lexical_score}%, acoustic {acoustic})")
+        
+        if confidence_score >= self.DIRECT_THRESHOLD:
+            return 'direct', {'voice_text': cleaned_text, 'confidence': confidence_score}
+            
+        elif phonetic_match:
+            # Same consonants, different spelling ('step' ~ 'stop'): ask instead of firing
+            return 'clarify', {
+                'voice_text': cleaned_text,
+                'confidence': max(confidence_score, self.CLARIFICATION_THRESHOLD),
+                'needs_training': True,
+                'suggested_match': phonetic_match
+            }
+            
+        # A tier that finds nothing falls through to the next, so a higher score never does worse
+        if confidence_score >= self.CLARIFICATION_THRESHOLD:
+            # Find closest matching command
+            closest_match = self.find_closest_command(cleaned_text)
+            if closest_match:
+                return 'clarify', {
+                    'voice_text': cleaned_text,
+                    'confidence': confidence_score,
+                    'needs_training': True,
+                    'suggested_match': closest_match
+                }
+                
+        if confidence_score >= self.VARIATION_THRESHOLD:
+            # Check variations
+            mapped_command = self.check_variations(cleaned_text)
+            if mapped_command:
+                return 'variation', {'voice_text': mapped_command, 'confidence': confidence_score}
+                
+        if confidence_score >= self.MIN_CONFIDENCE:
+            # Potential training candidate
+            return 'training', {'voice_text': cleaned_text, 'confidence': confidence_score, 'needs_training': True}
+            
+        return 'reject', None
 
     def store_successful_sample(self, text):
         """Store successful recognition sample"""
@@ -295,10 +704,13 @@ class SpeechRecognizer:
                     break
             
             if is_consistent:
+                # Every success counts toward eviction priority, even once samples are full
+                command_data['success_count'] += 1
+                command_data['last_success'] = current_time
                 if len(command_data['samples']) < 4:  # Keep up to 4 samples
                     command_data['samples'].append(text)
-                    command_data['success_count'] += 1
-                    command_data['last_success'] = current_time
+                    self.command_index.add(text)
+                    self.resolution_cache.clear()  # Scores and golden status may change
                     
                     # Mark as golden sample after 3 successful recognitions
                     if command_data['success_count'] >= 3:
@@ -307,53 +719,78 @@ class SpeechRecognizer:
                     print(f"DEBUG: SR - Stored sample for '{text}' (Success #{command_data['success_count']})")
                     if command_data['is_golden']:
                         print(f"DEBUG: SR - '{text}' is now a golden sample!")
+                
+                new_entry = text not in self.sample_store.learned
+                self.sample_store.mark(text)
+                if new_entry:
+                    self._evict_samples()
             else:
                 print(f"DEBUG: SR - Sample for '{text}' inconsistent with existing samples")
                 
         except Exception as e:
             print(f"DEBUG: SR - Error storing sample: {e}")
 
+    def _evict_samples(self):
+        """Keep the learned-sample table under its cap and drop evicted phrases from the index"""
+        evicted = self.sample_store.evict(self.command_samples)
+        for text in evicted:
+            if self.command_index.command_for(text) is None:  # Catalog phrases stay indexed
+                self.command_index.remove(text)
+        if evicted:
+            self.resolution_cache.clear()
+
     def cleanup(self):
         """Only called on program exit"""
         print("DEBUG: SR - Cleaning up voice system")
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        self.audio.terminate()
+        self.running = False
+        self.db.remove_change_listener(self._on_catalog_change)
+        self.listening_event.set()
+        if self.decoder_thread:
+            self.decoder_thread.join(timeout=1.0)
+        self.sample_store.flush(self.command_samples)
+        if self.vad:
+            self.vad.report()
+        self.resolution_cache.report("SR")
+        print(f"DEBUG: SR - N-best rescued {self.nbest_rescued} utterances")
+        if self.resolved_count:
+            print(f"DEBUG: SR - Fast path: {self.fast_path_count}/{self.resolved_count} utterances "
+                  f"({self.fast_path_count / self.resolved_count:.0%})")
+        if self.partial_tracker:
+            print(f"DEBUG: SR - Early dispatches: {self.partial_tracker.early_count} "
+                  f"({self.partial_tracker.confirmed_count} confirmed, "
+                  f"{self.partial_tracker.retracted_count} retracted)")
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+        if self.audio:
+            self.audio.terminate()
+            self.audio = None
+        if self.model:
+            registry.release(self.model_path)
+            self.model = None
 
     def is_known_command(self, text):
         """Check if text matches any known command"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                SELECT 1 FROM commands 
-                WHERE LOWER(command_name) = LOWER(?) 
-                OR LOWER(voice_command) = LOWER(?)
-            """, (text, text))
-            return cursor.fetchone() is not None
+            return self.db.catalog.current().is_known(text)
         except Exception as e:
             print(f"DEBUG: SR - Error checking known command: {e}")
             return False 
 
-    def find_closest_command(self, text):
+    def find_closest_command(self, text, k=5):
         """Find the closest matching command"""
         try:
-            best_match = None
-            best_score = 0
-            
-            for command in self.known_commands:
-                similarity = self.calculate_similarity(text, command)
+            matches = self.best_matches(text, k=k, catalog_only=True)
+            for command, similarity, _ in matches:
                 # Print all potential matches for debugging
                 if similarity >= self.CLARIFICATION_THRESHOLD:
                     print(f"DEBUG: SR - Potential match: '{command}' ({similarity}%)")
-                if similarity > best_score:
-                    best_score = similarity
-                    best_match = command
                     
+            best_match, best_score = (matches[0][0], matches[0][1]) if matches else (None, 0)
             print(f"DEBUG: SR - Closest match for '{text}': {best_match} ({best_score}%)")
             # Return match if score is good enough
             return best_match if best_score >= self.CLARIFICATION_THRESHOLD else None
             
         except Exception as e:
             print(f"DEBUG: SR - Error finding closest command: {e}")
-            return None 
\ No newline at end of file
+            return None 
@@ -1,10 +1,47 @@
 """System initialization and cleanup module"""
 import tkinter as tk
+import threading
+import time
+from contextlib import contextmanager
 from database import Database
 from speech_recognition import SpeechRecognizer
 from training_module import TrainingModule
 from gui_viewer import DatabaseGUI
 
+class StartupTimer:
+    """Record how long each startup phase takes, per thread"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, seconds, finished_at, thread)
+        self.lock = threading.Lock()
+        
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one startup phase"""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.phases.append((name, end - begin, end - self.started,
+                                    threading.current_thread().name))
+            
+    def mark(self, name):
+        """Record a milestone with no duration"""
+        with self.lock:
+            self.phases.append((name, 0.0, time.perf_counter() - self.started,
+                                threading.current_thread().name))
+            
+    def report(self):
+        """Print the startup timing breakdown"""
+        with self.lock:
+            phases = sorted(self.phases, key=lambda p: p[2])
+        print("DEBUG: INIT - Startup timing breakdown:")
+        for name, seconds, finished_at, thread in phases:
+            print(f"DEBUG: INIT -   {name:<28} {seconds * 1000:8.1f} ms  "
+                  f"(done at {finished_at:6.2f}s, {thread})")
+
 def initialize_database(db_path):
     """Initialize database system"""
     print("DEBUG: INIT - Setting up database...")
@@ -28,6 +65,67 @@ def initialize_voice_system(database):
         print(f"DEBUG: INIT - Voice system initialization failed: {e}")
         raise
 
+class VoiceStartup:
+    """Background load of the voice system that shutdown can stop and wait for"""
+    def __init__(self, database, timer, voice_system, on_ready):
+        self.database = database
+        self.timer = timer
+        self.voice_system = voice_system
+        self.on_ready = on_ready
+        self.training = None  # Set once handed to on_ready
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.load, name="VoiceStartup", daemon=True)
+        
+    def load(self):
+        """Worker thread: each phase starts only if shutdown has not begun"""
+        training = None
+        error = None
+        try:
+            if self.cancelled.is_set():
+                return
+            with self.timer.phase("voice model + microphone"):
+                self.voice_system.load_resources()
+            print("DEBUG: INIT - Voice system ready")
+            if self.cancelled.is_set():
+                return
+            with self.timer.phase("training module"):
+                training = initialize_training(self.database, self.voice_system)
+        except Exception as e:
+            print(f"DEBUG: INIT - Voice system initialization failed: {e}")
+            error = e
+        if self.cancelled.is_set():
+            # Nobody will receive it: release it before cleanup closes the database
+            if training:
+                training.cleanup()
+            return
+        self.timer.mark("voice system ready")
+        self.timer.report()
+        self.training = training
+        self.on_ready(self.voice_system, training, error)
+        
+    def stop(self):
+        """Keep the worker from starting another phase or calling on_ready, and wait for it"""
+        self.cancelled.set()
+        if self.thread.is_alive():
+            print("DEBUG: CLEANUP - Waiting for voice startup to finish its current phase...")
+            self.thread.join()
+
+def start_voice_system(database, timer, on_ready):
+    """Create the voice system now and load the model/microphone in the background
+
+    The command catalog is read on the calling thread. Model loading,
+    device enumeration, opening the stream and the training module run
+    on a worker thread; on_ready(voice_system, training, error) is then
+    called from that thread unless stop() was called first. Returns the
+    VoiceStartup; pass it to cleanup_system.
+    """
+    print("DEBUG: INIT - Setting up voice recognition (background)...")
+    with timer.phase("voice catalog"):
+        voice_system = SpeechRecognizer(database, defer_resources=True)
+    startup = VoiceStartup(database, timer, voice_system, on_ready)
+    startup.thread.start()
+    return startup
+
 def initialize_training(database, voice_system):
     """Initialize training module"""
     print("DEBUG: INIT - Setting up training module...")
@@ -36,7 +134,7 @@ def initialize_training(database, voice_system):
             database,
             use_neural=False,
             model=voice_system.model,
-            recognizer=voice_system.recognizer
+            recognizer=voice_system.new_recognizer()  # Free vocabulary, not shared with the decoder
         )
         print("DEBUG: INIT - Training module ready")
         return training
@@ -55,10 +153,18 @@ def initialize_gui(root, database, voice_system, training):
         print(f"DEBUG: INIT - GUI initialization failed: {e}")
         raise
 
-def cleanup_system(database, voice_system, training, gui):
+def cleanup_system(database, voice_system, training, gui, startup=None):
     """Clean shutdown of all systems"""
     print("DEBUG: CLEANUP - Starting system shutdown...")
     
+    # 0. Background startup must not touch the GUI or database once they go away
+    try:
+        if startup:
+            startup.stop()
+            training = training or startup.training
+    except Exception as e:
+        print(f"DEBUG: CLEANUP - Voice startup shutdown error: {e}")
+    
     # 1. GUI Cleanup
     try:
         print("DEBUG: CLEANUP - Shutting down GUI...")
@@ -8,6 +8,7 @@ from tqdm import tqdm
 import shutil
 import pyaudio
 from vosk import Model, KaldiRecognizer
+from model_registry import registry
 
 def check_installation():
     print(f"Python version: {sys.version}")
@@ -179,8 +180,11 @@ def test_vosk_model():
             
         # Try to load the model
         print("\nTrying to load Vosk model...")
-        model = Model(model_path)
-        print("[OK] Model loaded successfully")
+        registry.acquire(model_path)
+        stats = registry.stats()[0]
+        resident = (f", ~{stats['resident_bytes'] / 1e6:.1f} MB resident"
+                    if stats['resident_bytes'] is not None else "")
+        print(f"[OK] Model loaded successfully ({stats['load_time']:.2f}s{resident})")
         return True
         
     except ImportError as e:
@@ -206,8 +210,8 @@ def setup_recognition():
         print("Model not found. Please run setup first.")
         return None, None
     
-    # Initialize voice recognition
-    model = Model(model_path)
+    # Initialize voice recognition (shared model, loaded once per process)
+    registry.acquire(model_path)
     
     # Setup audio input
     p = pyaudio.PyAudio()
@@ -219,7 +223,7 @@ def setup_recognition():
         frames_per_buffer=8000
     )
     
-    return KaldiRecognizer(model, 16000), stream
+    return registry.create_recognizer(model_path, 16000), stream
 
 def listen_continuous():
     """Continuously listen and print recognized text"""
@@ -0,0 +1,31 @@
+"""Shared fixtures; the modules under test live at the repository root"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A freshly migrated database in a temporary directory"""
+    database = Database(str(tmp_path / 'commands.db'))
+    database.initialize()
+    yield database
+    database.cleanup()
+
+
+def flush(database):
+    """Wait until every queued (wait=False) write has committed"""
+    database.write(lambda conn: None)
+
+
+def rows(database, program='Studio One'):
+    """{command_name: (shortcut, category, voice_command)} for one program"""
+    with database.reading() as conn:
+        return {name: (shortcut, category, voice) for name, shortcut, category, voice in conn.execute(
+            "SELECT command_name, shortcut, category, voice_command FROM commands WHERE program_name = ?",
+            (program,))}
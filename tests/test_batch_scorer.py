@@ -0,0 +1,47 @@
+"""BatchScorer: vectorized edit distance against a reference Levenshtein"""
+import random
+
+import pytest
+
+from batch_scorer import BatchScorer
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ch_a in enumerate(a, 1):
+        current = [i]
+        for j, ch_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch_a != ch_b)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.fixture
+def phrases():
+    rng = random.Random(7)
+    words = ['play', 'stop', 'record', 'loop', 'mute', 'solo', 'undo', 'zoom', 'in', 'out', 'go', 'to', 'start']
+    generated = {' '.join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(300)}
+    # Edge lengths: single characters and phrases longer than one 64-bit word
+    return sorted(generated) + ['x', 'record enable ' * 6]
+
+
+@pytest.mark.parametrize('text', ['play', 'plya', 'stop loop', 'zoom out to start', '', 'q',
+                                  'go to start and record enable everything right now please ' * 2])
+def test_distances_match_reference(phrases, text):
+    scorer = BatchScorer(phrases)
+
+    assert list(scorer.distances(text)) == [levenshtein(text, phrase) for phrase in phrases]
+
+
+def test_scores_and_best():
+    scorer = BatchScorer(['stop', 'solo', 'record', 'loop'])
+
+    assert list(scorer.scores('stopp')) == pytest.approx([80.0, 40.0, 100 / 6, 40.0])
+    best = scorer.best('stopp', k=2)
+    assert best[0] == ('stop', 80.0)
+    assert best[1][1] == 40.0
+
+
+def test_case_insensitive_and_empty_catalog():
+    assert list(BatchScorer(['Play']).distances('PLAY')) == [0]
+    assert len(BatchScorer().distances('play')) == 0
@@ -0,0 +1,37 @@
+"""Database.bulk_upsert_commands: one-transaction keymap imports"""
+from conftest import rows
+
+
+def test_inserts_new_and_updates_existing_names(db):
+    db.add_command('Transport Play', 'space', 'Transport', 'play')
+
+    counts = db.bulk_upsert_commands([('transport play', 'enter', None),
+                                      ('Zoom In', 'ctrl+plus', 'View')])
+
+    assert (counts['rows'], counts['updated'], counts['inserted']) == (2, 1, 1)
+    # Matched case-insensitively; a missing category keeps the old one; the voice word is re-derived
+    assert rows(db) == {'Transport Play': ('enter', 'Transport', 'transport'),
+                        'Zoom In': ('ctrl+plus', 'View', 'zoom')}
+
+
+def test_repeated_name_keeps_the_last_line(db):
+    for program, batch_size in (('Split', 1), ('Same', 5000)):
+        db.bulk_upsert_commands([('Undo', 'ctrl+z', 'Edit'), ('UNDO', 'ctrl+y', None)],
+                                program, batch_size=batch_size)
+        assert rows(db, program) == {'Undo': ('ctrl+y', 'Edit', 'undo')}
+
+
+def test_programs_are_kept_apart(db):
+    db.bulk_upsert_commands([('Undo', 'ctrl+z', 'Edit')], 'Studio One')
+    counts = db.bulk_upsert_commands(iter([('Undo', 'cmd+z', 'Edit')]), 'Reaper')
+
+    assert counts['inserted'] == 1
+    assert rows(db) == {'Undo': ('ctrl+z', 'Edit', 'undo')}
+    assert rows(db, 'Reaper') == {'Undo': ('cmd+z', 'Edit', 'undo')}
+
+
+def test_changes_advance_the_catalog(db):
+    version = db.commands_version()
+    db.bulk_upsert_commands([('Redo', 'ctrl+y', 'Edit')])
+    assert db.commands_version() > version
+    assert 'redo' in db.catalog.current().by_voice
@@ -0,0 +1,58 @@
+"""CommandIndex: trigram candidate pruning with calculate_similarity scoring"""
+from command_index import CommandIndex, calculate_similarity, trigrams
+
+
+def index():
+    index = CommandIndex()
+    for phrase, command in (('play', 'Start'), ('stop', 'Stop'), ('record enable', 'Arm'), ('loop', 'Loop')):
+        index.add(phrase, command)
+    index.add('plays')  # A learned sample, not a catalog command
+    return index
+
+
+def test_trigrams_are_padded_and_whitespace_insensitive():
+    assert trigrams('Go  to') == {'  g', ' go', 'go ', 'o t', ' to', 'to '}
+
+
+def test_best_match_agrees_with_a_full_scan():
+    idx = index()
+
+    for text in ('ply', 'stopp', 'record', 'lopp', 'record enabel'):
+        best = max(idx.phrase_ids, key=lambda phrase: calculate_similarity(text, phrase))
+        matches = idx.top_k(text, k=3)
+        assert matches[0][:2] == (best, calculate_similarity(text, best))
+        assert [s for _, s, _ in matches] == sorted((s for _, s, _ in matches), reverse=True)
+
+
+def test_exact_hit_short_circuits():
+    assert index().top_k('STOP', k=1) == [('stop', 100, 'Stop')]
+
+
+def test_unrelated_text_has_no_candidates():
+    assert index().top_k('xyzzy') == []
+
+
+def test_catalog_only_skips_samples():
+    idx = index()
+
+    assert 'plays' in [p for p, _, _ in idx.top_k('plays', k=5)]
+    assert [(p, c) for p, _, c in idx.top_k('plays', k=5, catalog_only=True)] == [('play', 'Start')]
+
+
+def test_remove_drops_phrase_and_postings():
+    idx = index()
+
+    idx.remove('loop')
+    idx.remove('missing')
+
+    assert 'loop' not in idx and idx.command_for('loop') is None
+    assert idx.top_k('loop') == []
+    assert all(ids for ids in idx.postings.values())
+
+
+def test_add_keeps_the_first_command_target():
+    idx = index()
+
+    idx.add('Stop', 'Other')
+
+    assert idx.command_for('stop') == 'Stop' and len(idx) == 5
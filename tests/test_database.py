@@ -0,0 +1,65 @@
+"""Database schema migrations and program-scoped edits"""
+from conftest import rows
+
+
+def legacy(db, rows):
+    """Roll db back to an unmigrated schema holding rows (command_name, shortcut, voice_command)"""
+    def rollback(conn):
+        for index in ('idx_commands_name_lower', 'idx_commands_program_name_lower'):
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
+        conn.executemany("INSERT INTO commands (command_name, shortcut, category, voice_command, phonetic_key) "
+                         "VALUES (?, ?, 'Transport', ?, ?)",
+                         [(name, shortcut, voice, voice and voice.upper()) for name, shortcut, voice in rows])
+        conn.execute("PRAGMA user_version = 0")
+    db.write(rollback)
+
+
+def commands(db):
+    with db.reading() as conn:
+        return conn.execute("SELECT id, command_name, shortcut, voice_command, phonetic_key "
+                            "FROM commands ORDER BY id").fetchall()
+
+
+def test_migration_merges_duplicates_keeping_the_trained_voice_command(db):
+    legacy(db, [('Play', 'space', None), ('PLAY', 'enter', 'play it'), ('Stop', 's', 'stop')])
+    (survivor, _, _, _, _), (duplicate, _, _, _, _), _ = commands(db)
+    db.write(lambda conn: conn.execute("INSERT INTO command_usage (command_id, usage_count) VALUES (?, 3)",
+                                       (duplicate,)))
+
+    db.migrate()
+
+    assert commands(db) == [(survivor, 'Play', 'space', 'play it', 'PLAY IT'),
+                            (survivor + 2, 'Stop', 's', 'stop', 'STOP')]
+    with db.reading() as conn:
+        assert conn.execute("SELECT command_id, usage_count FROM command_usage").fetchall() == [(survivor, 3)]
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+
+
+def test_migration_keeps_the_survivors_own_voice_command(db):
+    legacy(db, [('Play', 'space', 'play'), ('play', 'enter', 'start')])
+    db.migrate()
+    assert [row[1:4] for row in commands(db)] == [('Play', 'space', 'play')]
+
+
+def test_update_command_is_scoped_to_the_program(db):
+    db.add_command('Undo', 'ctrl+z', 'Edit', 'undo', 'Studio One')
+    db.add_command('Redo', 'ctrl+y', 'Edit', 'redo', 'Studio One')
+    db.add_command('Undo', 'cmd+z', 'Edit', 'undo', 'Reaper')
+    with db.reading() as conn:
+        reaper_undo, = conn.execute("SELECT id FROM commands WHERE program_name = 'Reaper'").fetchone()
+
+    assert not db.update_command(reaper_undo, 'Undo', 'ctrl+u', 'Edit', 'undo', 'Studio One')
+    assert db.update_command(reaper_undo, 'Undo', 'ctrl+u', 'Edit', 'take back', 'Reaper')
+    assert rows(db, 'Reaper') == {'Undo': ('ctrl+u', 'Edit', 'take back')}
+    assert rows(db)['Undo'] == ('ctrl+z', 'Edit', 'undo')
+
+
+def test_update_command_refuses_a_name_taken_in_the_program(db):
+    db.add_command('Undo', 'ctrl+z', 'Edit', 'undo')
+    db.add_command('Redo', 'ctrl+y', 'Edit', 'redo')
+    with db.reading() as conn:
+        redo, = conn.execute("SELECT id FROM commands WHERE command_name = 'Redo'").fetchone()
+
+    assert not db.update_command(redo, 'UNDO', 'ctrl+y', 'Edit', 'redo')
+    assert db.update_command(redo, 'Redo Last', 'ctrl+y', 'Edit', 'redo')
+    assert set(rows(db)) == {'Undo', 'Redo Last'}
@@ -0,0 +1,79 @@
+"""DatabaseWriter: one writer thread, batched commits, per-operation savepoints"""
+import threading
+
+import pytest
+
+from db_writer import DatabaseWriter, open_connection
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / 'writer.db')
+    writer = DatabaseWriter(path, batch_window=0.05)
+    writer.execute(lambda conn: conn.execute("CREATE TABLE items (name TEXT UNIQUE)"))
+    yield writer, path
+    writer.close()
+
+
+def names(path):
+    conn = open_connection(path, read_only=True)
+    try:
+        return sorted(name for name, in conn.execute("SELECT name FROM items"))
+    finally:
+        conn.close()
+
+
+def test_execute_returns_result_from_writer_thread(writer):
+    writer, _ = writer
+
+    assert writer.execute(lambda conn: threading.current_thread().name) == 'DatabaseWriter'
+
+
+def test_failing_operation_rolls_back_alone(writer):
+    writer, path = writer
+
+    def insert(name):
+        return lambda conn: conn.execute("INSERT INTO items VALUES (?)", (name,)).rowcount
+    futures = [writer.submit(insert(name)) for name in ('a', 'b', 'a', 'c')]
+
+    assert [future.exception() is None for future in futures] == [True, True, False, True]
+    assert names(path) == ['a', 'b', 'c']
+    assert writer.stats()['failures'] == 1
+
+
+def test_operations_are_batched_into_few_commits(writer):
+    writer, path = writer
+    commits = writer.stats()['commits']
+
+    futures = [writer.submit(lambda conn, i=i: conn.execute("INSERT INTO items VALUES (?)", (str(i),)))
+               for i in range(100)]
+    for future in futures:
+        future.result()
+
+    assert len(names(path)) == 100
+    assert writer.stats()['commits'] - commits < 100
+
+
+def test_nested_submit_runs_in_the_same_transaction(writer):
+    writer, path = writer
+
+    def outer(conn):
+        conn.execute("INSERT INTO items VALUES ('outer')")
+        writer.submit(lambda inner: inner.execute("INSERT INTO items VALUES ('inner')")).result()
+        raise RuntimeError("undo both")
+
+    with pytest.raises(RuntimeError):
+        writer.execute(outer)
+    assert names(path) == []
+
+
+def test_close_drains_pending_operations(tmp_path):
+    path = str(tmp_path / 'drain.db')
+    writer = DatabaseWriter(path)
+    writer.submit(lambda conn: conn.execute("CREATE TABLE items (name TEXT)"))
+    futures = [writer.submit(lambda conn: conn.execute("INSERT INTO items VALUES ('x')")) for _ in range(10)]
+
+    writer.close()
+
+    assert all(future.done() for future in futures)
+    assert names(path) == ['x'] * 10
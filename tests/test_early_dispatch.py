@@ -0,0 +1,68 @@
+"""PartialCommandTracker: early dispatch from stable partial results"""
+from early_dispatch import PartialCommandTracker
+from text_normalizer import TextNormalizer
+
+
+def tracker(known=('play', 'stop', 'play selection', 'zoom in'), allowed=None, stable_frames=2):
+    tracker = PartialCommandTracker(stable_frames)
+    tracker.set_commands(set(known), allowed)
+    return tracker
+
+
+def test_only_unextended_single_words_are_eligible_by_default():
+    assert set(tracker().candidates.values()) == {'stop'}
+
+
+def test_allowed_list_overrides_the_single_word_rule():
+    assert set(tracker(allowed=['Zoom In', 'play']).candidates.values()) == {'zoom in'}
+
+
+def test_dispatches_once_a_partial_is_stable():
+    t = tracker()
+
+    assert t.update('stop') is None
+    assert t.update('Stop') == 'stop'
+    assert t.update('stop') is None  # Only once per utterance
+    assert t.early_count == 1
+
+
+def test_a_different_partial_restarts_the_streak():
+    t = tracker()
+
+    t.update('stop')
+    t.update('stopwatch')
+
+    assert t.update('stop') is None
+    assert t.update('stop') == 'stop'
+
+
+def test_finalize_confirms_extends_or_retracts():
+    t = tracker()
+    assert t.finalize('stop') == (None, None)
+
+    t.update('stop'), t.update('stop')
+    assert t.finalize('stop') == ('confirm', 'stop')
+
+    t.update('stop'), t.update('stop')
+    assert t.finalize('stop play') == ('extend', 'stop')
+
+    t.update('stop'), t.update('stop')
+    assert t.finalize('stopwatch') == ('retract', 'stop')
+    assert (t.confirmed_count, t.retracted_count) == (2, 1)
+
+
+def test_partials_are_normalized_like_final_results():
+    # A catalog phrase containing a stopword survives only a normalizer that protects it
+    t = PartialCommandTracker(stable_frames=2)
+    t.set_commands({'go to start', 'play'}, ['go to start'],
+                   TextNormalizer(protected=['go to start']))
+
+    assert t.update('go to start') is None
+    assert t.update('[unk] go to start') == 'go to start'
+    assert t.finalize('go to start please') == ('confirm', 'go to start')
+
+
+def test_partials_get_the_normalizer_rewrites():
+    t = tracker(known=('play', 'stop'), allowed=['play'])
+    t.update('clay'), t.update('clay')
+    assert t.dispatched == 'play'
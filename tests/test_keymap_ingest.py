@@ -0,0 +1,49 @@
+"""keymap_ingest: parallel import of a directory of keymaps, one program each"""
+from conftest import flush, rows
+from keymap_ingest import find_keymaps, ingest_directory
+
+
+def write(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(''.join(f"{line}\n" for line in lines))
+
+
+def test_find_keymaps_names_programs_by_directory_or_stem(tmp_path):
+    write(tmp_path / 'Reaper' / 'main.kbs', ['Undo|cmd+z|Edit'])
+    write(tmp_path / 'Reaper' / 'extra' / 'more.txt', ['Redo|cmd+y|Edit'])
+    write(tmp_path / 'Ableton.txt', ['Play|space|Transport'])
+    write(tmp_path / 'notes.md', ['not a keymap'])
+
+    found = sorted((program, path.replace(str(tmp_path), '')) for program, path in find_keymaps(str(tmp_path)))
+    assert [program for program, _ in found] == ['Ableton', 'Reaper', 'Reaper']
+    assert not any(path.endswith('.md') for _, path in found)
+
+
+def test_ingest_upserts_each_program_and_skips_unchanged_files(db, tmp_path):
+    write(tmp_path / 'Reaper' / 'main.kbs', ['Undo|cmd+z|Edit', 'Redo|cmd+y|Edit'])
+    write(tmp_path / 'Ableton.txt', ['Undo|ctrl+z|Edit'])
+
+    stats = ingest_directory(db, str(tmp_path), workers=2)
+    flush(db)
+
+    assert (stats['Reaper']['files'], stats['Reaper']['inserted']) == (1, 2)
+    assert stats['Ableton']['inserted'] == 1
+    assert rows(db, 'Reaper') == {'Undo': ('cmd+z', 'Edit', 'undo'), 'Redo': ('cmd+y', 'Edit', 'redo')}
+    assert rows(db, 'Ableton') == {'Undo': ('ctrl+z', 'Edit', 'undo')}
+
+    write(tmp_path / 'Ableton.txt', ['Undo|ctrl+shift+z|Edit'])
+    stats = ingest_directory(db, str(tmp_path), workers=2)
+
+    assert stats['Reaper']['skipped'] == 1 and stats['Reaper']['rows'] == 0
+    assert stats['Ableton']['updated'] == 1
+    assert rows(db, 'Ableton') == {'Undo': ('ctrl+shift+z', 'Edit', 'undo')}
+
+
+def test_unreadable_file_does_not_stop_the_others(db, tmp_path):
+    write(tmp_path / 'Good.txt', ['Play|space|Transport'])
+    (tmp_path / 'Bad.json').write_text('{not json')
+
+    stats = ingest_directory(db, str(tmp_path), workers=1)
+
+    assert stats['Good']['inserted'] == 1
+    assert stats['Bad']['rows'] == 0
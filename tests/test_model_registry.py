@@ -0,0 +1,92 @@
+"""ModelRegistry: one load per model, shared by reference count"""
+import threading
+
+import pytest
+
+pytest.importorskip('vosk')
+import model_registry
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replace the Vosk model and recognizer with recorders; fail the load of any path named 'broken'"""
+    calls = []
+
+    class Model:
+        def __init__(self, path):
+            calls.append(path)
+            if 'broken' in path:
+                raise OSError(f"cannot open {path}")
+
+    monkeypatch.setattr(model_registry, 'Model', Model)
+    monkeypatch.setattr(model_registry, 'KaldiRecognizer', lambda model, rate, *grammar: (model, rate) + grammar)
+    return calls
+
+
+def test_acquire_loads_once_and_shares(loads):
+    registry = ModelRegistry()
+
+    first = registry.acquire('model')
+    second = registry.acquire('model')
+
+    assert first is second and loads == ['model']
+    assert registry.stats()[0]['refcount'] == 2
+
+
+def test_concurrent_acquires_share_one_load(loads):
+    registry = ModelRegistry()
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.acquire('model'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ['model'] and len({id(model) for model in models}) == 1
+
+
+def test_last_release_frees_the_model(loads):
+    registry = ModelRegistry()
+    registry.acquire('model')
+    registry.acquire('model')
+
+    registry.release('model')
+    assert registry.stats()[0]['refcount'] == 1
+    registry.release('model')
+    assert registry.stats() == []
+
+    registry.acquire('model')
+    assert loads == ['model', 'model']
+
+
+def test_failed_load_is_retried(loads):
+    registry = ModelRegistry()
+
+    with pytest.raises(OSError):
+        registry.acquire('broken')
+    with pytest.raises(OSError):
+        registry.acquire('broken')
+
+    assert loads == ['broken', 'broken'] and registry.stats() == []
+
+
+def test_recognizers_require_a_reference(loads):
+    registry = ModelRegistry()
+    with pytest.raises(RuntimeError):
+        registry.create_recognizer('model')
+
+    model = registry.acquire('model')
+    assert registry.create_recognizer('model', 8000) == (model, 8000)
+    assert registry.create_recognizer('model', grammar=['play']) == (model, 16000, '["play"]')
+
+    registry.release('model')
+    with pytest.raises(RuntimeError):
+        registry.create_recognizer('model')
+
+
+def test_resident_size_is_measured(loads):
+    registry = ModelRegistry()
+    registry.acquire('model')
+
+    assert registry.stats()[0]['resident_bytes'] is not None
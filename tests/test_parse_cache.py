@@ -0,0 +1,135 @@
+"""ParseCache: reuse parsed keymaps while their content is unchanged"""
+import marshal
+import os
+import zlib
+
+import parse_cache
+from conftest import flush
+
+
+def write_keymap(path, count):
+    path.write_text(''.join(f"Command {i}|F{i}|Group\n" for i in range(count)))
+
+
+def counting_parser(db):
+    calls = []
+
+    def parse(path):
+        calls.append(path)
+        return db.iter_kbs_records(path)
+    return parse, calls
+
+
+def test_miss_then_hit(db, tmp_path):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 12000)  # More than one packed batch
+    parse, calls = counting_parser(db)
+
+    first, sha256 = db.parse_cache.load(str(path), parse)
+    flush(db)
+    second, again = db.parse_cache.load(str(path), parse)
+
+    assert len(calls) == 1
+    assert second == first and len(first) == 12000 and again == sha256
+    assert (db.parse_cache.misses, db.parse_cache.hits) == (1, 1)
+
+
+def test_touched_but_unchanged_file_is_a_hit(db, tmp_path):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 10)
+    parse, calls = counting_parser(db)
+    db.parse_cache.load(str(path), parse)
+    flush(db)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    records, _ = db.parse_cache.load(str(path), parse)
+
+    assert len(calls) == 1 and len(records) == 10
+    flush(db)
+    with db.reading() as conn:
+        cached_mtime, = conn.execute("SELECT mtime_ns FROM parse_cache").fetchone()
+    assert cached_mtime == os.stat(path).st_mtime_ns  # The next check skips hashing
+
+
+def test_changed_file_is_a_miss(db, tmp_path):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 10)
+    parse, calls = counting_parser(db)
+    db.parse_cache.load(str(path), parse)
+    flush(db)
+
+    write_keymap(path, 11)
+    records, _ = db.parse_cache.load(str(path), parse)
+
+    assert len(calls) == 2 and len(records) == 11
+
+
+def test_partly_consumed_stream_is_not_cached(db, tmp_path):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 10)
+    parse, calls = counting_parser(db)
+
+    stream = db.parse_cache.records(str(path), parse)
+    next(stream)
+    stream.close()
+    flush(db)
+    db.parse_cache.load(str(path), parse)
+
+    assert len(calls) == 2
+
+
+def test_import_skips_unchanged_file_without_reading_records(db, tmp_path, monkeypatch):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 10)
+    assert db.import_kbs_commands(str(path))
+    flush(db)
+
+    monkeypatch.setattr(db.parse_cache, 'records', lambda *args: (_ for _ in ()).throw(AssertionError))
+    assert db.import_kbs_commands(str(path))
+
+
+def test_entry_from_another_python_is_a_miss(db, tmp_path):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 10)
+    parse, calls = counting_parser(db)
+    db.parse_cache.load(str(path), parse)
+    flush(db)
+    db.write(lambda conn: conn.execute("UPDATE parse_cache SET format = 'python2.7-marshal2'"))
+
+    assert db.parse_cache.lookup(str(path))[1] is None
+    records, _ = db.parse_cache.load(str(path), parse)
+
+    assert len(calls) == 2 and len(records) == 10
+    flush(db)
+    with db.reading() as conn:
+        assert conn.execute("SELECT format FROM parse_cache").fetchone() == (parse_cache.FORMAT,)
+
+
+def test_corrupt_entry_is_dropped_and_reparsed(db, tmp_path):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 10)
+    parse, calls = counting_parser(db)
+    expected, _ = db.parse_cache.load(str(path), parse)
+    flush(db)
+    db.write(lambda conn: conn.execute("UPDATE parse_cache SET records = ?", (b'not zlib',)))
+
+    records, _ = db.parse_cache.load(str(path), parse)
+    assert len(calls) == 2 and records == expected
+    flush(db)
+    assert db.parse_cache.load(str(path), parse)[0] == expected
+    assert len(calls) == 2  # The re-parse replaced the bad entry
+
+
+def test_entry_failing_midway_resumes_without_repeating_records(db, tmp_path):
+    path = tmp_path / 'keys.kbs'
+    write_keymap(path, 10)
+    parse, calls = counting_parser(db)
+    expected, _ = db.parse_cache.load(str(path), parse)
+    flush(db)
+    # A valid first chunk followed by a truncated marshal stream
+    blob = zlib.compress(marshal.dumps(expected[:4]) + marshal.dumps(expected[4:])[:-3])
+    db.write(lambda conn: conn.execute("UPDATE parse_cache SET records = ?", (blob,)))
+
+    records, _ = db.parse_cache.load(str(path), parse)
+    assert len(calls) == 2 and records == expected
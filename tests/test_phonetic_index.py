@@ -0,0 +1,39 @@
+from phonetic_index import PhoneticIndex, metaphone, phonetic_key
+
+
+def test_metaphone_keys_homophones_alike():
+    assert metaphone('knight') == metaphone('night')
+    assert metaphone('phone') == metaphone('fone')
+    assert metaphone('record') == metaphone('rekord')
+    assert metaphone('play') != metaphone('stop')
+
+
+def test_phonetic_key_ignores_word_breaks():
+    assert phonetic_key('fast forward') == phonetic_key('fastforward')
+    assert phonetic_key('') is None
+
+
+def test_lookup_returns_only_unambiguous_matches():
+    index = PhoneticIndex()
+    index.add('record')
+    index.add('play')
+    assert index.lookup('rekord') == 'record'
+    assert index.lookup('xyzzy') is None
+
+    index.add('pull')  # Same key as 'play'
+    assert index.lookup('plae') is None
+
+    index.remove('pull')
+    assert index.lookup('plae') == 'play'
+    index.remove('play')
+    assert index.lookup('plae') is None
+
+
+def test_match_applies_the_similarity_floor():
+    index = PhoneticIndex()
+    index.add('record')
+    index.add('stop')
+    assert index.match('rekord') == ('record', True)
+    assert index.match('step') == ('stop', False)  # Same key, but spelled too differently
+    assert index.match('step', min_similarity=50) == ('stop', True)
+    assert index.match('xyzzy') == (None, False)
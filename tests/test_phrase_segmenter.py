@@ -0,0 +1,45 @@
+"""PhraseSegmenter: longest-match splitting of chained commands"""
+from phrase_segmenter import PhraseSegmenter
+
+
+def segment(segmenter, text, names=()):
+    return segmenter.segment(text.split(), names)
+
+
+def test_longest_match_wins():
+    segmenter = PhraseSegmenter(['play', 'play selection', 'stop'])
+
+    assert segment(segmenter, 'play selection stop') == [('play selection', True), ('stop', True)]
+    assert segment(segmenter, 'play stop') == [('play', True), ('stop', True)]
+
+
+def test_unknown_runs_become_one_segment():
+    segmenter = PhraseSegmenter(['stop'])
+
+    assert segment(segmenter, 'go fast stop now') == [('go fast', False), ('stop', True), ('now', False)]
+
+
+def test_partial_prefix_falls_back_to_shorter_phrase():
+    segmenter = PhraseSegmenter(['zoom', 'zoom in fully'])
+
+    assert segment(segmenter, 'zoom in') == [('zoom', True), ('in', False)]
+
+
+def test_two_word_names_stay_together():
+    segmenter = PhraseSegmenter(['record', 'play selection'])
+    names = {'record enable', 'play selection extra'}
+
+    assert segment(segmenter, 'record enable', names) == [('record enable', True)]
+    assert segment(segmenter, 'play selection', names) == [('play selection', True)]
+
+
+def test_remove_prunes_only_its_phrase():
+    segmenter = PhraseSegmenter(['play', 'play selection', 'stop'])
+
+    segmenter.remove('play selection')
+    segmenter.remove('not there')
+
+    assert len(segmenter) == 2
+    assert segmenter.root == {'play': {None: 'play'}, 'stop': {None: 'stop'}}
+    segmenter.remove('play')
+    assert segment(segmenter, 'play stop') == [('play', False), ('stop', True)]
@@ -0,0 +1,38 @@
+"""ResolutionCache: bounded LRU of resolution decisions"""
+from resolution_cache import ResolutionCache
+
+
+def test_get_put_and_counters():
+    cache = ResolutionCache(maxsize=2)
+
+    assert cache.get(('play', 1, None)) is None
+    cache.put(('play', 1, None), ('direct', {'voice_text': 'play'}))
+
+    assert cache.get(('play', 1, None)) == ('direct', {'voice_text': 'play'})
+    assert cache.get(('play', 2, None)) is None  # A new catalog version is a new key
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 2, 1 / 3)
+
+
+def test_evicts_least_recently_used():
+    cache = ResolutionCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')  # 'b' is now the oldest
+
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_clear_counts_flushes_only_when_not_empty():
+    cache = ResolutionCache()
+    cache.clear()
+    cache.put('a', 1)
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.stats()['flushes'] == 1
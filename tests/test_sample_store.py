@@ -0,0 +1,60 @@
+"""SampleStore: learned samples persist, and the least valuable are evicted past the cap"""
+import time
+
+from conftest import flush
+from sample_store import SampleStore
+
+
+def entry(success_count, last_success, golden=False):
+    return {'samples': ['x'], 'last_success': last_success,
+            'success_count': success_count, 'is_golden': golden}
+
+
+def test_flush_round_trips_through_the_table(db):
+    store = SampleStore(db)
+    now = time.time()
+    entries = {'play': entry(3, now, golden=True), 'stop': entry(1, now)}
+    store.mark('play')
+    store.mark('stop')
+    store.flush(entries)
+    flush(db)
+
+    assert SampleStore(db).load() == entries
+    assert store.dirty == set()
+
+
+def test_only_marked_phrases_are_written(db):
+    store = SampleStore(db)
+    entries = {'play': entry(1, time.time()), 'stop': entry(1, time.time())}
+    store.mark('play')
+    store.flush(entries)
+    flush(db)
+    assert set(SampleStore(db).load()) == {'play'}
+
+
+def test_score_halves_every_half_life(db):
+    store = SampleStore(db, half_life_days=1)
+    now = time.time()
+    assert store.score(entry(8, now), now) == 8
+    assert store.score(entry(8, now - 86400), now) == 4
+    assert store.score(entry(8, now - 2 * 86400), now) == 2
+
+
+def test_evict_drops_the_lowest_scores_past_the_cap(db):
+    store = SampleStore(db, max_entries=2, half_life_days=1)
+    now = time.time()
+    entries = {
+        'frequent': entry(10, now),
+        'recent': entry(2, now),
+        'stale': entry(10, now - 10 * 86400),  # 10 halvings: worth less than 'recent'
+    }
+    for text in entries:
+        store.mark(text)
+    store.flush(entries)
+
+    assert store.evict(entries) == ['stale']
+    assert set(entries) == {'frequent', 'recent'}
+    assert store.evictions == 1
+    flush(db)
+    assert set(SampleStore(db).load()) == {'frequent', 'recent'}
+    assert store.evict(entries) == []
@@ -0,0 +1,97 @@
+"""ShortcutParser streaming readers for pipe text, XML and JSON keymaps"""
+import pytest
+
+from shortcut_parser import ShortcutParser
+
+
+def parse(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return list(ShortcutParser(None).iter_records(str(path)))
+
+
+def test_pipe_text_skips_nameless_lines(tmp_path):
+    records = parse(tmp_path, 'keys.kbs', "Play|Space|Transport\n|Ctrl+X|Edit\nUndo|Ctrl+Z\nMute||\n")
+
+    assert records == [('Play', 'Space', 'Transport'), ('Undo', 'Ctrl+Z', None), ('Mute', None, None)]
+
+
+def test_xml_attributes_children_and_categories(tmp_path):
+    records = parse(tmp_path, 'keys.xml', """<?xml version="1.0"?>
+        <KeyScheme xmlns="urn:keys">
+          <Category name="Transport">
+            <Command name="Play" shortcut="Space"/>
+            <Command name="Unbound"/>
+            <Group>
+              <Shortcut><Name>Stop</Name><Key>Num0</Key></Shortcut>
+            </Group>
+          </Category>
+          <Command name="Undo" shortcut="Ctrl+Z" category="Edit"/>
+        </KeyScheme>""")
+
+    assert records == [('Play', 'Space', 'Transport'), ('Stop', 'Num0', 'Transport'),
+                       ('Undo', 'Ctrl+Z', 'Edit')]
+
+
+def test_xml_detaches_finished_elements(tmp_path, monkeypatch):
+    """Records, unbound commands and wrappers are all removed from the tree once parsed"""
+    import xml.etree.ElementTree as ET
+    roots = []
+    iterparse = ET.iterparse
+
+    def spy(*args, **kwargs):
+        for event, elem in iterparse(*args, **kwargs):
+            if event == 'start' and not roots:
+                roots.append(elem)
+            yield event, elem
+    monkeypatch.setattr(ET, 'iterparse', spy)
+
+    body = ''.join(f'<Command name="Unbound {i}"/><Command name="C{i}" shortcut="F{i}"/>' for i in range(50))
+    records = parse(tmp_path, 'keys.xml', f'<Keys><Category name="A">{body}</Category>{body}</Keys>')
+
+    assert len(records) == 100
+    assert len(roots[0]) == 0
+
+
+def test_json_array_of_records(tmp_path):
+    records = parse(tmp_path, 'keys.json',
+                    '[{"name": "Play", "shortcut": "Space", "category": "Transport"},'
+                    ' {"Command": "Undo", "Keys": ["Ctrl", "Z"]}]')
+
+    assert records == [('Play', 'Space', 'Transport'), ('Undo', 'Ctrl, Z', None)]
+
+
+def test_json_object_streams_record_lists_under_its_category(tmp_path):
+    records = parse(tmp_path, 'keys.json',
+                    '{"category": "Transport", "shortcuts": [{"name": "Play", "shortcut": "Space"}],'
+                    ' "groups": {"name": "Edit", "commands": [{"name": "Undo", "shortcut": "Ctrl+Z"}]}}')
+
+    assert records == [('Play', 'Space', 'Transport'), ('Undo', 'Ctrl+Z', 'Edit')]
+
+
+def test_json_object_decodes_other_lists_whole(tmp_path):
+    """A top-level record whose shortcut is a list is one record, not a stream of items"""
+    records = parse(tmp_path, 'keys.json', '{"keys": ["Ctrl", "P"], "name": "Print"}')
+
+    assert records == [('Print', 'Ctrl, P', None)]
+
+
+def test_json_lines(tmp_path):
+    records = parse(tmp_path, 'keys.json',
+                    '{"name": "Play", "shortcut": "Space"}\n{"name": "Stop", "shortcut": "Num0"}\n')
+
+    assert records == [('Play', 'Space', None), ('Stop', 'Num0', None)]
+
+
+def test_json_values_split_across_chunks(tmp_path):
+    path = tmp_path / 'keys.json'
+    path.write_text('[' + ', '.join(f'{{"name": "Command {i}", "shortcut": "F{i}"}}' for i in range(40)) + ']')
+
+    records = list(ShortcutParser(None)._iter_json(str(path), chunk_size=7))
+
+    assert records == [(f'Command {i}', f'F{i}', None) for i in range(40)]
+
+
+def test_unsupported_extension(tmp_path):
+    with pytest.raises(ValueError):
+        parse(tmp_path, 'keys.csv', 'Play,Space')
@@ -0,0 +1,57 @@
+"""SpeechRecognizer decisions on decoder output, without a model or microphone"""
+import pytest
+
+pytest.importorskip('vosk')
+pytest.importorskip('pyaudio')
+from conftest import flush
+from speech_recognition import SpeechRecognizer
+
+
+@pytest.fixture
+def recognizer(db):
+    for name in ('Play', 'Stop', 'Rewind', 'Record'):
+        db.add_command(name, f'ctrl+{name[0].lower()}', 'Transport', name.lower())
+    flush(db)
+    return SpeechRecognizer(db, use_vad=False, defer_resources=True)
+
+
+def nbest(*hypotheses):
+    return {'alternatives': [{'text': text, 'confidence': score} for text, score in hypotheses]}
+
+
+def test_single_hypothesis_reports_no_confidence(recognizer):
+    assert recognizer.choose_hypothesis(nbest(('play', 300))) == ('play', {})
+
+
+def test_agreeing_hypotheses_report_no_confidence(recognizer):
+    # Both clean to 'play': the pooled posterior would be 1.0 by construction
+    assert recognizer.choose_hypothesis(nbest(('play', 300), ('the play', 290))) == ('play', {})
+
+
+def test_decoder_consensus_over_distinct_hypotheses_is_passed_on(recognizer):
+    text, confidences = recognizer.choose_hypothesis(nbest(('play', 300), ('plays', 200)))
+    assert text == 'play'
+    assert confidences['play'] >= recognizer.FAST_PATH_CONFIDENCE
+
+
+def test_split_vote_reports_no_confidence(recognizer):
+    assert recognizer.choose_hypothesis(nbest(('play', 300), ('stop', 299)))[1] == {}
+
+
+def test_single_best_word_confidences_are_kept(recognizer):
+    result = {'text': 'play', 'result': [{'word': 'play', 'conf': 0.42}]}
+    assert recognizer.choose_hypothesis(result) == ('play', {'play': 0.42})
+
+
+def test_more_acoustic_confidence_never_rejects_a_resolvable_word(recognizer):
+    # 'plays' blends into the clarify band at high acoustic confidence, where the
+    # closest-command lookup finds nothing; it must still reach the variation tier
+    outcomes = [recognizer.classify('plays', acoustic) for acoustic in (None, 0.8, 0.95, 1.0)]
+    assert [tier for tier, _ in outcomes] == ['variation'] * 4
+    assert {details['voice_text'] for _, details in outcomes} == {'Play'}
+    scores = [details['confidence'] for _, details in outcomes]
+    assert scores == sorted(scores)
+
+
+def test_unknown_word_is_rejected(recognizer):
+    assert recognizer.classify('xylophone', 1.0) == ('reject', None)
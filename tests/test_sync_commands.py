@@ -0,0 +1,59 @@
+"""Database.sync_commands: diff-based keymap sync"""
+from conftest import rows
+
+
+def test_first_sync_adds_everything(db):
+    changes = db.sync_commands([('Play', 'Space', 'Transport'), ('Stop', 'Num0', 'Transport')])
+
+    assert [name for name, _, _ in changes.added] == ['Play', 'Stop']
+    assert not changes.removed and not changes.changed and changes.unchanged == 0
+    assert rows(db) == {'Play': ('Space', 'Transport', 'play'), 'Stop': ('Num0', 'Transport', 'stop')}
+
+
+def test_sync_reports_added_removed_changed_unchanged(db):
+    db.sync_commands([('Play', 'Space', 'Transport'), ('Stop', 'Num0', 'Transport'),
+                      ('Loop', 'L', 'Transport')])
+
+    changes = db.sync_commands([('Play', 'Space', 'Transport'),   # unchanged
+                                ('stop', 'Num1', 'Transport'),    # shortcut changed, name case ignored
+                                ('Record', 'R', 'Transport')])    # added; Loop removed
+
+    assert [name for name, _, _ in changes.added] == ['Record']
+    assert [name for name, _, _ in changes.removed] == ['Loop']
+    assert [name for name, _, _ in changes.changed] == ['Stop']
+    assert changes.unchanged == 1
+    assert rows(db) == {'Play': ('Space', 'Transport', 'play'), 'Stop': ('Num1', 'Transport', 'stop'),
+                        'Record': ('R', 'Transport', 'record')}
+
+
+def test_sync_keeps_trained_voice_mappings(db):
+    db.sync_commands([('Play', 'Space', 'Transport')])
+    assert db.add_command_mapping('Play', 'start playback')
+
+    changes = db.sync_commands([('Play', 'Enter', 'Transport')])
+
+    assert [name for name, _, _ in changes.changed] == ['Play']
+    assert rows(db)['Play'] == ('Enter', 'Transport', 'start playback')
+
+
+def test_sync_is_scoped_to_one_program(db):
+    db.sync_commands([('Play', 'Space', 'Transport')], 'Studio One')
+    db.sync_commands([('Play', 'P', 'Transport')], 'Ableton')
+
+    changes = db.sync_commands([], 'Ableton')
+
+    assert [name for name, _, _ in changes.removed] == ['Play']
+    assert rows(db, 'Ableton') == {}
+    assert rows(db, 'Studio One') == {'Play': ('Space', 'Transport', 'play')}
+
+
+def test_sync_patches_the_catalog_snapshot(db):
+    db.sync_commands([('Play', 'Space', 'Transport')])
+    before = db.catalog.current()
+
+    db.sync_commands([('Play', 'Space', 'Transport'), ('Stop', 'Num0', 'Transport')])
+
+    after = db.catalog.current()
+    assert after.voice_commands == {'play', 'stop'}
+    assert after.version == before.version + 1
+    assert db.catalog.patches >= 1
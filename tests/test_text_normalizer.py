@@ -0,0 +1,28 @@
+"""TextNormalizer: stopwords, rewrites and protected catalog phrases"""
+from text_normalizer import TextNormalizer
+
+
+def test_drops_stopwords_and_unknown_tokens():
+    assert TextNormalizer().normalize('Please  [unk] play the   Song now') == 'play song'
+
+
+def test_rewrites_phrases():
+    assert TextNormalizer().normalize('run system track') == 'run systemcheck'
+    assert TextNormalizer().normalize('clay') == 'play'
+
+
+def test_matches_whole_words_only():
+    assert TextNormalizer().normalize('theme another') == 'theme another'
+
+
+def test_protected_phrases_keep_their_stopwords():
+    normalizer = TextNormalizer(protected=['Go to Start'])
+
+    assert normalizer.normalize('go to start') == 'go to start'
+    assert normalizer.normalize('go to end') == 'go end'
+
+
+def test_custom_rules():
+    normalizer = TextNormalizer([('uh', None), ('mute it', 'mute')])
+
+    assert normalizer.normalize('uh mute it the') == 'mute the'
@@ -0,0 +1,24 @@
+"""TrainingModule: learned variations land on the right program's command"""
+import pytest
+
+pytest.importorskip('vosk')
+pytest.importorskip('pyaudio')
+from conftest import rows
+from training_module import TrainingModule
+
+
+def test_variation_is_stored_for_one_program_only(db):
+    db.add_command('Undo', 'ctrl+z', 'Edit', 'undo', 'Studio One')
+    db.add_command('Undo', 'cmd+z', 'Edit', 'undo', 'Reaper')
+    training = TrainingModule(db, model=object(), recognizer=object())
+
+    assert training.store_command_variation('Undo', 'take back', 'Reaper')
+    assert rows(db, 'Reaper')['Undo'][2] == 'take back'
+    assert rows(db)['Undo'][2] == 'undo'
+    assert training.training_history['Undo']['variations'] == 'take back'
+
+
+def test_variation_of_an_unknown_command_is_refused(db):
+    training = TrainingModule(db, model=object(), recognizer=object())
+    assert not training.store_command_variation('Missing', 'gone')
+    assert training.training_history == {}
@@ -0,0 +1,60 @@
+"""VoiceActivityGate: skip silence, keep pre-roll and hangover, report the closing chunk"""
+import numpy as np
+
+from voice_activity import VoiceActivityGate
+
+CHUNK = 1600  # 100 ms at 16 kHz
+
+
+def silence():
+    return np.zeros(CHUNK, dtype=np.int16).tobytes()
+
+
+def speech():
+    t = np.arange(CHUNK) / 16000.0
+    return (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16).tobytes()
+
+
+def test_silence_is_skipped():
+    gate = VoiceActivityGate()
+
+    assert all(gate.process(silence()) == [] for _ in range(10))
+    assert not gate.is_open
+    assert gate.stats()['chunks_skipped'] == 10
+
+
+def test_speech_is_forwarded_with_preroll():
+    gate = VoiceActivityGate(preroll_ms=200)
+    for _ in range(5):
+        gate.process(silence())
+
+    forwarded = gate.process(speech())
+
+    assert len(forwarded) == 3  # Two 100 ms pre-roll chunks, then the speech
+    assert forwarded[-1] == speech()
+    assert gate.is_open
+    assert gate.stats()['chunks_skipped'] == 3
+
+
+def test_hangover_then_close_reports_utterance_end_once():
+    gate = VoiceActivityGate(hangover_ms=300)
+    gate.process(speech())
+
+    hangover = [gate.process(silence()) for _ in range(3)]
+    closing = gate.process(silence())
+    ended = gate.utterance_ended
+    later = gate.process(silence())
+
+    assert all(len(chunks) == 1 for chunks in hangover)
+    assert closing == [] and ended and not gate.is_open
+    assert later == [] and not gate.utterance_ended
+
+
+def test_reset_closes_the_gate():
+    gate = VoiceActivityGate()
+    gate.process(speech())
+
+    gate.reset()
+
+    assert not gate.is_open and not gate.utterance_ended
+    assert gate.process(silence()) == [] and not gate.utterance_ended
@@ -0,0 +1,77 @@
+"""One-pass text normalization: stopwords and phrase rewrites compiled into a single regex"""
+import re
+
+# Seeded into the normalization_rules table; replacement None = drop the word
+DEFAULT_RULES = [
+    ('the', None), ('a', None), ('an', None), ('to', None), ('and', None),
+    ('please', None), ('now', None), ('just', None), ('in', None),
+    # Misrecognitions that do not sound alike (homophones go through the phonetic index)
+    ('system track', 'systemcheck'),
+    ('clay', 'play'),
+]
+
+def trie_pattern(phrases):
+    """Regex source matching any of phrases, factored as a character trie
+
+    Alternatives sharing a prefix share one branch, so matching cost grows
+    with phrase length instead of with the number of phrases.
+    """
+    root = {}
+    for phrase in phrases:
+        node = root
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        optional = '' in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if optional else group
+
+    return build(root)
+
+class TextNormalizer:
+    def __init__(self, rules=DEFAULT_RULES, protected=()):
+        """rules: (phrase, replacement or None); protected: phrases kept verbatim (catalog commands)"""
+        self.replacements = {}
+        for phrase, replacement in rules:
+            phrase = ' '.join(phrase.lower().split())
+            if phrase:
+                self.replacements[phrase] = ' '.join((replacement or '').lower().split())
+        # A catalog command containing a stopword ('go to start') must survive intact
+        for phrase in protected:
+            phrase = ' '.join(phrase.lower().split())
+            if any(word in self.replacements for word in phrase.split()):
+                self.replacements[phrase] = phrase
+        self.pattern = None
+        if self.replacements:
+            self.pattern = re.compile(r'\b(?:' + trie_pattern(self.replacements) + r')\b')
+
+    def _replace(self, match):
+        return self.replacements[match.group(0)]
+
+    def normalize(self, text):
+        """Lowercase, drop [unk] and stopwords, apply rewrites and collapse whitespace"""
+        text = ' '.join(text.lower().replace('[unk]', ' ').split())
+        if self.pattern:
+            text = self.pattern.sub(self._replace, text)
+        return ' '.join(text.split())
+
+    @classmethod
+    def load(cls, database):
+        """Build from the normalization_rules table, protecting the catalog's voice commands"""
+        rules = DEFAULT_RULES
+        try:
+            with database.lock, database.reading() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT phrase, replacement FROM normalization_rules")
+                rules = cursor.fetchall()
+        except Exception as e:
+            print(f"DEBUG: TN - Error loading rules, using defaults: {e}")
+        protected = [voice for _, voice, _ in database.catalog.current().rows if voice]
+        return cls(rules, protected)
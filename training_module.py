@@ -1,4 +1,8 @@
-from vosk import Model, KaldiRecognizer
+from model_registry import registry, DEFAULT_MODEL_PATH
+from phonetic_index import PhoneticIndex
+from database import DEFAULT_PROGRAM
+from resolution_cache import ResolutionCache
+from text_normalizer import TextNormalizer
 import pyaudio
 import json
 import sqlite3
@@ -16,45 +20,70 @@ class TrainingModule:
         self.training_in_progress = False
         
         # Use existing model/recognizer if provided
+        self.owns_model = False
         if model and recognizer:
             self.model = model
             self.recognizer = recognizer
         else:
-            self.model = Model("vosk-model-small-en-us")
-            self.recognizer = KaldiRecognizer(self.model, 16000)
+            self.model = registry.acquire(DEFAULT_MODEL_PATH)
+            self.recognizer = registry.create_recognizer(DEFAULT_MODEL_PATH, 16000)
+            self.owns_model = True
         
         self.audio = pyaudio.PyAudio()
         self.stream = None
         
+        # Homophone-style misrecognitions resolve through phonetic keys
+        self.phonetic_index = PhoneticIndex.load(database)
+        self.normalizer = TextNormalizer.load(database)
+        self.phonetic_dirty = False
+        self.clean_cache = ResolutionCache(maxsize=256)  # (text, catalog version) -> cleaned text
+        self.db.add_change_listener(self._on_catalog_change)
+        
+    def _on_catalog_change(self, changes=None):
+        """Database listener: patch phonetic keys from a change set, else reload on next use"""
+        if changes is None:
+            self.phonetic_dirty = True
+        elif changes.voice_changed:
+            voice_commands = self.db.catalog.current().voice_commands
+            for _, voice, key in changes.removed:
+                if voice and voice.lower() not in voice_commands:
+                    self.phonetic_index.remove(voice, key)
+            for _, voice, key in changes.added:
+                if voice:
+                    self.phonetic_index.add(voice, key)
+        else:
+            return
+        self.clean_cache.clear()
+        
     def clean_text(self, text):
+        """Clean up recognized text (memoized per catalog version)"""
+        if not text:
+            return None
+        key = (text.lower().strip(), self.db.catalog.current().version)
+        cached = self.clean_cache.get(key)
+        if cached is None:
+            cached = (self._clean_text(text),)  # Wrapped so a None result is cached too
+            self.clean_cache.put(key, cached)
+        return cached[0]
+        
+    def _clean_text(self, text):
         """Clean up recognized text"""
         try:
-            # Remove common articles and clean up text
-            words_to_remove = ['the', 'a', 'an', 'to', 'and', 'please', 'now', 'just', 'in']
-            
-            # Special case handling for known command phrases and common misrecognitions
-            known_phrases = {
-                'system check': 'systemcheck',
-                'system shack': 'systemcheck',  # Add common misrecognition
-                'system track': 'systemcheck',  # Add common misrecognition
-                'clay': 'play',  # Add common misrecognition
-                'just come': 'come'
-            }
-            
-            # First check for known phrases
-            text = text.lower().strip()
-            for phrase, replacement in known_phrases.items():
-                if phrase in text:
-                    print(f"Matched phrase: '{text}' -> '{replacement}'")  # Debug print
-                    return replacement
-            
-            # Otherwise clean individual words
-            words = text.split()
-            cleaned_words = [w for w in words if w not in words_to_remove]
-            if not cleaned_words:  # Return None if no words left
+            # Stopwords and known misrecognitions in one pass (shared with the recognizer)
+            if self.phonetic_dirty:
+                self.phonetic_dirty = False
+                self.phonetic_index = PhoneticIndex.load(self.db)
+                self.normalizer = TextNormalizer.load(self.db)
+            cleaned_text = self.normalizer.normalize(text)
+            if not cleaned_text:  # Return None if no words left
                 return None
             
-            cleaned_text = ' '.join(cleaned_words)
+            # Map to the catalog command that sounds the same, if unambiguous and spelled alike
+            match, trusted = self.phonetic_index.match(cleaned_text)
+            if trusted and match != cleaned_text:
+                print(f"Phonetic match: '{cleaned_text}' -> '{match}'")
+                return match
+            
             print(f"Cleaned text: '{text}' -> '{cleaned_text}'")
             return cleaned_text
             
@@ -69,19 +98,10 @@ class TrainingModule:
             if not cleaned_text:
                 return False
                 
-            with sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT command_name, voice_command 
-                    FROM commands 
-                    WHERE LOWER(voice_command) = LOWER(?)
-                """, (cleaned_text,))
-                result = cursor.fetchone()
-                
-                if not result:
-                    print(f"Training needed: '{cleaned_text}' not found in commands")
-                    return True
-                return False
+            if self.db.catalog.current().command_for(cleaned_text) is None:
+                print(f"Training needed: '{cleaned_text}' not found in commands")
+                return True
+            return False
                 
         except sqlite3.Error as e:
             print(f"Database error: {e}")
@@ -149,37 +169,24 @@ class TrainingModule:
         result = json.loads(self.recognizer.FinalResult())
         return result.get("text", "")
         
-    def store_command_variation(self, command_name, variation):
-        """Store a new variation of a command"""
-        try:
-            with sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                # Store the variation
-                cursor.execute("""
-                    UPDATE commands 
-                    SET voice_command = ?,
-                        updated_at = CURRENT_TIMESTAMP 
-                    WHERE command_name = ?
-                """, (variation, command_name))
-                conn.commit()
-                
-                # Update training history
-                self.training_history[command_name] = {
-                    'last_trained': datetime.now(),
-                    'variations': variation
-                }
-                
-                return True
-                
-        except sqlite3.Error as e:
-            print(f"Error storing variation: {e}")
+    def store_command_variation(self, command_name, variation, program_name=DEFAULT_PROGRAM):
+        """Store a new variation of a program's command"""
+        if not self.db.add_command_mapping(command_name, variation, program_name):
             return False
+            
+        # Update training history
+        self.training_history[command_name] = {
+            'last_trained': datetime.now(),
+            'variations': variation
+        }
+        
+        return True
 
-    def store_command_mapping(self, command_name, voice_command):
+    def store_command_mapping(self, command_name, voice_command, program_name=DEFAULT_PROGRAM):
         """Store command mapping in database"""
         try:
             # Store in database
-            self.db.add_command_mapping(command_name, voice_command)
+            self.db.add_command_mapping(command_name, voice_command, program_name)
             
             # If using Neural Engine, enhance recognition
             if self.neural_engine:
@@ -241,6 +248,11 @@ class TrainingModule:
                 self.stream.stop_stream()
                 self.stream.close()
                 self.stream = None
+            if self.owns_model:
+                registry.release(DEFAULT_MODEL_PATH)
+                self.owns_model = False
+            self.db.remove_change_listener(self._on_catalog_change)
+            self.clean_cache.report("TM")
         except Exception as e:
             print(f"Error during cleanup: {e}") 
 
@@ -0,0 +1,122 @@
+"""Energy-based voice activity gate in front of the Kaldi recognizer"""
+import numpy as np
+import time
+from collections import deque
+
+class VoiceActivityGate:
+    def __init__(self, rate=16000, frame_ms=20, threshold_db=-45.0, noise_margin_db=10.0,
+                 hangover_ms=600, preroll_ms=300):
+        """Configure frame size, energy threshold, hangover and pre-roll"""
+        self.rate = rate
+        self.frame_len = rate * frame_ms // 1000
+        self.threshold_db = threshold_db        # Absolute floor for speech energy
+        self.noise_margin_db = noise_margin_db  # Speech must clear the noise floor by this much
+        self.hangover_samples = rate * hangover_ms // 1000
+        self.preroll_samples = rate * preroll_ms // 1000
+        self.noise_floor_db = threshold_db - noise_margin_db
+
+        self.preroll = deque()
+        self.preroll_len = 0
+        self.hangover_left = 0
+        self.is_open = False
+        self.utterance_ended = False  # True for the chunk that closed the gate
+
+        # Statistics
+        self.chunks_total = 0
+        self.chunks_skipped = 0
+        self.frames_total = 0
+        self.frames_skipped = 0
+        self.gate_cpu = 0.0           # CPU seconds spent in the gate itself
+        self.decode_cpu = 0.0         # CPU seconds spent in AcceptWaveform
+        self.decoded_samples = 0
+
+    def reset(self):
+        """Forget buffered audio and close the gate (e.g. on mic toggle)"""
+        self.preroll.clear()
+        self.preroll_len = 0
+        self.hangover_left = 0
+        self.is_open = False
+        self.utterance_ended = False
+
+    def frame_energy_db(self, samples):
+        """Return the level in dBFS of every full frame in samples"""
+        usable = len(samples) - len(samples) % self.frame_len
+        frames = samples[:usable].astype(np.float32).reshape(-1, self.frame_len)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        return 20.0 * np.log10(rms / 32768.0 + 1e-10)
+
+    def process(self, data):
+        """Return the list of chunks that should be forwarded to the recognizer"""
+        started = time.thread_time()
+        samples = np.frombuffer(data, dtype=np.int16)
+        levels = self.frame_energy_db(samples)
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        speech = levels > threshold
+
+        # Track the noise floor from non-speech frames only
+        quiet = levels[~speech]
+        if quiet.size:
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * float(np.median(quiet))
+
+        self.chunks_total += 1
+        self.frames_total += levels.size
+        self.utterance_ended = False
+
+        if speech.any():
+            # Pre-roll chunks were counted as skipped but are decoded after all
+            for chunk in self.preroll:
+                self.chunks_skipped -= 1
+                self.frames_skipped -= len(chunk) // 2 // self.frame_len
+            forward = list(self.preroll) + [data]
+            self.preroll.clear()
+            self.preroll_len = 0
+            self.hangover_left = self.hangover_samples
+            self.is_open = True
+        elif self.hangover_left > 0:
+            # Keep feeding trailing silence so Kaldi can endpoint the utterance
+            forward = [data]
+            self.hangover_left -= len(samples)
+        else:
+            forward = []
+            # Kaldi will see no more silence: the caller must finalize the utterance itself
+            self.utterance_ended = self.is_open
+            self.is_open = False
+            self.chunks_skipped += 1
+            self.frames_skipped += levels.size
+            self.preroll.append(data)
+            self.preroll_len += len(samples)
+            while self.preroll and self.preroll_len - len(self.preroll[0]) // 2 >= self.preroll_samples:
+                self.preroll_len -= len(self.preroll.popleft()) // 2
+
+        self.gate_cpu += time.thread_time() - started
+        return forward
+
+    def record_decode(self, cpu_seconds, num_bytes):
+        """Account the CPU cost of one AcceptWaveform call"""
+        self.decode_cpu += cpu_seconds
+        self.decoded_samples += num_bytes // 2
+
+    def stats(self):
+        """Return skip counts and the estimated CPU saved"""
+        skipped_samples = self.frames_skipped * self.frame_len
+        cost_per_sample = self.decode_cpu / self.decoded_samples if self.decoded_samples else 0.0
+        saved = skipped_samples * cost_per_sample - self.gate_cpu
+        return {
+            'chunks_total': self.chunks_total,
+            'chunks_skipped': self.chunks_skipped,
+            'frames_total': self.frames_total,
+            'frames_skipped': self.frames_skipped,
+            'skipped_seconds': skipped_samples / self.rate,
+            'decode_cpu': self.decode_cpu,
+            'gate_cpu': self.gate_cpu,
+            'cpu_saved': max(0.0, saved)
+        }
+
+    def report(self):
+        """Print gate statistics"""
+        s = self.stats()
+        share = 100.0 * s['frames_skipped'] / s['frames_total'] if s['frames_total'] else 0.0
+        print(f"DEBUG: VAD - Skipped {s['frames_skipped']}/{s['frames_total']} frames "
+              f"({share:.0f}%, {s['chunks_skipped']} chunks, {s['skipped_seconds']:.1f}s of audio); "
+              f"decode CPU {s['decode_cpu']:.2f}s, gate CPU {s['gate_cpu']:.3f}s, "
+              f"est. saved {s['cpu_saved']:.2f}s")
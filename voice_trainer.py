@@ -1,18 +1,20 @@
-import sqlite3
 import pyaudio
-from vosk import Model, KaldiRecognizer
+from model_registry import registry, DEFAULT_MODEL_PATH
+from phonetic_index import phonetic_key
+from database import Database
 
 class CommandTrainer:
     def __init__(self, db_path):
-        self.model = Model("vosk-model-small-en-us")
-        self.recognizer = KaldiRecognizer(self.model, 16000)
+        self.model = registry.acquire(DEFAULT_MODEL_PATH)
+        self.recognizer = registry.create_recognizer(DEFAULT_MODEL_PATH, 16000)
         self.audio = pyaudio.PyAudio()
         self.db_path = db_path
+        self.db = Database(db_path)  # Writes go through its writer thread (WAL)
+        self.db.initialize()
         
     def list_commands(self):
         """Display commands that need voice training"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.db.conn.cursor()
         
         cursor.execute("""
             SELECT id, command_name, shortcut, category, voice_command 
@@ -26,13 +28,11 @@ class CommandTrainer:
             status = "🗣️" if cmd[4] else "❌"  # voice_command status
             print(f"{cmd[0]}. [{status}] {cmd[1]} ({cmd[2]}) - {cmd[3]}")
             
-        conn.close()
         return commands
         
     def record_command(self, command_id):
         """Record and verify a voice command for a specific command ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.db.conn.cursor()
         
         # Get command details
         cursor.execute("SELECT command_name, shortcut FROM commands WHERE id = ?", (command_id,))
@@ -67,12 +67,12 @@ class CommandTrainer:
                     print(f"Recognized: '{command_text}'")
                     print("Is this correct? (y/n)")
                     if input().lower() == 'y':
-                        cursor.execute("""
+                        self.db.write(lambda conn: conn.execute("""
                             UPDATE commands 
-                            SET voice_command = ?, updated_at = CURRENT_TIMESTAMP 
+                            SET voice_command = ?, phonetic_key = ?, updated_at = CURRENT_TIMESTAMP 
                             WHERE id = ?
-                        """, (command_text, command_id))
-                        conn.commit()
+                        """, (command_text, phonetic_key(command_text), command_id)))
+                        self.db.notify_change()
                         print("Voice command saved!")
                         return True
                     
@@ -82,7 +82,6 @@ class CommandTrainer:
         finally:
             stream.stop_stream()
             stream.close()
-            conn.close()
 
 def main():
     db_path = "/Users/jameswatson/Cursor AI Projects/Voice Contrl Project/V1/backups/2025-01-16_21-56/studio_one_commands_2025-01-16_21-56.db"
@@ -108,6 +107,8 @@ def main():
                     print("Invalid command ID")
         elif choice == '3':
             break
+            
+    trainer.db.cleanup()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file